@@ -40,6 +40,7 @@ from anjani.util.types import CustomFilter
 
 if TYPE_CHECKING:
     from anjani.core import Anjani
+    from anjani.util.converter import InvocationPlan
 
 CommandFunc = Union[
     Callable[..., Coroutine[Any, Any, None]], Callable[..., Coroutine[Any, Any, Optional[str]]]
@@ -64,6 +65,7 @@ class Command:
     func: Union[CommandFunc, CommandFunc]
     filters: Optional[Union[Filter, CustomFilter]]
     aliases: Iterable[str]
+    plan: "InvocationPlan"
 
     def __init__(
         self,
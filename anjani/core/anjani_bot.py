@@ -75,6 +75,7 @@ class Anjani(TelegramBot, DatabaseProvider, PluginExtender, CommandDispatcher, E
             await self.dispatch_event("stop")
             if self.client.is_connected:
                 await self.client.stop()
+            await self.stop_dispatch_lanes()
 
         await self.http.close()
         await self.db.close()
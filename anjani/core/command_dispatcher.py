@@ -70,6 +70,8 @@ class CommandDispatcher(MixinBase):
             util.misc.check_filters(filters, self)
 
         cmd = command.Command(name, plug, func, filters, aliases)
+        # Resolve the argument conversion once instead of on every invocation
+        cmd.plan = util.converter.InvocationPlan(func)
 
         if name in self.commands:
             orig = self.commands[name]
@@ -140,40 +142,37 @@ class CommandDispatcher(MixinBase):
 
             if message.text is not None and message.text.startswith("/"):
                 user = message.from_user or message.sender_chat
-                if await self._limiter.exceeded(user.id):
+                chat_id = message.chat.id if message.chat else user.id
+                if not self._limiter.acquire(user.id, chat_id):
                     return False
 
+                parts = message.text.split()
+                parts[0] = parts[0][1:]
+
+                # Check if bot command contains a valid username
+                # eg: /ping@dAnjani_bot will return True
+                # If current bot instance is dAnjani_bot else False
+                if self.user.username and self.user.username in parts[0]:
+                    # Remove username from command
+                    parts[0] = parts[0].replace(f"@{self.user.username}", "")
+
+                # Filter if command is not in commands
                 try:
-                    parts = message.text.split()
-                    parts[0] = parts[0][1:]
-
-                    # Check if bot command contains a valid username
-                    # eg: /ping@dAnjani_bot will return True
-                    # If current bot instance is dAnjani_bot else False
-                    if self.user.username and self.user.username in parts[0]:
-                        # Remove username from command
-                        parts[0] = parts[0].replace(f"@{self.user.username}", "")
-
-                    # Filter if command is not in commands
-                    try:
-                        cmd = self.commands[parts[0]]
-                    except KeyError:
-                        return False
-
-                    # Check additional built-in filters
-                    if cmd.filters:
-                        if inspect.iscoroutinefunction(cmd.filters.__call__):
-                            if not await cmd.filters(client, message):
-                                return False
-                        else:
-                            if not await util.run_sync(cmd.filters, client, message):
-                                return False
-
-                    message.command = parts
-                    return True
-                finally:
-                    # Increment user limit
-                    await self._limiter.increment(user.id)
+                    cmd = self.commands[parts[0]]
+                except KeyError:
+                    return False
+
+                # Check additional built-in filters
+                if cmd.filters:
+                    if inspect.iscoroutinefunction(cmd.filters.__call__):
+                        if not await cmd.filters(client, message):
+                            return False
+                    else:
+                        if not await util.run_sync(cmd.filters, client, message):
+                            return False
+
+                message.command = parts
+                return True
 
             return False
 
@@ -195,11 +194,10 @@ class CommandDispatcher(MixinBase):
                 )
 
                 # Parse and convert handler required parameters
-                signature = inspect.signature(cmd.func)
                 args = []  # type: list[Any]
                 kwargs = {}  # type: MutableMapping[str, Any]
-                if len(signature.parameters) > 1:
-                    args, kwargs = await util.converter.parse_arguments(signature, ctx, cmd.func)
+                if cmd.plan.needs_parsing:
+                    args, kwargs = await cmd.plan.parse(ctx)
 
                 # Invoke command function
                 try:
@@ -39,6 +39,9 @@ class DatabaseProvider(MixinBase):
             client = util.db.AsyncClient(self.config.DB_URI, connect=False)
 
         self.db = client.get_database("AnjaniBot")
+        util.db.query_profiler.configure(
+            enabled=self.config.DB_PROFILE, slow_threshold=self.config.DB_SLOW_QUERY_MS / 1000
+        )
 
         # Propagate initialization to other mixins
         super().__init__(**kwargs)
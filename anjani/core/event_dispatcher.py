@@ -17,6 +17,7 @@
 
 import asyncio
 import bisect
+import time
 from datetime import datetime
 from hashlib import sha256
 from typing import TYPE_CHECKING, Any, MutableMapping, MutableSequence, Optional, Tuple
@@ -24,7 +25,7 @@ from typing import TYPE_CHECKING, Any, MutableMapping, MutableSequence, Optional
 from pyrogram import raw
 from pyrogram.filters import Filter
 from pyrogram.raw import functions
-from pyrogram.types import CallbackQuery, InlineQuery, Message
+from pyrogram.types import CallbackQuery, ChatMemberUpdated, InlineQuery, Message
 
 from anjani import plugin, util
 from anjani.error import EventDispatchError
@@ -32,7 +33,13 @@ from anjani.listener import Listener, ListenerFunc
 from anjani.util.misc import StopPropagation
 
 from .anjani_mixin_base import MixinBase
-from .metrics import EventCount, EventLatencySecond, UnhandledError
+from .metrics import (
+    DispatchLaneDepth,
+    DispatchLaneWaitSecond,
+    EventCount,
+    EventLatencySecond,
+    UnhandledError,
+)
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -42,6 +49,8 @@ EventType = (
     InlineQuery,
     Message,
 )
+# Maximum pending updates per lane before the producer waits
+LANE_QUEUE_SIZE = 1000
 
 
 def _get_event_data(event: Any) -> MutableMapping[str, Any]:
@@ -70,6 +79,19 @@ def _get_event_data(event: Any) -> MutableMapping[str, Any]:
     return {}
 
 
+def _get_lane_key(event: Any) -> int:
+    """Get the id an update is ordered by, the chat id when there is one."""
+    if isinstance(event, (Message, ChatMemberUpdated)):
+        if event.chat:
+            return event.chat.id
+    elif isinstance(event, CallbackQuery):
+        if event.message and event.message.chat:
+            return event.message.chat.id
+
+    user = getattr(event, "from_user", None)
+    return user.id if user else 0
+
+
 def _unpack_args(args: Tuple[Any, ...]) -> str:
     """Unpack arguments into a string for logging purposes."""
     return ", ".join([str(arg) for arg in args])
@@ -78,10 +100,14 @@ def _unpack_args(args: Tuple[Any, ...]) -> str:
 class EventDispatcher(MixinBase):
     # Initialized during instantiation
     listeners: MutableMapping[str, MutableSequence[Listener]]
+    _lanes: MutableSequence["asyncio.Queue[Tuple[str, Any, float]]"]
+    _lane_workers: MutableSequence[asyncio.Task[None]]
 
     def __init__(self: "Anjani", **kwargs: Any) -> None:
         # Initialize listener map
         self.listeners = {}
+        self._lanes = []
+        self._lane_workers = []
 
         # Propagate initialization to other mixins
         super().__init__(**kwargs)
@@ -244,6 +270,65 @@ class EventDispatcher(MixinBase):
 
             return tuple(results)
 
+    def start_dispatch_lanes(self: "Anjani") -> None:
+        """Start the per-chat dispatch lanes if they are enabled in the config.
+
+        Updates of the same chat always land in the same lane and are processed
+        one by one in arrival order, while different lanes run concurrently.
+        """
+        if self._lanes or self.config.DISPATCH_LANES <= 0:
+            return
+
+        for index in range(self.config.DISPATCH_LANES):
+            lane: "asyncio.Queue[Tuple[str, Any, float]]" = asyncio.Queue(LANE_QUEUE_SIZE)
+            self._lanes.append(lane)
+            self._lane_workers.append(self.loop.create_task(self._lane_worker(index, lane)))
+
+        self.log.info("Started %d dispatch lanes", len(self._lanes))
+
+    async def stop_dispatch_lanes(self: "Anjani") -> None:
+        for worker in self._lane_workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._lane_workers, return_exceptions=True)
+        self._lane_workers.clear()
+        self._lanes.clear()
+
+    async def dispatch_event_ordered(self: "Anjani", event: str, update: Any) -> None:
+        """Dispatch a Telegram update through its chat lane.
+
+        Falls back to a direct dispatch when lanes are disabled.
+        """
+        if not self._lanes:
+            await self.dispatch_event(event, update)
+            return
+
+        index = _get_lane_key(update) % len(self._lanes)
+        lane = self._lanes[index]
+        await lane.put((event, update, time.perf_counter()))
+        DispatchLaneDepth.labels(index).set(lane.qsize())
+
+    async def _lane_worker(
+        self: "Anjani", index: int, lane: "asyncio.Queue[Tuple[str, Any, float]]"
+    ) -> None:
+        while True:
+            event, update, enqueued = await lane.get()
+            DispatchLaneDepth.labels(index).set(lane.qsize())
+            DispatchLaneWaitSecond.labels(index).observe(time.perf_counter() - enqueued)
+
+            try:
+                await self.dispatch_event(event, update)
+            except asyncio.CancelledError:
+                # Only a stop cancels the worker itself, anything else was raised by a
+                # handler and must not take the whole lane down with it
+                if self.stopping:
+                    raise
+                self.log.error("Cancelled handler in dispatch lane %d", index, exc_info=True)
+            except Exception:  # skipcq: PYL-W0703
+                self.log.error("Error in dispatch lane %d", index, exc_info=True)
+            finally:
+                lane.task_done()
+
     async def dispatch_missed_events(self: "Anjani") -> None:
         if not self.loaded or self._TelegramBot__running:
             return
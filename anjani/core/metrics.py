@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 EventCount = Counter(
     "anjani_event_count",
@@ -30,3 +30,55 @@ CommandLatencySecond = Gauge(
     labelnames=["name"],
     unit="second",
 )
+
+DispatchLaneDepth = Gauge(
+    "anjani_dispatch_lane_depth",
+    "Number of updates waiting in a dispatch lane",
+    labelnames=["lane"],
+)
+DispatchLaneWaitSecond = Histogram(
+    "anjani_dispatch_lane_wait",
+    "Time an update waited in its dispatch lane",
+    labelnames=["lane"],
+    unit="second",
+)
+
+SpamPredictionBatchFill = Histogram(
+    "anjani_spam_prediction_batch_fill",
+    "Size of spam prediction batches relative to the maximum batch size",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+SpamPredictionQueueSecond = Histogram(
+    "anjani_spam_prediction_queue",
+    "Time a message waited for its spam prediction batch",
+    unit="second",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SpamPredictionCacheCount = Counter(
+    "anjani_spam_prediction_cache",
+    "Number of spam prediction cache lookups",
+    labelnames=["result"],
+)
+
+RateLimitRejectedCount = Counter(
+    "anjani_rate_limit_rejected",
+    "Number of requests rejected by the rate limiter",
+    labelnames=["scope"],
+)
+RateLimitedCount = Counter(
+    "anjani_rate_limited",
+    "Number of times a key reached its rate limit",
+    labelnames=["scope"],
+)
+
+SessionStorageBytes = Gauge(
+    "anjani_session_storage_size",
+    "Size of the session storage files",
+    labelnames=["file"],
+    unit="bytes",
+)
+SessionStorageRows = Gauge(
+    "anjani_session_storage_rows",
+    "Number of rows in the session storage tables",
+    labelnames=["table"],
+)
@@ -0,0 +1,117 @@
+"""Anjani command rate limiter"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from typing import Callable, MutableMapping, Tuple
+
+from .metrics import RateLimitedCount, RateLimitRejectedCount
+
+
+class RateLimiter:
+    """Token bucket rate limiter keyed by an id.
+
+    Every key may burst up to `capacity` requests, tokens are refilled
+    continuously at `capacity / period` per second. Buckets are kept in a
+    plain dict in least recently used order, a bucket that has been idle
+    long enough to refill completely is the same as a missing one so it is
+    dropped lazily, and the map never grows beyond `max_size` keys.
+    """
+
+    # Initialized during instantiation
+    scope: str
+    capacity: float
+    period: float
+    rate: float
+    max_size: int
+    _buckets: MutableMapping[int, Tuple[float, float, bool]]
+    _clock: Callable[[], float]
+
+    def __init__(
+        self,
+        scope: str,
+        capacity: int,
+        period: float,
+        *,
+        max_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.scope = scope
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.max_size = max_size
+        self._buckets = {}
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: int) -> bool:
+        """Take a token from the bucket of the key.
+
+        Returns False if the key has exceeded the rate limit.
+        """
+        now = self._clock()
+        # Pop and re-insert to keep the dict ordered by last access
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens, limited = self.capacity, False
+        else:
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            limited = bucket[2]
+
+        if tokens < 1:
+            RateLimitRejectedCount.labels(self.scope).inc()
+            if not limited:
+                RateLimitedCount.labels(self.scope).inc()
+
+            self._buckets[key] = (tokens, now, True)
+            return False
+
+        self._buckets[key] = (tokens - 1, now, False)
+        self._expire(now)
+        return True
+
+    def _expire(self, now: float) -> None:
+        buckets = self._buckets
+        # The oldest bucket comes first, drop it if it's full again
+        oldest = next(iter(buckets))
+        if now - buckets[oldest][1] >= self.period:
+            del buckets[oldest]
+
+        while len(buckets) > self.max_size:
+            del buckets[next(iter(buckets))]
+
+
+class CommandRateLimiter:
+    """Per-user, per-chat and global command rate limits"""
+
+    # Initialized during instantiation
+    user: RateLimiter
+    chat: RateLimiter
+    total: RateLimiter
+
+    def __init__(self, user: RateLimiter, chat: RateLimiter, total: RateLimiter) -> None:
+        self.user = user
+        self.chat = chat
+        self.total = total
+
+    def acquire(self, user_id: int, chat_id: int) -> bool:
+        """Check and count a command, a request rejected by a narrower scope doesn't use
+        tokens of the wider ones.
+        """
+        return self.user.acquire(user_id) and self.chat.acquire(chat_id) and self.total.acquire(0)
@@ -0,0 +1,145 @@
+"""Anjani session storage replication"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from anjani import util
+from anjani.util.cache import LRUCache
+
+if TYPE_CHECKING:
+    from .sqlite_storage import Peer, SQLiteStorage
+
+
+class SessionReplica:
+    """Replicates the session row and the peers of a session storage to MongoDB.
+
+    Only new or changed peers are queued, together with peers whose copy is a
+    day old so their date keeps up for pruning. A new node rebuilds its
+    storage from the replica instead of resolving every peer again.
+    """
+
+    REFRESH_INTERVAL = 24 * 60 * 60
+    SEEN_SIZE = 100000
+    RESTORE_BATCH_SIZE = 5000
+
+    key: str
+    peers_db: util.db.AsyncCollection
+    session_db: util.db.AsyncCollection
+    peers: util.db.AsyncWriteBuffer
+    session: util.db.AsyncWriteBuffer
+    _seen: LRUCache[int, Tuple["Peer", float]]
+
+    def __init__(
+        self,
+        db: util.db.AsyncDatabase,
+        key: str,
+        *,
+        interval: float = 10.0,
+        log: Optional[logging.Logger] = None,
+    ) -> None:
+        self.key = key
+        self.peers_db = db.get_collection("SESSION_PEERS")
+        self.session_db = db.get_collection("SESSION")
+        self.peers = util.db.AsyncWriteBuffer(
+            self.peers_db, ("bot", "peer_id"), interval=interval, log=log
+        )
+        self.session = util.db.AsyncWriteBuffer(self.session_db, interval=interval, log=log)
+        self._seen = LRUCache(self.SEEN_SIZE)
+
+    async def start(self) -> None:
+        await self.peers_db.create_index([("bot", 1), ("peer_id", 1)], unique=True)
+        await self.peers_db.create_index([("bot", 1), ("date", 1)])
+        self.peers.start()
+        self.session.start()
+
+    async def close(self) -> None:
+        await self.peers.close()
+        await self.session.close()
+
+    def update_peers(self, peers: List["Peer"]) -> None:
+        now = time.time()
+        for peer in peers:
+            seen = self._seen.get(peer[0])
+            if seen is not None and seen[0] == peer and now - seen[1] < self.REFRESH_INTERVAL:
+                continue
+
+            self._seen.set(peer[0], (peer, now))
+            peer_id, access_hash, peer_type, username, phone_number = peer
+            self.peers.update(
+                (self.key, peer_id),
+                {
+                    "$set": {
+                        "access_hash": access_hash,
+                        "type": peer_type,
+                        "username": username,
+                        "phone_number": phone_number,
+                        "date": int(now),
+                    }
+                },
+                upsert=True,
+            )
+
+    def update_usernames(self, usernames: List[Tuple[int, str]]) -> None:
+        names: Dict[int, List[str]] = {}
+        for peer_id, username in usernames:
+            names.setdefault(peer_id, []).append(username)
+
+        now = int(time.time())
+        for peer_id, peer_names in names.items():
+            self.peers.update(
+                (self.key, peer_id),
+                {"$set": {"usernames": peer_names, "usernames_date": now}},
+                upsert=True,
+            )
+
+    def update_session(self, changes: Mapping[str, Any]) -> None:
+        self.session.update(
+            self.key,
+            {"$set": {f"storage.{field}": value for field, value in changes.items()}},
+            upsert=True,
+        )
+
+    async def prune(self, cutoff: int) -> None:
+        """Drop the peers the storage pruned as well"""
+        await self.peers_db.delete_many({"bot": self.key, "date": {"$lt": cutoff}})
+
+    async def _peer_batches(self) -> AsyncIterator[List[Mapping[str, Any]]]:
+        cursor = self.peers_db.find(
+            {"bot": self.key, "access_hash": {"$exists": True}}, {"_id": False, "bot": False}
+        )
+        async for batch in cursor.batch_size(self.RESTORE_BATCH_SIZE).batches():
+            yield batch
+
+    async def restore(self, storage: "SQLiteStorage") -> bool:
+        """Rebuild the storage from the replica, False when there is none"""
+        data = await self.session_db.find_one({"_id": self.key}, {"storage": True})
+        if not data or not data.get("storage", {}).get("auth_key"):
+            return False
+
+        await storage.rebuild(data["storage"], self._peer_batches())
+        return True
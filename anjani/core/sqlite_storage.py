@@ -1,9 +1,25 @@
-import inspect
+import asyncio
+import logging
 import os
 import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, List, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from pyrogram.raw.types.input_peer_channel import InputPeerChannel
 from pyrogram.raw.types.input_peer_chat import InputPeerChat
@@ -11,7 +27,25 @@ from pyrogram.raw.types.input_peer_user import InputPeerUser
 from pyrogram.storage.sqlite_storage import get_input_peer
 from pyrogram.storage.storage import Storage
 
+from anjani.util.cache import LRUCache
+
+from .metrics import SessionStorageBytes, SessionStorageRows
+
+if TYPE_CHECKING:
+    from .session_replica import SessionReplica
+
+T = TypeVar("T")
+
 # language=SQLite
+# Created on open rather than in the schema, the threaded storage drops it
+SESSION_DATE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS trg_session_last_update_on AFTER INSERT ON peers
+BEGIN
+    UPDATE sessions
+    SET date = CAST(STRFTIME('%s', 'now') AS INTEGER);
+END;
+"""
+
 SCHEMA = """
 CREATE TABLE sessions
 (
@@ -57,12 +91,6 @@ BEGIN
     WHERE id = NEW.id;
 END;
 
-CREATE TRIGGER trg_session_last_update_on AFTER INSERT ON peers
-BEGIN
-    UPDATE sessions
-    SET date = CAST(STRFTIME('%s', 'now') AS INTEGER);
-END;
-
 CREATE TRIGGER IF NOT EXISTS trg_usernames_last_update_on
     AFTER UPDATE
     ON usernames
@@ -74,20 +102,76 @@ END;
 """
 
 
+Peer = Tuple[int, int, str, str, str]
+InputPeer = Union[InputPeerUser, InputPeerChat, InputPeerChannel]
+
+SESSION_FIELDS = ("dc_id", "api_id", "test_mode", "auth_key", "date", "user_id", "is_bot")
+
+
+class SessionRow:
+    """In-memory copy of the single sessions row, tracking the changed fields"""
+
+    __slots__ = (*SESSION_FIELDS, "dirty")
+
+    dc_id: int
+    api_id: Optional[int]
+    test_mode: Optional[bool]
+    auth_key: Optional[bytes]
+    date: int
+    user_id: Optional[int]
+    is_bot: Optional[bool]
+    dirty: Set[str]
+
+    def __init__(self, *values: Any) -> None:
+        for field, value in zip(SESSION_FIELDS, values):
+            setattr(self, field, value)
+        self.dirty = set()
+
+    def set(self, field: str, value: Any) -> None:
+        if getattr(self, field) != value:
+            setattr(self, field, value)
+            self.dirty.add(field)
+
+    def changes(self) -> Dict[str, Any]:
+        """Pop the changed fields with their current value"""
+        changes = {field: getattr(self, field) for field in self.dirty}
+        self.dirty.clear()
+        return changes
+
+
 class SQLiteStorage(Storage):
     VERSION = 4
     USERNAME_TTL = 8 * 60 * 60
+    MAINTENANCE_INTERVAL = 60 * 60
+    MAINTENANCE_BATCH = 5000
+    VACUUM_PAGES = 256
     _conn: sqlite3.Connection
 
-    def __init__(self, name: str):
+    log: logging.Logger
+    peer_ttl: int
+    replica: Optional["SessionReplica"]
+    session: SessionRow
+    _maintenance_task: Optional[asyncio.Task]
+    _session_commit: Optional[asyncio.Task]
+
+    def __init__(self, name: str, *, peer_ttl: int = 0, log: Optional[logging.Logger] = None):
         super().__init__(name)
         self.database = Path(os.getcwd()) / f"anjani/{name}.session"
+        self.log = log or logging.getLogger("sqlite_storage")
+        self.peer_ttl = peer_ttl
+        self.replica = None
+        self._maintenance_task = None
+        self._session_commit = None
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return func(*args)
 
     async def delete(self):
         raise NotImplementedError
 
-    async def create(self):
+    def _create(self) -> None:
         with self.conn:
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
             self.conn.executescript(SCHEMA)
 
             self.conn.execute(
@@ -97,8 +181,11 @@ class SQLiteStorage(Storage):
 
             self.conn.execute("INSERT INTO version VALUES (?)", (self.VERSION,))
 
-    async def update(self):
-        version = await self.version()
+    async def create(self):
+        self._create()
+
+    def _update(self) -> None:
+        version = self._version()
 
         if version == 3:
             with self.conn:
@@ -123,28 +210,194 @@ END;
                 )
             version += 1
 
-        await self.version(version)  # type:ignore
+        self._version(version)
 
-    async def open(self):
+    async def update(self):
+        self._update()
+
+    def _open(self) -> None:
         path = self.database
         file_exists = path.is_file()
 
         self.conn = sqlite3.connect(database=str(path), timeout=1, check_same_thread=False)
 
         if not file_exists:
-            await self.create()
+            self._create()
         else:
-            await self.update()
+            self._update()
+
+        # Username updates delete by peer, don't scan the whole table for each
+        with self.conn:
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_usernames_peer_id ON usernames (peer_id)"
+            )
+            self._session_date_trigger()
+
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Switching takes one last full VACUUM, free pages are reclaimed in steps afterwards
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("VACUUM")
 
-        self.conn.execute("VACUUM")
+        self.session = self._load_session()
+
+    def _session_date_trigger(self) -> None:
+        self.conn.execute(SESSION_DATE_TRIGGER)
+
+    async def open(self):
+        self._open()
+        self._replicate_session()
+        self._start_maintenance()
 
     async def save(self):
         await self.date(int(time.time()))
+        await self._commit_session()
+
+    async def checkpoint(self) -> None:
+        """Make sure every write is in the session file itself"""
 
     async def close(self):
+        await self._stop_maintenance()
+        await self._commit_session()
         self.conn.close()
+        if self.replica is not None:
+            await self.replica.close()
 
-    async def update_peers(self, peers: List[Tuple[int, int, str, str, str]]) -> None:
+    def _restore_peers(self, peers: List[Mapping[str, Any]]) -> None:
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                "REPLACE INTO peers (id, access_hash, type, username, phone_number, last_update_on)"
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        peer["peer_id"],
+                        peer["access_hash"],
+                        peer["type"],
+                        peer.get("username"),
+                        peer.get("phone_number"),
+                        peer.get("date", now),
+                    )
+                    for peer in peers
+                ],
+            )
+            self.conn.executemany(
+                "REPLACE INTO usernames (peer_id, id, last_update_on) VALUES (?, ?, ?)",
+                [
+                    (peer["peer_id"], username, peer.get("usernames_date", now))
+                    for peer in peers
+                    for username in peer.get("usernames") or ()
+                ],
+            )
+
+    async def rebuild(
+        self, session: Mapping[str, Any], peers: AsyncIterator[List[Mapping[str, Any]]]
+    ) -> int:
+        """Create the database from a replicated session row and peers, returns the peer count
+
+        The storage is left closed, pyrogram opens it as usual afterwards.
+        """
+        await self._run(self._open)
+        self.session = SessionRow(*(session.get(field) for field in SESSION_FIELDS))
+        if self.session.date is None:
+            self.session.date = 0
+        self.session.dirty.update(SESSION_FIELDS)
+        await self._write_back()
+
+        count = 0
+        async for batch in peers:
+            await self._run(self._restore_peers, batch)
+            count += len(batch)
+
+        await self._run(self.conn.close)
+        return count
+
+    def _start_maintenance(self) -> None:
+        self._maintenance_task = asyncio.get_running_loop().create_task(self._maintenance_loop())
+
+    async def _stop_maintenance(self) -> None:
+        if self._maintenance_task is None:
+            return
+
+        self._maintenance_task.cancel()
+        try:
+            await self._maintenance_task
+        except asyncio.CancelledError:
+            pass
+        self._maintenance_task = None
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except sqlite3.Error as e:
+                self.log.error("Session storage maintenance failed", exc_info=e)
+
+            await asyncio.sleep(self.MAINTENANCE_INTERVAL)
+
+    def _prune_step(self, table: str, cutoff: int, after: int) -> Tuple[Optional[int], int]:
+        """Delete the expired rows within the next batch of rowids.
+
+        Walking the rowid keeps every step small without an index on last_update_on.
+        """
+        last = self.conn.execute(
+            f"SELECT MAX(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? "
+            "ORDER BY rowid LIMIT ?)",
+            (after, self.MAINTENANCE_BATCH),
+        ).fetchone()[0]
+        if last is None:
+            return None, 0
+
+        with self.conn:
+            deleted = self.conn.execute(
+                f"DELETE FROM {table} WHERE rowid > ? AND rowid <= ? AND last_update_on < ?",
+                (after, last, cutoff),
+            ).rowcount
+
+        return last, deleted
+
+    async def _prune(self, table: str, cutoff: int) -> int:
+        after: Optional[int] = -(2**63)
+        deleted = 0
+        while after is not None:
+            after, count = await self._run(self._prune_step, table, cutoff, after)
+            deleted += count
+            # Let other work run between the steps
+            await asyncio.sleep(0)
+
+        return deleted
+
+    def _vacuum_step(self) -> bool:
+        # executescript steps the pragma to the end, a plain execute frees a single page
+        self.conn.executescript(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES})")
+        return self.conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+    def _report(self) -> None:
+        for table in ("peers", "usernames"):
+            rows = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            SessionStorageRows.labels(table).set(rows)
+
+        for file, path in (
+            ("database", self.database),
+            ("wal", self.database.with_name(self.database.name + "-wal")),
+        ):
+            SessionStorageBytes.labels(file).set(path.stat().st_size if path.exists() else 0)
+
+    async def maintain(self) -> None:
+        """Prune expired usernames and stale peers, then give the free pages back"""
+        now = int(time.time())
+        usernames = await self._prune("usernames", now - self.USERNAME_TTL)
+        peers = await self._prune("peers", now - self.peer_ttl) if self.peer_ttl else 0
+        if usernames or peers:
+            self.log.debug("Pruned %d usernames and %d peers", usernames, peers)
+        if self.replica is not None and self.peer_ttl:
+            await self.replica.prune(now - self.peer_ttl)
+
+        while await self._run(self._vacuum_step):
+            await asyncio.sleep(0)
+
+        await self._run(self._report)
+
+    def _update_peers(self, peers: Iterable[Peer]) -> None:
         with self.conn:
             self.conn.executemany(
                 "REPLACE INTO peers (id, access_hash, type, username, phone_number)"
@@ -152,14 +405,24 @@ END;
                 peers,
             )
 
+    async def update_peers(self, peers: List[Peer]) -> None:
+        self._update_peers(peers)
+        if self.replica is not None:
+            self.replica.update_peers(peers)
+
+    def _update_usernames(self, usernames: List[Tuple[int, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM usernames WHERE peer_id=?", {(user[0],) for user in usernames}
+            )
+            self.conn.executemany("REPLACE INTO usernames (peer_id, id)" "VALUES (?, ?)", usernames)
+
     async def update_usernames(self, usernames: List[Tuple[int, str]]):
-        for user in usernames:
-            self.conn.execute("DELETE FROM usernames WHERE peer_id=?", (user[0],))
-        self.conn.executemany("REPLACE INTO usernames (peer_id, id)" "VALUES (?, ?)", usernames)
+        self._update_usernames(usernames)
+        if self.replica is not None:
+            self.replica.update_usernames(usernames)
 
-    async def get_peer_by_id(
-        self, peer_id: int
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
+    def _get_peer_by_id(self, peer_id: int) -> Tuple[int, int, str]:
         r = self.conn.execute(
             "SELECT id, access_hash, type FROM peers WHERE id = ?", (peer_id,)
         ).fetchone()
@@ -167,11 +430,12 @@ END;
         if r is None:
             raise KeyError(f"ID not found: {peer_id}")
 
-        return get_input_peer(*r)
+        return r
+
+    async def get_peer_by_id(self, peer_id: int) -> InputPeer:
+        return get_input_peer(*self._get_peer_by_id(peer_id))
 
-    async def get_peer_by_username(
-        self, username: str
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
+    def _get_peer_by_username(self, username: str) -> Tuple[int, int, str]:
         r = self.conn.execute(
             "SELECT id, access_hash, type, last_update_on FROM peers WHERE username = ?"
             "ORDER BY last_update_on DESC",
@@ -200,11 +464,12 @@ END;
         if abs(time.time() - r[3]) > self.USERNAME_TTL:
             raise KeyError(f"Username expired: {username}")
 
-        return get_input_peer(*r[:3])
+        return r[:3]
 
-    async def get_peer_by_phone_number(
-        self, phone_number: str
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
+    async def get_peer_by_username(self, username: str) -> InputPeer:
+        return get_input_peer(*self._get_peer_by_username(username))
+
+    def _get_peer_by_phone_number(self, phone_number: str) -> Tuple[int, int, str]:
         q = self.conn.execute(
             "SELECT id, access_hash, type FROM peers WHERE phone_number = ?", (phone_number,)
         )
@@ -213,47 +478,327 @@ END;
         if r is None:
             raise KeyError(f"Phone number not found: {phone_number}")
 
-        return get_input_peer(*r)
+        return r
 
-    async def _get(self) -> Optional[Any]:
-        attr = inspect.stack()[2].function
+    async def get_peer_by_phone_number(self, phone_number: str) -> InputPeer:
+        return get_input_peer(*self._get_peer_by_phone_number(phone_number))
 
-        q = self.conn.execute(f"SELECT {attr} FROM sessions")
-        return (q.fetchone())[0]
+    def _load_session(self) -> SessionRow:
+        q = self.conn.execute(f"SELECT {', '.join(SESSION_FIELDS)} FROM sessions")
+        return SessionRow(*q.fetchone())
 
-    async def _set(self, value: Any) -> None:
-        attr = inspect.stack()[2].function
+    def _write_session(self, changes: Dict[str, Any]) -> None:
+        columns = ", ".join(f"{field} = ?" for field in changes)
         with self.conn:
-            self.conn.execute(f"UPDATE sessions SET {attr} = ?", (value,))
+            self.conn.execute(f"UPDATE sessions SET {columns}", tuple(changes.values()))
+
+    async def _write_back(self) -> None:
+        changes = self.session.changes()
+        while changes:
+            try:
+                await self._run(self._write_session, changes)
+            except BaseException:
+                self.session.dirty.update(changes)
+                raise
+
+            if self.replica is not None:
+                self.replica.update_session(changes)
+
+            changes = self.session.changes()
+
+    def _replicate_session(self) -> None:
+        # Pyrogram doesn't set the fields of an existing session again, so only the
+        # changes would otherwise reach a replica that never saw the whole row
+        if self.replica is not None and self.session.auth_key is not None:
+            self.replica.update_session(
+                {field: getattr(self.session, field) for field in SESSION_FIELDS}
+            )
+
+    async def _commit_session(self) -> None:
+        task = self._session_commit
+        if task is not None and not task.done():
+            await task
 
-    async def _accessor(self, value: Any = object) -> Any:
-        return await self._get() if value == object else await self._set(value)
+        await self._write_back()
+
+    def _accessor(self, field: str, value: Any) -> Any:
+        if value is object:
+            return getattr(self.session, field)
+
+        self.session.set(field, value)
+        # Pyrogram sets several fields in a row, write them back together
+        if self.session.dirty and (self._session_commit is None or self._session_commit.done()):
+            self._session_commit = asyncio.get_running_loop().create_task(self._write_back())
+
+        return None
 
     async def dc_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return self._accessor("dc_id", value)
 
     async def api_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return self._accessor("api_id", value)
 
     async def test_mode(self, value=object) -> Optional[bool]:
-        return await self._accessor(value)
+        return self._accessor("test_mode", value)
 
     async def auth_key(self, value=object) -> Optional[bytes]:
-        return await self._accessor(value)
+        return self._accessor("auth_key", value)
 
     async def date(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return self._accessor("date", value)
 
     async def user_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return self._accessor("user_id", value)
 
     async def is_bot(self, value=object) -> Optional[bool]:
-        return await self._accessor(value)
+        return self._accessor("is_bot", value)
 
-    async def version(self, value: Any = object):
+    def _version(self, value: Any = object) -> Optional[int]:
         if value == object:
             q = self.conn.execute("SELECT number FROM version")
             return (q.fetchone())[0]
-        else:
-            with self.conn:
-                self.conn.execute("UPDATE version SET number = ?", (value,))
+
+        with self.conn:
+            self.conn.execute("UPDATE version SET number = ?", (value,))
+
+        return None
+
+    async def version(self, value: Any = object):
+        return self._version(value)
+
+
+class ThreadedSQLiteStorage(SQLiteStorage):
+    """SQLite storage that keeps every statement off the event loop.
+
+    The database runs in WAL mode on a single writer thread. Peer and username
+    writes are coalesced in memory and committed in one transaction every
+    `flush_interval` seconds, or sooner once `FLUSH_SIZE` peers are pending.
+    Lookups are answered from the pending writes and a cache of recently
+    resolved peers before going to the thread.
+    """
+
+    FLUSH_SIZE = 5000
+    FRONT_SIZE = 10000
+
+    flush_interval: float
+
+    _executor: ThreadPoolExecutor
+    _flush_event: asyncio.Event
+    _flush_lock: asyncio.Lock
+    _flush_task: Optional[asyncio.Task]
+    _front: LRUCache[int, Tuple[int, int, str]]
+    # Writes waiting for the next transaction, and the ones being committed
+    _pending_peers: Dict[int, Peer]
+    _pending_usernames: Dict[int, List[str]]
+    _pending_index: Dict[str, int]
+    _flushing_peers: Dict[int, Peer]
+    _flushing_usernames: Dict[int, List[str]]
+    _flushing_index: Dict[str, int]
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        flush_interval: float = 1.0,
+        peer_ttl: int = 0,
+        log: Optional[logging.Logger] = None,
+    ) -> None:
+        super().__init__(name, peer_ttl=peer_ttl, log=log)
+
+        self.flush_interval = flush_interval
+
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="AnjaniStorage")
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._front = LRUCache(self.FRONT_SIZE)
+        self._pending_peers, self._pending_usernames, self._pending_index = {}, {}, {}
+        self._flushing_peers, self._flushing_usernames, self._flushing_index = {}, {}, {}
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _open(self) -> None:
+        super()._open()
+
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _session_date_trigger(self) -> None:
+        # Every peer insert would rewrite the sessions row, save() keeps the date instead.
+        # The plain storage creates it again when the file is opened in that mode.
+        self.conn.execute("DROP TRIGGER IF EXISTS trg_session_last_update_on")
+
+    async def open(self):
+        await self._run(self._open)
+        self._replicate_session()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        self._start_maintenance()
+
+    async def close(self):
+        await self._stop_maintenance()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+        await self._commit_session()
+        await self._run(self.conn.close)
+        self._executor.shutdown()
+        if self.replica is not None:
+            await self.replica.close()
+
+    def _checkpoint(self) -> None:
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def checkpoint(self) -> None:
+        await self.flush()
+        await self._run(self._checkpoint)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                self.log.error("Failed to write peers to the session storage", exc_info=e)
+
+    def _write(self, peers: List[Peer], usernames: Dict[int, List[str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "REPLACE INTO peers (id, access_hash, type, username, phone_number)"
+                "VALUES (?, ?, ?, ?, ?)",
+                peers,
+            )
+            self.conn.executemany(
+                "DELETE FROM usernames WHERE peer_id=?", [(peer_id,) for peer_id in usernames]
+            )
+            self.conn.executemany(
+                "REPLACE INTO usernames (peer_id, id)" "VALUES (?, ?)",
+                [(peer_id, name) for peer_id, names in usernames.items() for name in names],
+            )
+
+    async def flush(self) -> None:
+        """Commit the pending peer and username writes"""
+        async with self._flush_lock:
+            if not self._pending_peers and not self._pending_usernames:
+                return
+
+            self._flushing_peers, self._pending_peers = self._pending_peers, {}
+            self._flushing_usernames, self._pending_usernames = self._pending_usernames, {}
+            self._flushing_index, self._pending_index = self._pending_index, {}
+            try:
+                await self._run(
+                    self._write, list(self._flushing_peers.values()), self._flushing_usernames
+                )
+            except BaseException:
+                # Put them back, anything written meanwhile is newer
+                for peer_id, peer in self._flushing_peers.items():
+                    self._pending_peers.setdefault(peer_id, peer)
+                for peer_id, names in self._flushing_usernames.items():
+                    self._pending_usernames.setdefault(peer_id, names)
+                for key, peer_id in self._flushing_index.items():
+                    self._pending_index.setdefault(key, peer_id)
+                raise
+            finally:
+                self._flushing_peers, self._flushing_usernames, self._flushing_index = {}, {}, {}
+
+    async def update_peers(self, peers: List[Peer]) -> None:
+        for peer in peers:
+            peer_id, access_hash, peer_type, username, phone_number = peer
+            self._pending_peers[peer_id] = peer
+            self._front.set(peer_id, (peer_id, access_hash, peer_type))
+            if username:
+                self._pending_index[username] = peer_id
+            if phone_number:
+                self._pending_index[phone_number] = peer_id
+
+        if len(self._pending_peers) >= self.FLUSH_SIZE:
+            self._flush_event.set()
+        if self.replica is not None:
+            self.replica.update_peers(peers)
+
+    async def update_usernames(self, usernames: List[Tuple[int, str]]):
+        names: Dict[int, List[str]] = {}
+        for peer_id, username in usernames:
+            names.setdefault(peer_id, []).append(username)
+            self._pending_index[username] = peer_id
+
+        self._pending_usernames.update(names)
+        if self.replica is not None:
+            self.replica.update_usernames(usernames)
+
+    def _unflushed(self, key: str) -> Optional[Tuple[int, int, str]]:
+        """Find a peer written by username or phone number since the last commit"""
+        for index, peers, usernames in (
+            (self._pending_index, self._pending_peers, self._pending_usernames),
+            (self._flushing_index, self._flushing_peers, self._flushing_usernames),
+        ):
+            peer_id = index.get(key)
+            if peer_id is None:
+                continue
+
+            peer = peers.get(peer_id)
+            if peer is not None and key in (peer[3], peer[4]):
+                return peer[:3]
+            if key in usernames.get(peer_id, ()):
+                row = self._front.get(peer_id)
+                if row is not None:
+                    return row
+
+        return None
+
+    def _replaced(self, key: str, peer_id: int) -> bool:
+        """Whether an uncommitted write took the username or phone number off the peer"""
+        for peers, usernames in (
+            (self._pending_peers, self._pending_usernames),
+            (self._flushing_peers, self._flushing_usernames),
+        ):
+            peer = peers.get(peer_id)
+            names = usernames.get(peer_id)
+            if peer is None and names is None:
+                continue
+
+            return key not in (peer or ())[3:] and key not in (names or ())
+
+        return False
+
+    async def get_peer_by_id(self, peer_id: int) -> InputPeer:
+        # A burst may have pushed uncommitted peers out of the front cache
+        peer = self._pending_peers.get(peer_id) or self._flushing_peers.get(peer_id)
+        row = peer[:3] if peer is not None else self._front.get(peer_id)
+        if row is None:
+            row = await self._run(self._get_peer_by_id, peer_id)
+            self._front.set(peer_id, row)
+
+        return get_input_peer(*row)
+
+    async def get_peer_by_username(self, username: str) -> InputPeer:
+        row = self._unflushed(username)
+        if row is None:
+            row = await self._run(self._get_peer_by_username, username)
+            if self._replaced(username, row[0]):
+                raise KeyError(f"Username not found: {username}")
+
+        return get_input_peer(*row)
+
+    async def get_peer_by_phone_number(self, phone_number: str) -> InputPeer:
+        row = self._unflushed(phone_number)
+        if row is None:
+            row = await self._run(self._get_peer_by_phone_number, phone_number)
+            if self._replaced(phone_number, row[0]):
+                raise KeyError(f"Phone number not found: {phone_number}")
+
+        return get_input_peer(*row)
+
+    async def version(self, value: Any = object):
+        return await self._run(self._version, value)
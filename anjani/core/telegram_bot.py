@@ -26,6 +26,7 @@ import pyrogram.filters as flt
 from aiocache import cached
 from aiopath import AsyncPath
 from pyrogram.client import Client
+from pyrogram.enums.chat_member_status import ChatMemberStatus
 from pyrogram.enums.parse_mode import ParseMode
 from pyrogram.filters import Filter
 from pyrogram.handlers.callback_query_handler import CallbackQueryHandler
@@ -36,6 +37,7 @@ from pyrogram.types import (
     CallbackQuery,
     Chat,
     ChatMember,
+    ChatMemberUpdated,
     ChatPreview,
     InlineQuery,
     Message,
@@ -44,11 +46,12 @@ from pyrogram.types import (
 from yaml import full_load
 
 from anjani import util
-from anjani.language import get_lang_file
-from anjani.util.cache_limiter import CacheLimiter
+from anjani.language import compile_languages, get_lang_file
 
 from .anjani_mixin_base import MixinBase
-from .sqlite_storage import SQLiteStorage
+from .rate_limiter import CommandRateLimiter, RateLimiter
+from .session_replica import SessionReplica
+from .sqlite_storage import SQLiteStorage, ThreadedSQLiteStorage
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -62,7 +65,8 @@ TgEventHandler = Union[
 class TelegramBot(MixinBase):
     # Initialized during instantiation
     __running: bool
-    _limiter: CacheLimiter
+    _limiter: CommandRateLimiter
+    _member_cache: util.cache.LRUCache[Tuple[int, int], ChatMember]
     _plugin_event_handlers: MutableMapping[str, Tuple[TgEventHandler, int]]
 
     loaded: bool
@@ -80,7 +84,13 @@ class TelegramBot(MixinBase):
 
     def __init__(self: "Anjani", **kwargs: Any) -> None:
         self.__running = False
-        self._limiter = CacheLimiter(ttl=10, max_value=10)
+        period = self.config.RATE_LIMIT_PERIOD
+        self._limiter = CommandRateLimiter(
+            user=RateLimiter("user", self.config.RATE_LIMIT_USER, period),
+            chat=RateLimiter("chat", self.config.RATE_LIMIT_CHAT, period),
+            total=RateLimiter("global", self.config.RATE_LIMIT_GLOBAL, period),
+        )
+        self._member_cache = util.cache.LRUCache(10000, ttl=60)
         self._plugin_event_handlers = {}
 
         self.loaded = False
@@ -103,15 +113,30 @@ class TelegramBot(MixinBase):
             self.log.warning("Owner id is not set! you won't be able to run staff command!")
             self.owner = 0
 
-        if "--fresh" not in sys.argv:
-            # Load session from database
-            data = await self.db.get_collection("SESSION").find_one(
-                {"_id": sha256(str(bot_token).encode()).hexdigest()}
+        storage: SQLiteStorage
+        peer_ttl = self.config.SESSION_PEER_TTL * 24 * 60 * 60
+        if self.config.SESSION_STORAGE == "threaded":
+            storage = ThreadedSQLiteStorage(
+                "anjani", flush_interval=self.config.SESSION_FLUSH_INTERVAL, peer_ttl=peer_ttl
             )
-            file = AsyncPath("anjani/anjani.session")
-            if data and not await file.exists():
-                self.log.info("Loading session from database")
-                await file.write_bytes(data["session"])
+        else:
+            storage = SQLiteStorage("anjani", peer_ttl=peer_ttl)
+
+        session_key = sha256(str(bot_token).encode()).hexdigest()
+        replica = SessionReplica(self.db, session_key, log=self.log)
+        file = AsyncPath("anjani/anjani.session")
+        if "--fresh" not in sys.argv and not await file.exists():
+            # Rebuild from the replicated peers, fall back to the last uploaded session file
+            if await replica.restore(storage):
+                self.log.info("Rebuilt session from database replica")
+            else:
+                data = await self.db.get_collection("SESSION").find_one({"_id": session_key})
+                if data and data.get("session"):
+                    self.log.info("Loading session from database")
+                    await file.write_bytes(data["session"])
+
+        await replica.start()
+        storage.replica = replica
 
         # Initialize Telegram client with gathered parameters
         self.client = Client(
@@ -122,7 +147,7 @@ class TelegramBot(MixinBase):
             workdir="anjani",
             workers=self.config.WORKERS,
             parse_mode=ParseMode.MARKDOWN,
-            storage=SQLiteStorage("anjani"),
+            storage=storage,
         )
 
     async def start(self: "Anjani") -> None:
@@ -134,11 +159,20 @@ class TelegramBot(MixinBase):
 
         # Register core command handler
         self.client.add_handler(MessageHandler(self.on_command, self.command_predicate()), -1)
+        # Keep the chat member cache up to date before any plugin sees the update
+        self.client.add_handler(ChatMemberUpdatedHandler(self._on_chat_member_update), -2)
+        self.client.add_handler(
+            MessageHandler(
+                self._on_chat_member_action, flt.new_chat_members | flt.left_chat_member
+            ),
+            -2,
+        )
 
         # Load plugin
         self.load_all_plugins()
         await self.dispatch_event("load")
         self.loaded = True
+        self.start_dispatch_lanes()
 
         async with asyncio.Lock():
             # Start Telegram client
@@ -176,10 +210,12 @@ class TelegramBot(MixinBase):
             self.chats_languages[data["chat_id"]] = data["language"]
 
         # Load text from language file
+        languages = {}
         async for language_file in get_lang_file():
-            self.languages[language_file.stem] = await util.run_sync(
+            languages[language_file.stem] = await util.run_sync(
                 full_load, await language_file.read_text()
             )
+        self.languages = compile_languages(languages, self.log)
 
         # Record start time and dispatch start event
         self.start_time_us = util.time.usec()
@@ -283,7 +319,7 @@ class TelegramBot(MixinBase):
                 async def event_handler(
                     client: Client, event: EventType  # skipcq: PYL-W0613
                 ) -> None:
-                    await self.dispatch_event(name, event)
+                    await self.dispatch_event_ordered(name, event)
 
                 if filters is not None:
                     handler_info = (event_type(event_handler, filters), group)
@@ -397,7 +433,42 @@ class TelegramBot(MixinBase):
         """Wrapper for `Client.get_chat` with a TTL cache."""
         return await self.client.get_chat(chat_id)
 
-    @cached(ttl=60)
-    async def get_chat_member(self: "Anjani", chat_id: int, user_id: int) -> ChatMember:
-        """Wrapper for `Client.get_chat_member` with a TTL cache."""
-        return await self.client.get_chat_member(chat_id, user_id)
+    async def get_chat_member(
+        self: "Anjani", chat_id: Union[int, str], user_id: Union[int, str]
+    ) -> ChatMember:
+        """Wrapper for `Client.get_chat_member` with a shared TTL cache.
+
+        Concurrent lookups of the same member are coalesced into a single request,
+        entries are refreshed from chat member updates.
+        """
+        if user_id == "me":
+            user_id = self.uid
+
+        if not isinstance(chat_id, int) or not isinstance(user_id, int):
+            return await self.client.get_chat_member(chat_id, user_id)
+
+        return await self._member_cache.get_or_load(
+            (chat_id, user_id), partial(self.client.get_chat_member, chat_id, user_id)
+        )
+
+    async def _on_chat_member_update(
+        self: "Anjani", client: Client, update: ChatMemberUpdated  # skipcq: PYL-W0613
+    ) -> None:
+        member = update.new_chat_member or update.old_chat_member
+        if not member or not member.user:
+            return
+
+        key = (update.chat.id, member.user.id)
+        if update.new_chat_member and update.new_chat_member.status != ChatMemberStatus.LEFT:
+            self._member_cache.set(key, update.new_chat_member)
+        else:
+            self._member_cache.pop(key)
+
+    async def _on_chat_member_action(
+        self: "Anjani", client: Client, message: Message  # skipcq: PYL-W0613
+    ) -> None:
+        for user in message.new_chat_members or []:
+            self._member_cache.pop((message.chat.id, user.id))
+
+        if message.left_chat_member:
+            self._member_cache.pop((message.chat.id, message.left_chat_member.id))
@@ -168,7 +168,7 @@ def _create_filter_permission(name: str, *, include_bot: bool = True) -> Filter:
         if priv or not target or not message.chat:
             return False
 
-        bot_perm, member_perm = await fetch_permissions(client, message.chat.id, target.id)
+        bot_perm, member_perm = await fetch_permissions(flt.anjani, message.chat.id, target.id)
         if not (bot_perm and member_perm) or not (bot_perm.privileges and member_perm.privileges):
             return False
 
@@ -269,7 +269,7 @@ def _admin_only(include_bot: bool = True, send_error: bool = True) -> CustomFilt
 
             return False
 
-        bot_perm, member_perm = await fetch_permissions(client, message.chat.id, target.id)
+        bot_perm, member_perm = await fetch_permissions(flt.anjani, message.chat.id, target.id)
         if not bot_perm:
             if send_error:
                 await _send_error(flt.anjani, message.chat.id, message, "err-im-not-admin")
@@ -17,10 +17,21 @@
 
 import asyncio
 import re
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, time, timedelta
+from functools import partial
 from hashlib import md5, sha256
 from random import randint
-from typing import Any, Callable, ClassVar, List, MutableMapping, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from pyrogram.errors import (
     ChatAdminRequired,
@@ -49,7 +60,12 @@ except ImportError:
     _run_predict = False
 
 from anjani import command, filters, listener, plugin, util
-from anjani.core.metrics import SpamPredictionStat
+from anjani.core.metrics import (
+    SpamPredictionBatchFill,
+    SpamPredictionCacheCount,
+    SpamPredictionQueueSecond,
+    SpamPredictionStat,
+)
 from anjani.util.misc import StopPropagation
 
 
@@ -61,20 +77,47 @@ class SpamPrediction(plugin.Plugin):
     db: util.db.AsyncCollection
     user_db: util.db.AsyncCollection
     setting_db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
     model: Classifier
+    batcher: util.batcher.MicroBatcher[str, Any]
+    prediction_cache: util.cache.LRUCache[str, Any]
+    pool: Optional[util.classifier_pool.ClassifierPool] = None
 
     __predict_cost: int = 10
     __log_channel: int = -1001314588569
+    __cache_size: int = 10000
+    __cache_ttl: int = 6 * 60 * 60
 
     async def on_load(self) -> None:
         self.model = Classifier()
         self.db = self.bot.db.get_collection("SPAM_DUMP")
         self.user_db = self.bot.db.get_collection("USERS")
         self.setting_db = self.bot.db.get_collection("SPAM_PREDICT_SETTING")
+        self.settings = self.bot.db.get_settings_cache("SPAM_PREDICT_SETTING", fields=("setting",))
+        self.batcher = util.batcher.MicroBatcher(
+            self._predict_batch,
+            max_size=self.bot.config.SPAM_PREDICT_BATCH_SIZE,
+            max_wait=self.bot.config.SPAM_PREDICT_BATCH_WAIT / 1000,
+            on_batch=self._observe_batch,
+        )
+        # Prediction rows keyed by the hash of the normalized text
+        self.prediction_cache = util.cache.LRUCache(self.__cache_size, ttl=self.__cache_ttl)
+
+        if not await self.__load_model():
+            return
+
+        if self.bot.config.SPAM_PREDICT_WORKERS > 0:
+            self.pool = util.classifier_pool.ClassifierPool(
+                Classifier, self.bot.config.SPAM_PREDICT_WORKERS, log=self.log
+            )
+            self.pool.start()
 
-        await self.__load_model()
         self.bot.loop.create_task(self.__refresh_model())
 
+    async def on_stop(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+
     async def on_chat_migrate(self, message: Message) -> None:
         await self.db.update_one(
             {"chat_id": message.migrate_from_chat_id},
@@ -89,6 +132,7 @@ class SpamPrediction(plugin.Plugin):
         await self.setting_db.update_one(
             {"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True
         )
+        self.settings.invalidate(chat_id)
 
     async def __refresh_model(self) -> None:
         scheduled_time = time(hour=17)  # Run at 00:00 WIB
@@ -100,15 +144,61 @@ class SpamPrediction(plugin.Plugin):
             then = datetime.combine(date, scheduled_time)
             self.log.debug("Next model refresh at %s UTC", then)
             await asyncio.sleep((then - now).total_seconds())
-            await self.__load_model()
+            if not await self.__load_model():
+                return
 
-    async def __load_model(self) -> None:
+    async def __load_model(self) -> bool:
         self.log.info("Downloading spam prediction model!")
         try:
             await self.model.load_model(self.bot.http)
         except RuntimeError:
             self.log.warning("Failed to download prediction model!")
             self.bot.unload_plugin(self)
+            if self.pool is not None:
+                self.pool.close()
+            return False
+
+        # Results of the previous model are no longer valid
+        self.prediction_cache.clear()
+        if self.pool is not None and self.pool.available:
+            self.pool.reload()
+        return True
+
+    def _observe_batch(self, size: int, waited: Sequence[float]) -> None:
+        SpamPredictionBatchFill.observe(size / self.batcher.max_size)
+        for delay in waited:
+            SpamPredictionQueueSecond.observe(delay)
+
+    async def normalize(self, text: str) -> str:
+        if self.pool is not None and self.pool.available:
+            try:
+                return await self.pool.normalize(text)
+            except BrokenProcessPool:
+                pass
+
+        return self.model.normalize(text)
+
+    async def _predict(self, text: str) -> Any:
+        """Score a normalized text, returning its probability row or None.
+
+        The model scores one text at a time, so batching only coalesces the round
+        trips to the worker pool and is skipped when predicting in-process.
+        """
+        if self.pool is not None and self.pool.available:
+            return await self.batcher.submit(text)
+
+        response = await self.model.predict(text)
+        return response[0] if response.size else None
+
+    async def _predict_batch(self, texts: List[str]) -> List[Any]:
+        if self.pool is not None and self.pool.available:
+            try:
+                return await self.pool.predict_batch(texts)
+            except BrokenProcessPool:
+                self.log.warning("Classifier pool is unavailable, predicting in-process")
+
+        responses = [await self.model.predict(text) for text in texts]
+        return [response[0] if response.size else None for response in responses]
 
     @staticmethod
     def _build_hash(content: str) -> str:
@@ -314,17 +404,22 @@ class SpamPrediction(plugin.Plugin):
         except AttributeError:
             user = None
 
-        text_norm = self.model.normalize(text)
+        text_norm = await self.normalize(text)
         if len(text_norm.split()) < 4:  # Skip short messages
             return
 
-        response = await self.model.predict(text_norm)
+        cache_key = self._build_hash(text_norm)
+        SpamPredictionCacheCount.labels(
+            "hit" if cache_key in self.prediction_cache else "miss"
+        ).inc()
+        # Identical texts sent at the same time share a single prediction
+        row = await self.prediction_cache.get_or_load(cache_key, partial(self._predict, text_norm))
         await self.bot.log_stat("predicted")
         SpamPredictionStat.labels("predicted").inc()
-        if response.size == 0:
+        if row is None:
             return
 
-        probability = response[0][1]
+        probability = row[1]
 
         await self._collect_random_sample(probability, user)
 
@@ -393,7 +488,7 @@ class SpamPrediction(plugin.Plugin):
             target = None
             if user:
                 try:
-                    target = await message.chat.get_member(user)
+                    target = await self.bot.get_chat_member(chat.id, user)
                 except (UserNotParticipant, ChatAdminRequired):
                     pass
                 else:
@@ -432,7 +527,7 @@ class SpamPrediction(plugin.Plugin):
                 )
 
             if target is not None:
-                me = await chat.get_member(self.bot.uid)
+                me = await self.bot.get_chat_member(chat.id, self.bot.uid)
                 if me.privileges and me.privileges.can_restrict_members:
                     button.append(
                         [
@@ -566,10 +661,11 @@ class SpamPrediction(plugin.Plugin):
         await self.setting_db.update_one(
             {"chat_id": chat_id}, {"$set": {"setting": setting}}, upsert=True
         )
+        self.settings.invalidate(chat_id)
 
     async def is_active(self, chat_id: int) -> bool:
         """Return SpamShield setting"""
-        data = await self.setting_db.find_one({"chat_id": chat_id})
+        data = await self.settings.get(chat_id)
         return data.get("setting", True) if data else True
 
     @command.filters(filters.admin_only, aliases=["spampredict", "spam_predict"])
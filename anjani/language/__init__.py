@@ -14,7 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import AsyncIterator
+import codecs
+import logging
+from typing import Any, AsyncIterator, Mapping, MutableMapping
 
 from aiopath import AsyncPath
 
@@ -23,3 +25,36 @@ async def get_lang_file() -> AsyncIterator[AsyncPath]:
     async for language_file in AsyncPath("anjani/language").iterdir():
         if language_file.suffix == ".yml":
             yield language_file
+
+
+def _decode(text: str) -> str:
+    return codecs.decode(codecs.encode(text, "latin-1", "backslashreplace"), "unicode-escape")
+
+
+def compile_languages(
+    languages: Mapping[str, Mapping[str, Any]], log: logging.Logger
+) -> MutableMapping[str, MutableMapping[str, str]]:
+    """Decode the escape sequences of every language string once and fill
+    the strings missing from a language with the 'en' ones.
+    """
+    compiled = {
+        lang: {name: _decode(text) for name, text in strings.items()}
+        for lang, strings in languages.items()
+    }
+
+    base = compiled.get("en", {})
+    for lang, strings in compiled.items():
+        missing = base.keys() - strings.keys()
+        if not missing:
+            continue
+
+        log.warning(
+            "%d language strings missing in '%s', using 'en' instead: %s",
+            len(missing),
+            lang,
+            ", ".join(sorted(missing)),
+        )
+        for name in missing:
+            strings[name] = base[name]
+
+    return compiled
@@ -16,27 +16,38 @@
 
 import asyncio
 from datetime import datetime
+from functools import partial
 from typing import (
     Any,
     AsyncIterator,
+    Callable,
+    ClassVar,
+    Coroutine,
     Dict,
+    FrozenSet,
+    Iterable,
     List,
     Mapping,
     MutableMapping,
     Optional,
+    Set,
+    Tuple,
     Union,
 )
 from uuid import uuid4
 
 from aiopath import AsyncPath
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
 from pyrogram.enums.chat_member_status import ChatMemberStatus
 from pyrogram.enums.chat_type import ChatType
 from pyrogram.errors import (
     BadRequest,
-    ChannelPrivate,
     ChatAdminRequired,
+    FloodWait,
     Forbidden,
     PeerIdInvalid,
+    RPCError,
     UserAdminInvalid,
 )
 from pyrogram.types import (
@@ -52,27 +63,334 @@ from pyrogram.types import (
 from anjani import command, filters, listener, plugin, util
 
 
+class FederationGraph:
+    """In-memory view of federation chats and subscriptions.
+
+    A chat enforces the bans of its own federation and, transitively, of every
+    federation that one subscribes to. The closure is computed once per
+    federation and dropped whenever a subscription edge changes.
+    """
+
+    def __init__(self) -> None:
+        self._chat_fed: Dict[int, str] = {}
+        self._chats: Dict[str, Set[int]] = {}
+        # federation -> federations subscribing to it, as stored on its document
+        self._subscribers: Dict[str, Set[str]] = {}
+        # federation -> federations it subscribes to
+        self._subscriptions: Dict[str, Set[str]] = {}
+        self._effective: Dict[str, FrozenSet[str]] = {}
+
+    def update(self, fid: str, chats: Iterable[int], subscribers: Iterable[str]) -> None:
+        """Replace the edges stored on a federation document"""
+        for chat in self._chats.pop(fid, ()):
+            if self._chat_fed.get(chat) == fid:
+                del self._chat_fed[chat]
+        for sub in self._subscribers.pop(fid, ()):
+            self._subscriptions.get(sub, set()).discard(fid)
+
+        self._chats[fid] = set()
+        self._subscribers[fid] = set()
+        for chat in chats:
+            self.add_chat(fid, chat)
+        for sub in subscribers:
+            self.subscribe(sub, fid)
+
+        self._effective.clear()
+
+    def remove(self, fid: str) -> None:
+        """Drop a deleted federation"""
+        self.update(fid, (), ())
+        del self._chats[fid]
+        del self._subscribers[fid]
+        for target in self._subscriptions.pop(fid, ()):
+            self._subscribers.get(target, set()).discard(fid)
+
+    def add_chat(self, fid: str, chat: int) -> None:
+        self._chat_fed[chat] = fid
+        self._chats.setdefault(fid, set()).add(chat)
+
+    def remove_chat(self, fid: str, chat: int) -> None:
+        self._chats.get(fid, set()).discard(chat)
+        if self._chat_fed.get(chat) == fid:
+            del self._chat_fed[chat]
+
+    def subscribe(self, fid: str, target: str) -> None:
+        """Make federation `fid` enforce the bans of `target`"""
+        self._subscribers.setdefault(target, set()).add(fid)
+        self._subscriptions.setdefault(fid, set()).add(target)
+        self._effective.clear()
+
+    def unsubscribe(self, fid: str, target: str) -> None:
+        self._subscribers.get(target, set()).discard(fid)
+        self._subscriptions.get(fid, set()).discard(target)
+        self._effective.clear()
+
+    def fed_of(self, chat: int) -> Optional[str]:
+        return self._chat_fed.get(chat)
+
+    def effective(self, fid: str) -> FrozenSet[str]:
+        """Federations enforced by `fid`, including itself"""
+        try:
+            return self._effective[fid]
+        except KeyError:
+            pass
+
+        # Breadth-first walk, the visited set guards against subscription cycles
+        visited = {fid}
+        queue = [fid]
+        while queue:
+            for target in self._subscriptions.get(queue.pop(), ()):
+                if target not in visited:
+                    visited.add(target)
+                    queue.append(target)
+
+        res = self._effective[fid] = frozenset(visited)
+        return res
+
+    def enforcing(self, fid: str) -> FrozenSet[str]:
+        """Federations that enforce the bans of `fid`, including itself.
+
+        The reverse of `effective`, so a ban reaches the same chats that check it.
+        """
+        visited = {fid}
+        queue = [fid]
+        while queue:
+            for sub in self._subscribers.get(queue.pop(), ()):
+                if sub not in visited:
+                    visited.add(sub)
+                    queue.append(sub)
+
+        return frozenset(visited)
+
+    def chats_of(self, fid: str) -> Set[int]:
+        return self._chats.get(fid, set())
+
+
 class Federation(plugin.Plugin):
     name = "Federations"
     helpable = True
 
     db: util.db.AsyncCollection
-    chat_db: util.db.AsyncCollection
-
-    __fban_delay: float = 0.5
+    chat_settings: util.db.AsyncSettingsCache
+    fban_db: util.db.AsyncCollection
+
+    # target id -> federation ids that banned it
+    _fbanned: Dict[int, Set[str]]
+    graph: FederationGraph
+    _db_streams: Dict[str, asyncio.Task[None]]
+
+    job_db: util.db.AsyncCollection
+    fed_cache: util.cache.LRUCache[str, Optional[Mapping[str, Any]]]
+    _fban_jobs: Set[asyncio.Task[None]]
+
+    __fed_projection: ClassVar[Mapping[str, int]] = {
+        "name": 1,
+        "owner": 1,
+        "admins": 1,
+        "chats": 1,
+        "subscribers": 1,
+        "log": 1,
+        "banned_count": 1,
+        "banned_chat_count": 1,
+    }
+    __fed_cache_size: int = 1000
+    __fban_concurrency: int = 8
+    __fban_report_interval: float = 5
+    __fban_report_failed: int = 50
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("FEDERATIONS")
-        self.chat_db = self.bot.db.get_collection("CHATS")
+        self.chat_settings = self.bot.db.get_settings_cache("CHATS", fields=("action_topic",))
+        self.fban_db = self.bot.db.get_collection("FBANS")
+        self.job_db = self.bot.db.get_collection("FBAN_JOBS")
+        self._fban_jobs = set()
+        self.fed_cache = util.cache.LRUCache(self.__fed_cache_size)
+        self._fbanned = {}
+        self.graph = FederationGraph()
+        self._db_streams = {}
+
+        await asyncio.gather(
+            self.fban_db.create_index([("fed_id", 1), ("target_id", 1)], unique=True),
+            self.fban_db.create_index("target_id"),
+        )
+        await self._migrate_fbans()
+
+        self._start_db_stream(self.fban_stream)
+        self._start_db_stream(self.fed_stream)
+        async for data in self.fban_db.find({}, {"fed_id": 1, "target_id": 1}):
+            self._fbanned.setdefault(data["target_id"], set()).add(data["fed_id"])
+        async for data in self.db.find({}, {"chats": 1, "subscribers": 1}):
+            self.graph.update(data["_id"], data.get("chats", []), data.get("subscribers", []))
+
+    async def on_started(self) -> None:
+        async for job in self.job_db.find({}):
+            self.log.info(
+                f"Resuming federation {job['action']} of {job['target_id']} "
+                f"on {len(job['pending'])} chats"
+            )
+            self._start_fban_job(job)
+
+    async def on_stop(self) -> None:
+        for task in self._db_streams.values():
+            task.cancel()
+
+        # Propagation jobs save their progress when cancelled
+        for task in self._fban_jobs:
+            task.cancel()
+        await asyncio.gather(*self._fban_jobs, return_exceptions=True)
+
+    def _start_db_stream(self, stream: Callable[[], Coroutine[Any, Any, None]]) -> None:
+        # Cancel previous task if exists and it's not done
+        task = self._db_streams.get(stream.__name__)
+        if task and not task.done():
+            task.cancel()
+
+        task = self._db_streams[stream.__name__] = self.bot.loop.create_task(stream())
+        task.add_done_callback(
+            partial(self.bot.loop.call_soon_threadsafe, self._db_stream_callback, stream)
+        )
+
+    def _db_stream_callback(
+        self, stream: Callable[[], Coroutine[Any, Any, None]], future: asyncio.Future
+    ) -> None:
+        try:
+            future.result()
+        except asyncio.CancelledError:
+            pass
+        except PyMongoError as e:
+            self.log.error("MongoDB error:", exc_info=e)
+            self._start_db_stream(stream)
+
+    async def fed_stream(self) -> None:
+        """Keep the federation graph and cache in sync with other instances"""
+        # Only the fields we cache matter, and only a chats or subscribers change costs a
+        # lookup and a graph update, counter updates like banned_count just evict the cache
+        pipeline = [
+            {
+                "$match": {
+                    "$or": [
+                        {"operationType": {"$in": ["insert", "replace", "delete"]}},
+                        util.db.fields_changed(self.__fed_projection),
+                    ]
+                }
+            }
+        ]
+        async with self.db.watch(pipeline) as cursor:
+            async for change in cursor:
+                fid = change["documentKey"]["_id"]
+                self.fed_cache.pop(fid)
+                if change["operationType"] == "delete":
+                    self.graph.remove(fid)
+                    continue
+
+                if change["operationType"] == "update":
+                    if not self._changes_graph(change["updateDescription"]):
+                        continue
+                    document = await self.db.find_one({"_id": fid}, {"chats": 1, "subscribers": 1})
+                else:
+                    document = change.get("fullDocument")
+
+                if document:
+                    self.graph.update(
+                        document["_id"],
+                        document.get("chats", []),
+                        document.get("subscribers", []),
+                    )
+
+    @staticmethod
+    def _changes_graph(description: Mapping[str, Any]) -> bool:
+        paths = [
+            *description.get("updatedFields", {}),
+            *description.get("removedFields", []),
+            *(array["field"] for array in description.get("truncatedArrays", [])),
+        ]
+        return any(path.split(".", 1)[0] in ("chats", "subscribers") for path in paths)
+
+    async def fban_stream(self) -> None:
+        """Keep the in-memory ban index in sync with other instances"""
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "delete"]}}}]
+        async with self.fban_db.watch(pipeline) as cursor:
+            async for change in cursor:
+                if change["operationType"] == "insert":
+                    document = change["fullDocument"]
+                    self._index_fban(document["fed_id"], document["target_id"])
+                else:
+                    self._unindex_fban(*self._split_fban_key(change["documentKey"]["_id"]))
+
+    async def _migrate_fbans(self) -> None:
+        """Move the legacy embedded ban maps into the FBANS collection"""
+        async for data in self.db.find(
+            {"$or": [{"banned": {"$exists": True}}, {"banned_chat": {"$exists": True}}]}
+        ):
+            fid = data["_id"]
+            requests = []
+            for field, ban_type in (("banned", "user"), ("banned_chat", "chat")):
+                for target, ban in (data.get(field) or {}).items():
+                    target = int(target)
+                    requests.append(
+                        UpdateOne(
+                            {"_id": self._fban_key(fid, target)},
+                            {
+                                "$set": dict(ban or {}),
+                                "$setOnInsert": {
+                                    "fed_id": fid,
+                                    "target_id": target,
+                                    "type": ban_type,
+                                },
+                            },
+                            upsert=True,
+                        )
+                    )
+
+            if requests:
+                await self.fban_db.bulk_write(requests, ordered=False)
+
+            banned_count, banned_chat_count = await asyncio.gather(
+                self.fban_db.count_documents({"fed_id": fid, "type": "user"}),
+                self.fban_db.count_documents({"fed_id": fid, "type": "chat"}),
+            )
+            await self.db.update_one(
+                {"_id": fid},
+                {
+                    "$set": {"banned_count": banned_count, "banned_chat_count": banned_chat_count},
+                    "$unset": {"banned": "", "banned_chat": ""},
+                },
+            )
+            self.log.info(f"Migrated {len(requests)} bans of federation {fid}")
+
+    @staticmethod
+    def _fban_key(fid: str, target: int) -> str:
+        return f"{fid}:{target}"
+
+    @staticmethod
+    def _split_fban_key(key: str) -> Tuple[str, int]:
+        fid, _, target = key.rpartition(":")
+        return fid, int(target)
+
+    def _index_fban(self, fid: str, target: int) -> None:
+        self._fbanned.setdefault(target, set()).add(fid)
+
+    def _unindex_fban(self, fid: str, target: int) -> None:
+        feds = self._fbanned.get(target)
+        if feds is None:
+            return
+
+        feds.discard(fid)
+        if not feds:
+            del self._fbanned[target]
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
         old_chat = message.migrate_from_chat_id
 
-        await self.db.update_one(
-            {"chat_id": old_chat},
-            {"$set": {"chat_id": new_chat}},
-        )
+        fid = self.graph.fed_of(old_chat)
+        if not fid:
+            return
+
+        await self.db.update_one({"_id": fid, "chats": old_chat}, {"$set": {"chats.$": new_chat}})
+        self.fed_cache.pop(fid)
+        self.graph.remove_chat(fid, old_chat)
+        self.graph.add_chat(fid, new_chat)
 
     async def on_chat_action(self, message: Message) -> None:
         if message.left_chat_member:
@@ -81,8 +399,8 @@ class Federation(plugin.Plugin):
         chat = message.chat
         if not chat:
             return
-        fed_data = await self.get_fed_bychat(chat.id)
-        if not fed_data:
+        fid = self.graph.fed_of(chat.id)
+        if not fid:
             return
 
         if message.new_chat_members:
@@ -92,10 +410,9 @@ class Federation(plugin.Plugin):
                     await self.fban_handler(chat, new_member, banned)
 
         if message.left_chat_member and message.left_chat_member.id == self.bot.uid:
-            fed_data = await self.get_fed_bychat(chat.id)
-            if fed_data:
-                # Leave the chat federation
-                await self.db.update_one({"_id": fed_data["_id"]}, {"$pull": {"chats": chat.id}})
+            # Leave the chat federation
+            await self.update_fed(fid, {"$pull": {"chats": chat.id}})
+            self.graph.remove_chat(fid, chat.id)
 
     async def on_chat_member_update(self, update: ChatMemberUpdated) -> None:
         """Leave federation if bot is demoted"""
@@ -116,8 +433,9 @@ class Federation(plugin.Plugin):
                 return
             ret, _ = await asyncio.gather(
                 self.text(chat.id, "fed-autoleave", fed_data["name"], fed_data["_id"]),
-                self.db.update_one({"_id": fed_data["_id"]}, {"$pull": {"chats": chat.id}}),
+                self.update_fed(fed_data["_id"], {"$pull": {"chats": chat.id}}),
             )
+            self.graph.remove_chat(fed_data["_id"], chat.id)
             thread_id = await self.get_action_topic(chat.id)
             await self.bot.client.send_message(
                 chat.id,
@@ -140,6 +458,17 @@ class Federation(plugin.Plugin):
                 )
 
             data = await self.db.find_one_and_delete({"_id": arg})
+            await asyncio.gather(
+                self.fban_db.delete_many({"fed_id": arg}),
+                self.db.update_many({"subscribers": arg}, {"$pull": {"subscribers": arg}}),
+            )
+            # Subscribers of other federations changed too
+            self.fed_cache.clear()
+            self.graph.remove(arg)
+            for target, feds in list(self._fbanned.items()):
+                if arg in feds:
+                    self._unindex_fban(arg, target)
+
             await query.message.edit_text(await self.text(chat.id, "fed-delete-done", data["name"]))
         elif cmd == "log":
             owner_id, fid = arg.split("_")
@@ -149,6 +478,7 @@ class Federation(plugin.Plugin):
                 )
 
             data = await self.db.find_one_and_update({"_id": fid}, {"$set": {"log": chat.id}})
+            self.fed_cache.pop(fid)
             await query.edit_message_text(
                 await self.text(chat.id, "fed-log-set-chnl", data["name"])
             )
@@ -172,7 +502,7 @@ class Federation(plugin.Plugin):
             await self.fban_handler(chat, target, banned)
 
     async def get_action_topic(self, chat_id: int) -> Optional[int]:
-        data = await self.chat_db.find_one({"chat_id": chat_id}, {"action_topic": 1})
+        data = await self.chat_settings.get(chat_id)
         return data.get("action_topic") if data else None
 
     @staticmethod
@@ -181,28 +511,66 @@ class Federation(plugin.Plugin):
         return user == data["owner"] or user in data.get("admins", [])
 
     async def get_fed_bychat(self, chat: int) -> Optional[Mapping[str, Any]]:
-        return await self.db.find_one({"chats": chat})
+        fid = self.graph.fed_of(chat)
+        return await self.get_fed(fid) if fid else None
 
     async def get_fed_byowner(self, user: int) -> Optional[Mapping[str, Any]]:
-        return await self.db.find_one({"owner": user})
+        data = await self.db.find_one({"owner": user}, self.__fed_projection)
+        if data:
+            self.fed_cache.set(data["_id"], data)
+        return data
 
     async def get_fed(self, fid: str) -> Optional[Mapping[str, Any]]:
-        return await self.db.find_one({"_id": fid})
+        return await self.fed_cache.get_or_load(
+            fid, partial(self.db.find_one, {"_id": fid}, self.__fed_projection)
+        )
+
+    async def update_fed(self, fid: str, update: Mapping[str, Any]) -> None:
+        """Update a federation document and drop its cached metadata"""
+        await self.db.update_one({"_id": fid}, update)
+        self.fed_cache.pop(fid)
 
     async def _get_fed_subs_str(self, fid: str) -> Optional[str]:
         """Get federation that subcribe current federation as string"""
         res = ""
-        async for i in self.db.find({"subscribers": fid}):
+        async for i in self.db.find({"subscribers": fid}, {"name": 1}):
             res += f"- **{i['name']}** (`{i['_id']}`)\n"
         return res or None
 
     async def _get_fed_subs_data(self, fid: str) -> AsyncIterator[Mapping[str, Any]]:
         """Get federation that subcribe current federation"""
-        async for i in self.db.find(
-            {"subscribers": fid}, {"_id": 1, "name": 1, "banned": 1, "banned_chat": 1}
-        ):
+        async for i in self.db.find({"subscribers": fid}, {"_id": 1, "name": 1}):
             yield i
 
+    async def _fban(
+        self, fid: str, target: int, ban_type: str, data: Mapping[str, Any]
+    ) -> Optional[Mapping[str, Any]]:
+        """Upsert a ban and return the previous one if it exists"""
+        prev = await self.fban_db.find_one_and_update(
+            {"_id": self._fban_key(fid, target)},
+            {
+                "$set": {**data, "time": datetime.now()},
+                "$setOnInsert": {"fed_id": fid, "target_id": target, "type": ban_type},
+            },
+            upsert=True,
+        )
+        if prev is None:
+            self._index_fban(fid, target)
+            await self.update_fed(
+                fid, {"$inc": {"banned_count" if ban_type == "user" else "banned_chat_count": 1}}
+            )
+
+        return prev
+
+    async def _unfban(self, fid: str, target: int) -> None:
+        data = await self.fban_db.find_one_and_delete({"_id": self._fban_key(fid, target)})
+        self._unindex_fban(fid, target)
+        if data:
+            await self.update_fed(
+                fid,
+                {"$inc": {"banned_count" if data["type"] == "user" else "banned_chat_count": -1}},
+            )
+
     async def fban_user(
         self,
         fid: str,
@@ -210,17 +578,9 @@ class Federation(plugin.Plugin):
         *,
         fullname: Optional[str] = None,
         reason: Optional[str] = None,
-    ) -> None:
+    ) -> Optional[Mapping[str, Any]]:
         """Fban a user"""
-        await self.db.update_one(
-            {"_id": fid},
-            {
-                "$set": {
-                    f"banned.{user}": {"name": fullname, "reason": reason, "time": datetime.now()}
-                }
-            },
-            upsert=True,
-        )
+        return await self._fban(fid, user, "user", {"name": fullname, "reason": reason})
 
     async def fban_chat(
         self,
@@ -229,95 +589,51 @@ class Federation(plugin.Plugin):
         *,
         title: Optional[str] = None,
         reason: Optional[str] = None,
-    ) -> None:
+    ) -> Optional[Mapping[str, Any]]:
         """Fban a channel"""
-        await self.db.update_one(
-            {"_id": fid},
-            {
-                "$set": {
-                    f"banned_chat.{chat}": {
-                        "title": title,
-                        "reason": reason,
-                        "time": datetime.now(),
-                    }
-                }
-            },
-        )
+        return await self._fban(fid, chat, "chat", {"title": title, "reason": reason})
 
     async def unfban_user(self, fid: str, user: int) -> None:
         """Remove banned user"""
-        await self.db.update_one({"_id": fid}, {"$unset": {f"banned.{user}": None}}, upsert=True)
+        await self._unfban(fid, user)
 
     async def unfban_chat(self, fid: str, chat: int) -> None:
         """Remove banned chat"""
-        await self.db.update_one(
-            {"_id": fid}, {"$unset": {f"banned_chat.{chat}": None}}, upsert=True
-        )
+        await self._unfban(fid, chat)
+
+    async def get_fban(self, fid: str, target: int) -> Optional[MutableMapping[str, Any]]:
+        if fid not in self._fbanned.get(target, ()):
+            return None
+
+        return await self.fban_db.find_one({"_id": self._fban_key(fid, target)})  # type: ignore
 
     async def check_fban(self, target: int) -> util.db.AsyncCursor:
         """Check user banned list"""
-        return self.db.find(
-            {
-                "$or": [
-                    {f"banned.{target}": {"$exists": True}},
-                    {f"banned_chat.{target}": {"$exists": True}},
-                ]
-            },
-            {
-                "_id": 1,
-                "name": 1,
-                f"banned.{target}": 1,
-                f"banned_chat.{target}": 1,
-            },
-        )
+        return self.fban_db.find({"target_id": target})
 
     async def is_fbanned(self, chat: int, target: int) -> Optional[MutableMapping[str, Any]]:
-        def check(target: int, data: Mapping[str, Any]) -> Optional[MutableMapping[str, Any]]:
-            """Scoped check to verify if user is banned"""
-            if str(target) in data.get("banned", {}):
-                user_data = data["banned"][str(target)]
-                user_data["fed_name"] = data["name"]
-                user_data["type"] = "user"
-                return user_data
-
-            if str(target) in data.get("banned_chat", {}):
-                channel_data = data["banned_chat"][str(target)]
-                channel_data["fed_name"] = data["name"]
-                channel_data["type"] = "chat"
-                return channel_data
-
-        data = await self.db.find_one(
-            {
-                "chats": chat,
-                "$or": [
-                    {f"banned.{target}": {"$exists": True}},
-                    {f"banned_chat.{target}": {"$exists": True}},
-                ],
-            },
-            {
-                f"banned.{target}": 1,
-                f"banned_chat.{target}": 1,
-                "name": 1,
-            },
-        )
-        if data:
-            res = check(target, data)
-            if res:
-                return res
+        feds = self._fbanned.get(target)
+        if not feds:
+            return None
 
-        # Check if user is banned in subcribed federation
-        fid = await self.get_fed_bychat(chat)
+        fid = self.graph.fed_of(chat)
         if not fid:
             return None
 
-        subscribe = [res async for res in self._get_fed_subs_data(fid["_id"])]
-        if not subscribe:
-            return None
-        for i in subscribe:
-            res = check(target, i)
-            if res:
-                res["subfed"] = True
-                return res
+        # Prefer the chat's own federation over the subscribed ones
+        hits = sorted(feds & self.graph.effective(fid), key=lambda i: i != fid)
+        for hit in hits:
+            data = await self.get_fban(hit, target)
+            if not data:
+                continue
+
+            fed = await self.get_fed(hit)
+            data["fed_name"] = fed["name"] if fed else hit
+            if hit != fid:
+                data["subfed"] = True
+            return data
+
+        return None
 
     async def fban_handler(
         self, chat: Chat, user: Union[User, Chat], data: MutableMapping[str, Any]
@@ -363,11 +679,12 @@ class Federation(plugin.Plugin):
         fed_id = str(uuid4())
         owner = ctx.msg.from_user
 
-        exists = await self.db.find_one({"owner": owner.id})
+        exists = await self.get_fed_byowner(owner.id)
         if exists:
             return await self.text(chat.id, "federation-limit")
 
         await self.db.insert_one({"_id": fed_id, "name": name, "owner": owner.id, "log": owner.id})
+        self.fed_cache.pop(fed_id)
         return await self.text(chat.id, "new-federation", fed_name=name, fed_id=fed_id)
 
     async def cmd_delfed(self, ctx: command.Context) -> Optional[str]:
@@ -378,7 +695,7 @@ class Federation(plugin.Plugin):
 
         owner = ctx.msg.from_user
 
-        exists = await self.db.find_one({"owner": owner.id})
+        exists = await self.get_fed_byowner(owner.id)
         if not exists:
             return await self.text(chat.id, "user-no-feds")
 
@@ -416,7 +733,7 @@ class Federation(plugin.Plugin):
         if not fid:
             return await self.text(chat.id, "fed-not-found")
 
-        if await self.get_fed_bychat(chat.id):
+        if self.graph.fed_of(chat.id):
             return await self.text(chat.id, "fed-cant-two-feds")
 
         data = await self.get_fed(fid)
@@ -428,8 +745,9 @@ class Federation(plugin.Plugin):
 
         ret, _ = await asyncio.gather(
             self.text(chat.id, "fed-chat-joined-info", data["name"]),
-            self.db.update_one({"_id": fid}, {"$push": {"chats": chat.id}}),
+            self.update_fed(fid, {"$push": {"chats": chat.id}}),
         )
+        self.graph.add_chat(fid, chat.id)
         if log := data.get("log"):
             await self.bot.client.send_message(
                 log,
@@ -455,8 +773,9 @@ class Federation(plugin.Plugin):
 
         ret, _ = await asyncio.gather(
             self.text(chat.id, "fed-chat-leave-info", fed["name"]),
-            self.db.update_one({"_id": fed["_id"]}, {"$pull": {"chats": chat.id}}),
+            self.update_fed(fed["_id"], {"$pull": {"chats": chat.id}}),
         )
+        self.graph.remove_chat(fed["_id"], chat.id)
 
         if log := fed.get("log"):
             await self.bot.client.send_message(
@@ -490,7 +809,7 @@ class Federation(plugin.Plugin):
 
         ret, _ = await asyncio.gather(
             self.text(chat.id, "fed-promote-done"),
-            self.db.update_one({"_id": data["_id"]}, {"$push": {"admins": user.id}}),
+            self.update_fed(data["_id"], {"$push": {"admins": user.id}}),
         )
         if log := data.get("log"):
             await self.bot.client.send_message(
@@ -529,7 +848,7 @@ class Federation(plugin.Plugin):
 
         ret, _ = await asyncio.gather(
             self.text(chat.id, "fed-demote-done"),
-            self.db.update_one({"_id": data["_id"]}, {"$pull": {"admins": user.id}}),
+            self.update_fed(data["_id"], {"$pull": {"admins": user.id}}),
         )
         if log := data.get("log"):
             await self.bot.client.send_message(
@@ -572,8 +891,8 @@ class Federation(plugin.Plugin):
             data["name"],
             owner.mention,
             len(data.get("admins", [])),
-            len(data.get("banned", [])),
-            len(data.get("banned_chat", [])),
+            data.get("banned_count", 0),
+            data.get("banned_chat_count", 0),
             len(data.get("chats", [])),
             len(data.get("subscribers", [])),
         )
@@ -632,14 +951,10 @@ class Federation(plugin.Plugin):
         reason: str,
         fed_data: Mapping[str, Any],
     ) -> str:
-        update = False
-        if str(target.id) in fed_data.get("banned", {}).keys():
-            update = True
-
         fullname = target.first_name + target.last_name if target.last_name else target.first_name
-        await self.fban_user(fed_data["_id"], target.id, fullname=fullname, reason=reason)
+        prev = await self.fban_user(fed_data["_id"], target.id, fullname=fullname, reason=reason)
 
-        if update:
+        if prev:
             return await self.text(
                 chat.id,
                 "fed-ban-info-update",
@@ -647,7 +962,7 @@ class Federation(plugin.Plugin):
                 banner.mention,
                 target.mention,
                 target.id,
-                fed_data["banned"][str(target.id)]["reason"],
+                prev["reason"],
                 reason,
             )
         return await self.text(
@@ -668,13 +983,9 @@ class Federation(plugin.Plugin):
         reason: str,
         fed_data: Mapping[str, Any],
     ) -> str:
-        update = False
-        if str(target.id) in fed_data.get("banned_chat", {}).keys():
-            update = True
-
-        await self.fban_chat(fed_data["_id"], target.id, title=target.title, reason=reason)
+        prev = await self.fban_chat(fed_data["_id"], target.id, title=target.title, reason=reason)
 
-        if update:
+        if prev:
             return await self.text(
                 chat.id,
                 "fed-ban-chat-info-update",
@@ -682,7 +993,7 @@ class Federation(plugin.Plugin):
                 banner.mention,
                 target.title,
                 target.id,
-                fed_data["banned_chat"][str(target.id)]["reason"],
+                prev["reason"],
                 reason,
             )
         return await self.text(
@@ -695,43 +1006,151 @@ class Federation(plugin.Plugin):
             reason,
         )
 
-    async def _propagate_fban(
+    async def _create_fban_job(
         self,
+        ctx: command.Context,
+        action: str,
         target: Union[User, Chat],
-        chats: List[int],
-        host_fed: str,
-        sub_fed: Optional[str] = None,
-    ) -> Mapping[int, str]:
-        """Propagate fban to each chat in the list"""
-        failed = {}
-        for chat in chats:
+        data: Mapping[str, Any],
+        text: str,
+    ) -> MutableMapping[str, Any]:
+        """Persist a propagation job over the chats of every federation enforcing the ban"""
+        chats = list(data.get("chats", []))
+        for fed_id in sorted(self.graph.enforcing(data["_id"])):
+            chats.extend(self.graph.chats_of(fed_id))
+
+        chats = list(dict.fromkeys(chats))
+        job = {
+            "_id": str(uuid4()),
+            "action": action,
+            "fed_id": data["_id"],
+            "fed_name": data["name"],
+            "target_id": target.id,
+            "pending": chats,
+            "total": len(chats),
+            "failed": {},
+            "chat_id": ctx.chat.id,
+            "message_id": ctx.response.id,
+            "text": text,
+            "log": data.get("log"),
+            "time": datetime.now(),
+        }
+        await self.job_db.insert_one(job)
+        return job
+
+    def _start_fban_job(self, job: MutableMapping[str, Any]) -> asyncio.Task[None]:
+        task = self.bot.loop.create_task(self._run_fban_job(job))
+        self._fban_jobs.add(task)
+        task.add_done_callback(self._fban_jobs.discard)
+        return task
+
+    async def _run_fban_job(self, job: MutableMapping[str, Any]) -> None:
+        """Propagate a federation (un)ban to every pending chat of the job"""
+        throttle = util.throttle.AdaptiveThrottle(self.__fban_concurrency)
+        pending: Set[int] = set(job["pending"])
+        failed: Dict[str, str] = job["failed"]
+
+        async def propagate(chat: int) -> None:
+            try:
+                err = await self._propagate_chat(throttle, job, chat)
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.error(f"Failed to {job['action']} on {chat}", exc_info=e)
+                err = str(e) or type(e).__name__
+            if err:
+                failed[str(chat)] = err
+            pending.discard(chat)
+
+        async def report() -> None:
+            while True:
+                await asyncio.sleep(self.__fban_report_interval)
+                await self._checkpoint_fban_job(job, pending, failed)
+
+        reporter = self.bot.loop.create_task(report())
+        try:
+            await asyncio.gather(*(propagate(chat) for chat in list(pending)))
+        except BaseException:
+            # Save the progress so the job resumes on the next start
+            await self.job_db.update_one(
+                {"_id": job["_id"]}, {"$set": {"pending": list(pending), "failed": failed}}
+            )
+            raise
+        finally:
+            reporter.cancel()
+
+        await self.job_db.delete_one({"_id": job["_id"]})
+        await self._finish_fban_job(job, failed)
+
+    async def _propagate_chat(
+        self, throttle: util.throttle.AdaptiveThrottle, job: Mapping[str, Any], chat: int
+    ) -> Optional[str]:
+        """Apply the job action on a chat, returns the failure reason if any"""
+        action = job["action"]
+        target = job["target_id"]
+        if action == "ban":
+            func = self.bot.client.ban_chat_member
+        else:
+            func = self.bot.client.unban_chat_member
+
+        while True:
+            flood_wait: Optional[float] = None
+            await throttle.acquire()
             try:
-                await self.bot.client.ban_chat_member(chat, target.id)
-                await asyncio.sleep(self.__fban_delay)
+                await func(chat, target)
+                return None
+            except FloodWait as flood:
+                flood_wait = float(flood.value)  # type: ignore
+                self.log.info(f"Federation {action} of {target} is waiting {flood_wait}s")
             except UserAdminInvalid:
-                self.log.warning(
-                    f"Failed to fban {util.tg.get_username(target)} on subfed {sub_fed} of {host_fed}  on {chat}, user might be an admin"
-                    if sub_fed
-                    else f"Failed to fban {util.tg.get_username(target)} on {chat}, user might be an admin"
-                )
-                failed[
-                    chat
-                ] = f"failed to fban on chat {chat} caused by: user has higher admin privileges"
-            except (Forbidden, ChannelPrivate) as err:
-                self.log.warning(
-                    f"Can't fban on subfed {sub_fed} of {host_fed} at {chat} caused by {err.MESSAGE}"
-                    if sub_fed
-                    else f"Can't fban {util.tg.get_username(target)} on {chat} caused by {err.MESSAGE}"
-                )
-                failed[chat] = err.MESSAGE
-            except BadRequest as br:
-                self.log.warning(
-                    f"Failed to send fban on subfed {sub_fed} of {host_fed} at {chat} due to {br.MESSAGE}"
-                    if sub_fed
-                    else f"Failed to fban {util.tg.get_username(target)} on {chat} due to {br.MESSAGE}"
+                self.log.warning(f"Failed to {action} {target} on {chat}, user might be an admin")
+                return "user has higher admin privileges"
+            except RPCError as err:
+                self.log.warning(f"Failed to {action} {target} on {chat} due to {err.MESSAGE}")
+                return err.MESSAGE
+            finally:
+                throttle.release(flood_wait=flood_wait)
+
+    async def _checkpoint_fban_job(
+        self, job: Mapping[str, Any], pending: Set[int], failed: Mapping[str, str]
+    ) -> None:
+        await self.job_db.update_one(
+            {"_id": job["_id"]}, {"$set": {"pending": list(pending), "failed": failed}}
+        )
+
+        action = "Federation ban" if job["action"] == "ban" else "Removing federation ban"
+        try:
+            await self.bot.client.edit_message_text(
+                job["chat_id"],
+                job["message_id"],
+                f"{action} for {job['target_id']} in federation {job['fed_name']}: "
+                f"{job['total'] - len(pending)}/{job['total']} chats",
+            )
+        except (BadRequest, Forbidden):
+            pass
+
+    async def _finish_fban_job(self, job: Mapping[str, Any], failed: Mapping[str, str]) -> None:
+        action = "fban" if job["action"] == "ban" else "unfban"
+        text = ""
+        for key, err_msg in list(failed.items())[: self.__fban_report_failed]:
+            text += f"failed to {action} on chat {key} caused by {err_msg}\n\n"
+        if len(failed) > self.__fban_report_failed:
+            text += f"and {len(failed) - self.__fban_report_failed} more chats"
+
+        try:
+            await self.bot.client.edit_message_text(
+                job["chat_id"], job["message_id"], job["text"], disable_web_page_preview=True
+            )
+            if text:
+                await self.bot.client.send_message(
+                    job["chat_id"], text, reply_to_message_id=job["message_id"]
                 )
-                failed[chat] = br.MESSAGE
-        return failed
+        except (BadRequest, Forbidden) as err:
+            self.log.warning(f"Can't report federation {action} result due to {err.MESSAGE}")
+
+        # send message to federation log
+        if log := job.get("log"):
+            await self.bot.client.send_message(log, job["text"], disable_web_page_preview=True)
+            if text:
+                await self.bot.client.send_message(log, text)
 
     async def cmd_fban(
         self, ctx: command.Context, target: Union[User, Chat, None] = None, *, reason: str = ""
@@ -785,52 +1204,13 @@ class Federation(plugin.Plugin):
             return await self.text(chat.id, "err-peer-invalid")
 
         await ctx.respond(f"Starting a federation ban for {target.id} in federation {data['name']}")
-        failed = await self._propagate_fban(target, data["chats"], data["_id"])
-
-        text = ""
-        if failed:
-            for key, err_msg in failed.items():
-                text += f"failed to fban on chat {key} caused by {err_msg}\n\n"
-            await ctx.respond(text, mode="reply", reference=ctx.response)
-
-        if data.get("subscribers", []):
-            for fed_id in data["subscribers"]:
-                subs_data = await self.get_fed(fed_id)
-                if not subs_data:
-                    continue
-                await self._propagate_fban(
-                    target, subs_data.get("chats", []), data["_id"], subs_data["_id"]
-                )
-
-        await ctx.respond(string)
-
-        # send message to federation log
-        if log := data.get("log"):
-            await self.bot.client.send_message(log, string, disable_web_page_preview=True)
-            if failed:
-                await self.bot.client.send_message(log, text)
-
+        job = await self._create_fban_job(ctx, "ban", target, data, string)
+        self._start_fban_job(job)
         return None
 
-    async def _propagate_unfban(
-        self,
-        target: Union[User, Chat],
-        chats: List[int],
-        host_fed: str,
-        sub_fed: Optional[str] = None,
-    ) -> None:
-        for chat in chats:
-            try:
-                await self.bot.client.unban_chat_member(chat, target.id)
-                await asyncio.sleep(self.__fban_delay)
-            except (BadRequest, Forbidden) as err:
-                self.log.warning(
-                    f"Failed to unfban on subfed {sub_fed} of {host_fed} due to {err.MESSAGE}"
-                    if sub_fed
-                    else f"Failed to unfban on {host_fed} due to {err.MESSAGE}"
-                )
-
-    async def cmd_unfban(self, ctx: command.Context, target: Union[User, Chat, None] = None) -> str:
+    async def cmd_unfban(
+        self, ctx: command.Context, target: Union[User, Chat, None] = None
+    ) -> Optional[str]:
         """Unban a user on federation"""
         chat = ctx.chat
         if chat.type == ChatType.PRIVATE:
@@ -855,9 +1235,7 @@ class Federation(plugin.Plugin):
                 return await self.text(chat.id, "fed-no-ban-user")
             target = reply_msg.from_user or reply_msg.sender_chat
 
-        if (str(target.id) not in (data.get("banned", {}).keys())) and (
-            str(target.id) not in (data.get("banned_chat", {}).keys())
-        ):
+        if data["_id"] not in self._fbanned.get(target.id, ()):
             return await self.text(chat.id, "fed-user-not-banned")
 
         if isinstance(target, User):
@@ -884,22 +1262,9 @@ class Federation(plugin.Plugin):
             return ""
 
         await ctx.respond(f"Removing federation ban for {target.id} in federation {data['name']}")
-        await self._propagate_unfban(target, data["chats"], data["_id"])
-
-        if data.get("subscribers", []):
-            for fed_id in data["subscribers"]:
-                subs_data = await self.get_fed(fed_id)
-                if not subs_data:
-                    continue
-
-                await self._propagate_unfban(
-                    target, subs_data.get("chats", []), data["_id"], subs_data["_id"]
-                )
-
-        if log := data.get("log"):
-            await self.bot.client.send_message(log, text, disable_web_page_preview=True)
-
-        return text
+        job = await self._create_fban_job(ctx, "unban", target, data, text)
+        self._start_fban_job(job)
+        return None
 
     @command.filters(aliases=["fstats", "fedstats"])
     async def cmd_fbanstats(self, ctx: command.Context) -> str:
@@ -913,32 +1278,16 @@ class Federation(plugin.Plugin):
 
             data = await self.get_fed(ctx.args[1])
             if data:
-                if str(user_id) in data.get("banned", {}):
-                    res = data["banned"][str(user_id)]
-                    return await self.text(
-                        chat.id,
-                        "fed-stat-banned",
-                        res["reason"],
-                        res["time"].strftime("%Y %b %d %H:%M UTC"),
-                    )
-                if str(user_id) in data.get("banned_chat", {}):
-                    res = data["banned_chat"][str(user_id)]
-                    return await self.text(
-                        chat.id,
-                        "fed-stat-banned-chat",
-                        res["reason"],
-                        res["time"].strftime("%Y %b %d %H:%M UTC"),
-                    )
+                res = await self.get_fban(data["_id"], user_id)
+                if not res:
+                    return await self.text(chat.id, "fed-stat-not-banned")
 
-                if str(user_id) in data.get("banned_chat", {}):
-                    res = data["banned_chat"][str(user_id)]
-                    return await self.text(
-                        chat.id,
-                        "fed-stat-banned-chat",
-                        res["reason"],
-                        res["time"].strftime("%Y %b %d %H:%M UTC"),
-                    )
-                return await self.text(chat.id, "fed-stat-not-banned")
+                return await self.text(
+                    chat.id,
+                    "fed-stat-banned" if res["type"] == "user" else "fed-stat-banned-chat",
+                    res["reason"],
+                    res["time"].strftime("%Y %b %d %H:%M UTC"),
+                )
             return await self.text(chat.id, "fed-not-found")
 
         user = None
@@ -965,19 +1314,26 @@ class Federation(plugin.Plugin):
         if not user:
             return ""
 
-        cursor = await self.check_fban(user_id)
-        fed_list = await cursor.to_list()
-        if fed_list:
+        ban_list = []
+        if user_id in self._fbanned:
+            cursor = await self.check_fban(user_id)
+            ban_list = await cursor.to_list()
+
+        if ban_list:
+            fed_names = {
+                fed["_id"]: fed["name"]
+                async for fed in self.db.find(
+                    {"_id": {"$in": [ban["fed_id"] for ban in ban_list]}}, {"name": 1}
+                )
+            }
             text = await self.text(chat.id, "fed-stat-multi")
-            for bans in fed_list:
+            for ban in ban_list:
                 text += "\n" + await self.text(
                     chat.id,
                     "fed-stat-multi-info",
-                    bans["name"],
-                    bans["_id"],
-                    bans["banned_chat" if bans.get("banned_chat") else "banned"][str(user.id)][
-                        "reason"
-                    ],
+                    fed_names.get(ban["fed_id"], ban["fed_id"]),
+                    ban["fed_id"],
+                    ban["reason"],
                 )
         else:
             text = await self.text(chat.id, "fed-stat-multi-not-banned")
@@ -990,23 +1346,22 @@ class Federation(plugin.Plugin):
         chat = ctx.chat
         user = ctx.msg.from_user
 
-        data = await self.db.find_one({"owner": user.id})
+        data = await self.get_fed_byowner(user.id)
         if not data:
             return await self.text(chat.id, "user-no-feds")
 
-        try:
-            banned = data["banned"]
-        except KeyError:
+        banned = await self.fban_db.find({"fed_id": data["_id"], "type": "user"}).to_list()
+        if not banned:
             return await self.text(chat.id, "fed-backup-empty")
 
         file = AsyncPath(self.bot.config.DOWNLOAD_PATH + data["name"] + ".csv")
 
         await file.touch()
         async with file.open("w") as f:
-            for banned_user in banned:
-                ban_data = banned[banned_user]
+            for ban_data in banned:
                 await f.write(
-                    f"{banned_user},{ban_data['name']},{ban_data['reason']},{ban_data['time']}\n"
+                    f"{ban_data['target_id']},{ban_data['name']},"
+                    f"{ban_data['reason']},{ban_data['time']}\n"
                 )
 
         await ctx.respond(document=str(file))
@@ -1022,7 +1377,7 @@ class Federation(plugin.Plugin):
         if not (reply_msg and reply_msg.document):
             return await self.text(chat.id, "no-backup-file")
 
-        data = await self.db.find_one({"owner": user.id})
+        data = await self.get_fed_byowner(user.id)
         if not data:
             return await self.text(chat.id, "user-no-feds")
 
@@ -1048,7 +1403,7 @@ class Federation(plugin.Plugin):
         chat = ctx.chat
         user = ctx.msg.from_user
 
-        data = await self.db.find_one({"owner": user.id})
+        data = await self.get_fed_byowner(user.id)
         if data:
             return (
                 await self.text(chat.id, "fed-myfeds-owner")
@@ -1126,7 +1481,7 @@ class Federation(plugin.Plugin):
 
             ret, _ = await asyncio.gather(
                 self.text(chat.id, "fed-log-set-group", name=data["name"]),
-                self.db.update_one({"_id": data["_id"]}, {"$set": {"log": chat.id}}),
+                self.update_fed(data["_id"], {"$set": {"log": chat.id}}),
             )
             return ret
 
@@ -1143,7 +1498,7 @@ class Federation(plugin.Plugin):
 
             ret, _ = await asyncio.gather(
                 self.text(chat.id, "fed-log-unset", data["name"]),
-                self.db.update_one({"_id": data["_id"]}, {"$set": {"log": None}}),
+                self.update_fed(data["_id"], {"$set": {"log": None}}),
             )
             return ret
 
@@ -1179,7 +1534,8 @@ class Federation(plugin.Plugin):
             return
         curr_fed, to_subs = res
 
-        await self.db.update_one({"_id": fid}, {"$push": {"subscribers": curr_fed["_id"]}})
+        await self.update_fed(fid, {"$addToSet": {"subscribers": curr_fed["_id"]}})
+        self.graph.subscribe(curr_fed["_id"], to_subs["_id"])
         try:
             await self.bot.client.send_message(
                 to_subs["log"] or to_subs["owner"],
@@ -1197,7 +1553,8 @@ class Federation(plugin.Plugin):
             return
         curr_fed, to_unsubs = res
 
-        await self.db.update_one({"_id": fid}, {"$pull": {"subscribers": curr_fed["_id"]}})
+        await self.update_fed(fid, {"$pull": {"subscribers": curr_fed["_id"]}})
+        self.graph.unsubscribe(curr_fed["_id"], to_unsubs["_id"])
         try:
             await self.bot.client.send_message(
                 to_unsubs["log"],
@@ -16,22 +16,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-import re
 from typing import (
     Any,
     Callable,
     ClassVar,
     Coroutine,
+    Mapping,
     MutableMapping,
     Optional,
     Set,
     Tuple,
+    Union,
 )
 
 from pyrogram.errors import MediaEmpty, MessageEmpty
 from pyrogram.types import Message
 
 from anjani import command, filters, listener, plugin, util
+from anjani.util.aho_corasick import AhoCorasick
 from anjani.util.tg import Types, build_button, get_message_info
 
 
@@ -41,10 +43,18 @@ class Filters(plugin.Plugin):
 
     db: util.db.AsyncCollection
     trigger: MutableMapping[int, Set[str]] = {}
+    # chat id -> automaton over the lowered triggers and lowered -> stored trigger
+    matchers: MutableMapping[int, Tuple[AhoCorasick, Mapping[str, str]]]
+    # chat id -> trigger -> filter data with the buttons already built
+    payloads: util.cache.LRUCache[int, MutableMapping[str, Any]]
     SEND: MutableMapping[int, Callable[..., Coroutine[Any, Any, Optional[Message]]]]
 
+    __payload_cache_size: int = 1000
+
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("FILTERS")
+        self.matchers = {}
+        self.payloads = util.cache.LRUCache(self.__payload_cache_size)
         self.SEND = {
             Types.TEXT.value: self.bot.client.send_message,
             Types.BUTTON_TEXT.value: self.bot.client.send_message,
@@ -69,6 +79,12 @@ class Filters(plugin.Plugin):
     async def on_plugin_restore(self, chat_id: int, data: MutableMapping[str, Any]) -> None:
         await self.db.update_one({"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True)
 
+        triggers = data[self.name].get("trigger")
+        if triggers is not None:
+            self.trigger[chat_id] = set(triggers.keys())
+            self.matchers.pop(chat_id, None)
+        self.payloads.pop(chat_id)
+
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
         old_chat = message.migrate_from_chat_id
@@ -77,6 +93,11 @@ class Filters(plugin.Plugin):
             {"chat_id": old_chat},
             {"$set": {"chat_id": new_chat}},
         )
+        triggers = self.trigger.pop(old_chat, None)
+        if triggers:
+            self.trigger[new_chat] = triggers
+        self.matchers.pop(old_chat, None)
+        self.payloads.pop(old_chat)
 
     @listener.priority(95)
     async def on_message(self, message: Message) -> None:
@@ -89,68 +110,76 @@ class Filters(plugin.Plugin):
         if not (text or chat):
             return
 
-        chat_trigger = self.trigger.get(chat.id, [])
-        if not chat_trigger:
+        if not self.trigger.get(chat.id):
             return
 
-        await self.reply_filter(message, set(chat_trigger), text)
+        await self.reply_filter(message, text)
+
+    def match_trigger(self, chat_id: int, text: str) -> Optional[str]:
+        """Find the trigger that appears first in the text as a whole word"""
+        triggers = self.trigger.get(chat_id)
+        if not triggers:
+            return None
+
+        matcher = self.matchers.get(chat_id)
+        if matcher is None:
+            keywords = {i.lower(): i for i in triggers}
+            matcher = self.matchers[chat_id] = (AhoCorasick(keywords), keywords)
 
-    async def reply_filter(self, message: Message, trigger: Set[str], text: str):
+        automaton, keywords = matcher
+        match = automaton.search(text.lower(), whole_word=True)
+        return keywords[match[1]] if match else None
+
+    async def reply_filter(self, message: Message, text: str):
         if not text or text.startswith("/filter") or text.startswith("/stop"):
             return  # Igonore when command triggered
-        for i in trigger:
-            pattern = r"( |^|[^\w])" + re.escape(i) + r"( |$|[^\w])"
-            if re.search(pattern, text, flags=re.IGNORECASE):
-                filt = await self.get_filter(message.chat.id, i)
-                if not filt:
-                    return
-
-                # This checks data for old filters schema
-                # TODO: deprecate old schema on v3
-                if isinstance(filt, str):
-                    await message.reply_text(filt)
-                else:
-                    reply_to = (
-                        message.reply_to_message.id if message.reply_to_message else message.id
-                    )
-                    types: int = filt["type"]
-                    button = filt.get("buttons", None)
-                    if button:
-                        keyb = build_button(button)
-                    else:
-                        keyb = button
-
-                    try:
-                        if types in {Types.TEXT, Types.BUTTON_TEXT}:
-                            await self.SEND[types](
-                                message.chat.id,
-                                filt["text"],
-                                reply_to_message_id=reply_to,
-                                reply_markup=keyb,
-                            )
-                        elif types in {Types.STICKER, Types.ANIMATION}:
-                            await self.SEND[types](
-                                message.chat.id,
-                                filt["content"],
-                                reply_to_message_id=reply_to,
-                            )
-                        else:
-                            await self.SEND[types](
-                                message.chat.id,
-                                filt["content"],
-                                caption=filt["text"],
-                                reply_to_message_id=reply_to,
-                                reply_markup=keyb,
-                            )
-                    except MediaEmpty:
-                        await self.bot.client.send_message(
-                            message.chat.id, await self.text(message.chat.id, "notes-expired")
-                        )
-                    except MessageEmpty:
-                        self.log.warning(
-                            "Filter message empty on %s with data %s", message.chat.id, filt
-                        )
-                break
+
+        keyword = self.match_trigger(message.chat.id, text)
+        if not keyword:
+            return
+
+        filt = await self.get_payload(message.chat.id, keyword)
+        if not filt:
+            return
+
+        # This checks data for old filters schema
+        # TODO: deprecate old schema on v3
+        if isinstance(filt, str):
+            await message.reply_text(filt)
+            return
+
+        reply_to = message.reply_to_message.id if message.reply_to_message else message.id
+        types: int = filt["type"]
+        keyb = filt["buttons"]
+
+        try:
+            if types in {Types.TEXT, Types.BUTTON_TEXT}:
+                await self.SEND[types](
+                    message.chat.id,
+                    filt["text"],
+                    reply_to_message_id=reply_to,
+                    reply_markup=keyb,
+                )
+            elif types in {Types.STICKER, Types.ANIMATION}:
+                await self.SEND[types](
+                    message.chat.id,
+                    filt["content"],
+                    reply_to_message_id=reply_to,
+                )
+            else:
+                await self.SEND[types](
+                    message.chat.id,
+                    filt["content"],
+                    caption=filt["text"],
+                    reply_to_message_id=reply_to,
+                    reply_markup=keyb,
+                )
+        except MediaEmpty:
+            await self.bot.client.send_message(
+                message.chat.id, await self.text(message.chat.id, "notes-expired")
+            )
+        except MessageEmpty:
+            self.log.warning("Filter message empty on %s with data %s", message.chat.id, filt)
 
     async def get_filter(self, chat_id: int, keyword: str) -> Optional[str]:
         data = await self.db.find_one(
@@ -159,6 +188,28 @@ class Filters(plugin.Plugin):
         )
         return data["trigger"][keyword] if data else None
 
+    async def get_payload(
+        self, chat_id: int, keyword: str
+    ) -> Union[str, MutableMapping[str, Any], None]:
+        """Get a filter ready to be sent, cached until the chat filters change"""
+        payloads = self.payloads.get(chat_id)
+        if payloads is None:
+            payloads = {}
+            self.payloads.set(chat_id, payloads)
+        elif keyword in payloads:
+            return payloads[keyword]
+
+        filt: Union[str, MutableMapping[str, Any], None] = await self.get_filter(chat_id, keyword)
+        if filt and not isinstance(filt, str):
+            button = filt.get("buttons", None)
+            filt = {**filt, "buttons": build_button(button) if button else None}
+
+        # Skip storing if the chat filters changed while loading
+        if self.payloads.get(chat_id) is payloads:
+            payloads[keyword] = filt
+
+        return filt
+
     async def del_filter(self, chat_id: int, keyword: str) -> Tuple[bool, str]:
         filt = self.trigger.get(chat_id)
         if not filt:
@@ -171,6 +222,8 @@ class Filters(plugin.Plugin):
             {"$unset": {f"trigger.{keyword}": ""}},
         )
         self.trigger[chat_id].remove(keyword)
+        self.matchers.pop(chat_id, None)
+        self.payloads.pop(chat_id)
         return True, ""
 
     @command.filters(filters.admin_only)
@@ -212,6 +265,8 @@ class Filters(plugin.Plugin):
             self.trigger[chat.id].add(trigger)
         else:
             self.trigger[chat.id] = {trigger}
+        self.matchers.pop(chat.id, None)
+        self.payloads.pop(chat.id)
 
         return ret
 
@@ -230,6 +285,8 @@ class Filters(plugin.Plugin):
     async def cmd_rmallfilter(self, ctx: command.Context) -> str:
         chat_id = ctx.chat.id
         triggers = self.trigger.pop(chat_id, None)
+        self.matchers.pop(chat_id, None)
+        self.payloads.pop(chat_id)
         if not triggers:
             return await self.text(chat_id, "filters-chat-nofilter")
         await self.db.delete_one({"chat_id": chat_id})
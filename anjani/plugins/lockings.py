@@ -108,10 +108,12 @@ class Lockings(plugin.Plugin):
     helpable: ClassVar[bool] = True
 
     db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
     restrictions: MutableMapping[str, MutableMapping[str, MutableMapping[str, bool]]]
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("LOCKINGS")
+        self.settings = self.bot.db.get_settings_cache("LOCKINGS", fields=("type",))
         self.restrictions = {
             "lock": self.get_restrictions("lock"),
             "unlock": self.get_restrictions("unlock"),
@@ -125,6 +127,7 @@ class Lockings(plugin.Plugin):
             {"chat_id": old_chat},
             {"$set": {"chat_id": new_chat}},
         )
+        self.settings.invalidate(old_chat, new_chat)
 
     async def on_plugin_backup(self, chat_id: int) -> MutableMapping[str, Any]:
         data = await self.db.find_one({"chat_id": chat_id}, {"_id": False})
@@ -132,6 +135,7 @@ class Lockings(plugin.Plugin):
 
     async def on_plugin_restore(self, chat_id: int, data: MutableMapping[str, Any]) -> None:
         await self.db.update_one({"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     @listener.priority(95)
     async def on_message(self, message: Message) -> None:
@@ -154,7 +158,7 @@ class Lockings(plugin.Plugin):
 
         if user:
             try:
-                target = await chat.get_member(user.id)
+                target = await self.bot.get_chat_member(chat.id, user.id)
             except (ChatAdminRequired, ChannelPrivate, PeerIdInvalid, UserNotParticipant):
                 pass
             else:
@@ -194,9 +198,7 @@ class Lockings(plugin.Plugin):
         if not locked or locked and "bots" not in locked:
             return
 
-        bot_perm, added_by_perm = await util.tg.fetch_permissions(
-            self.bot.client, chat.id, added_by.id
-        )
+        bot_perm, added_by_perm = await util.tg.fetch_permissions(self.bot, chat.id, added_by.id)
         if not (bot_perm and added_by_perm) or added_by_perm.status == ChatMemberStatus.OWNER:
             return  # bot added by owner
 
@@ -274,7 +276,7 @@ class Lockings(plugin.Plugin):
         )
 
     async def get_chat_restrictions(self, chat_id: int) -> List[str]:
-        data = await self.db.find_one({"chat_id": chat_id}, {"type": 1})
+        data = await self.settings.get(chat_id)
         return data["type"] if data else []
 
     def unpack_permissions(
@@ -297,6 +299,7 @@ class Lockings(plugin.Plugin):
             raise ValueError("Invalid mode")
 
         await self.db.update_one({"chat_id": chat_id}, {aggregation: {"type": types}}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     @command.filters(filters.admin_only, aliases={"listlocks", "locks", "locked", "locklist"})
     async def cmd_list_locks(self, ctx: command.Context) -> str:
@@ -100,6 +100,7 @@ class Main(plugin.Plugin):
             if not await file.exists():
                 return
 
+            await self.bot.client.storage.checkpoint()  # type: ignore
             data = await self.bot.client.invoke(GetState())
             await self.db.update_one(
                 {"_id": sha256(self.bot.config.BOT_TOKEN.encode()).hexdigest()},
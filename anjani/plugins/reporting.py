@@ -31,10 +31,16 @@ class Reporting(plugin.Plugin):
 
     db: util.db.AsyncCollection
     user_db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
+    user_settings: util.db.AsyncSettingsCache
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("CHAT_REPORTING")
         self.user_db = self.bot.db.get_collection("USER_REPORTING")
+        self.settings = self.bot.db.get_settings_cache("CHAT_REPORTING", fields=("setting",))
+        self.user_settings = self.bot.db.get_settings_cache(
+            "USER_REPORTING", "_id", fields=("setting",)
+        )
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
@@ -44,6 +50,7 @@ class Reporting(plugin.Plugin):
             {"chat_id": old_chat},
             {"$set": {"chat_id": new_chat}},
         )
+        self.settings.invalidate(old_chat, new_chat)
 
     async def on_plugin_backup(self, chat_id: int) -> MutableMapping[str, Any]:
         report = await self.db.find_one({"chat_id": chat_id}, {"_id": False})
@@ -51,6 +58,7 @@ class Reporting(plugin.Plugin):
 
     async def on_plugin_restore(self, chat_id: int, data: MutableMapping[str, Any]) -> None:
         await self.db.update_one({"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     @listener.filters(filters.regex(r"(?i)^@admin(s)?\b") & filters.group & ~filters.outgoing)
     async def on_message(self, message: Message) -> None:
@@ -64,7 +72,7 @@ class Reporting(plugin.Plugin):
             return
 
         try:
-            invoker = await chat.get_member(user.id)
+            invoker = await self.bot.get_chat_member(chat.id, user.id)
             if invoker.status in {ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR}:
                 return  # ignore command from admins
         except UserNotParticipant:
@@ -86,7 +94,7 @@ class Reporting(plugin.Plugin):
             return
 
         try:
-            member = await chat.get_member(reported_user.id)
+            member = await self.bot.get_chat_member(chat.id, reported_user.id)
         except UserNotParticipant:
             await message.reply_text(await self.text(chat.id, "user-not-in-chat"))
             return
@@ -115,6 +123,7 @@ class Reporting(plugin.Plugin):
                 )
             else:
                 await self.user_db.delete_one({"_id": chat_id})
+            self.user_settings.invalidate(chat_id)
         else:
             if setting:
                 await self.db.update_one(
@@ -122,13 +131,14 @@ class Reporting(plugin.Plugin):
                 )
             else:
                 await self.db.delete_one({"chat_id": chat_id})
+            self.settings.invalidate(chat_id)
 
     async def is_active(self, uid: int, is_private: bool) -> bool:
         """Get current setting default to True"""
         if is_private:
-            data = await self.user_db.find_one({"_id": uid})
+            data = await self.user_settings.get(uid)
         else:
-            data = await self.db.find_one({"chat_id": uid})
+            data = await self.settings.get(uid)
         if not data:
             return True
 
@@ -159,7 +169,7 @@ class Reporting(plugin.Plugin):
 
             return await self.text(chat.id, "err-yes-no-args")
 
-        _, member = await util.tg.fetch_permissions(self.bot.client, chat.id, ctx.author.id)
+        _, member = await util.tg.fetch_permissions(self.bot, chat.id, ctx.author.id)
         if not member or member.status not in {
             ChatMemberStatus.ADMINISTRATOR,
             ChatMemberStatus.OWNER,
@@ -15,9 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-from datetime import datetime
 from json import JSONDecodeError
-from typing import Any, ClassVar, List, MutableMapping, Optional
+from typing import TYPE_CHECKING, Any, ClassVar, List, MutableMapping, Optional
 
 from aiohttp import (
     ClientConnectorError,
@@ -42,13 +41,16 @@ except ImportError:
 from anjani import command, filters, listener, plugin, util
 from anjani.util.misc import StopPropagation
 
+if TYPE_CHECKING:
+    from .federation import Federation
+
 
 class SpamShield(plugin.Plugin):
     name: ClassVar[str] = "SpamShield"
     helpable: ClassVar[bool] = True
 
     db: util.db.AsyncCollection
-    federation_db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
     token: Optional[str]
     spam_protection: bool
 
@@ -58,7 +60,7 @@ class SpamShield(plugin.Plugin):
             self.bot.log.warning("SpamWatch API token not exist")
 
         self.db = self.bot.db.get_collection("GBAN_SETTINGS")  # spamshield autoban
-        self.federation_db = self.bot.db.get_collection("FEDERATIONS")
+        self.settings = self.bot.db.get_settings_cache("GBAN_SETTINGS", fields=("setting",))
         self.user_db = self.bot.db.get_collection("USERS")
         self.spam_protection = "SpamPredict" in self.bot.plugins
 
@@ -70,6 +72,7 @@ class SpamShield(plugin.Plugin):
             {"chat_id": old_chat},
             {"$set": {"chat_id": new_chat}},
         )
+        self.settings.invalidate(old_chat, new_chat)
 
     async def on_plugin_backup(self, chat_id: int) -> MutableMapping[str, Any]:
         setting = await self.db.find_one({"chat_id": chat_id}, {"_id": False})
@@ -77,6 +80,7 @@ class SpamShield(plugin.Plugin):
 
     async def on_plugin_restore(self, chat_id: int, data: MutableMapping[str, Any]) -> None:
         await self.db.update_one({"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     @listener.priority(90)
     async def on_chat_action(self, message: Message) -> None:
@@ -86,7 +90,7 @@ class SpamShield(plugin.Plugin):
             return
 
         try:
-            me = await chat.get_member("me")
+            me = await self.bot.get_chat_member(chat.id, "me")
             if not me.privileges or not me.privileges.can_restrict_members:
                 return
 
@@ -124,7 +128,7 @@ class SpamShield(plugin.Plugin):
                     await self.user_db.update_one({"_id": user.id}, {"$set": {"spam": True}})
 
         try:
-            me, target = await util.tg.fetch_permissions(self.bot.client, chat.id, user.id)
+            me, target = await util.tg.fetch_permissions(self.bot, chat.id, user.id)
             if (
                 not (me and target)
                 or not me.privileges
@@ -231,26 +235,24 @@ class SpamShield(plugin.Plugin):
 
     async def is_active(self, chat_id: int) -> bool:
         """Return SpamShield setting"""
-        data = await self.db.find_one({"chat_id": chat_id})
+        data = await self.settings.get(chat_id)
         return data["setting"] if data else True
 
     async def ban(self, chat: Chat, user: User, reason: str) -> None:
         fullname = user.first_name + user.last_name if user.last_name else user.first_name
-        await asyncio.gather(
-            chat.ban_member(user.id),
-            self.federation_db.update_one(
-                {"_id": "AnjaniSpamShield"},
-                {
-                    "$set": {
-                        f"banned.{user.id}": {
-                            "name": fullname,
-                            "reason": "Automated fban " + reason,
-                            "time": datetime.now(),
-                        }
-                    }
-                },
-            ),
-        )
+        tasks = [chat.ban_member(user.id)]
+        if "Federations" in self.bot.plugins:
+            fed: "Federation" = self.bot.plugins["Federations"]  # type: ignore
+            tasks.append(
+                fed.fban_user(
+                    "AnjaniSpamShield",
+                    user.id,
+                    fullname=fullname,
+                    reason="Automated fban " + reason,
+                )
+            )
+
+        await asyncio.gather(*tasks)
 
     async def setting(self, chat_id: int, setting: bool) -> None:
         """Turn on/off SpamShield in chats"""
@@ -258,6 +260,7 @@ class SpamShield(plugin.Plugin):
             await self.db.update_one({"chat_id": chat_id}, {"$set": {"setting": True}}, upsert=True)
         else:
             await self.db.delete_one({"chat_id": chat_id})
+        self.settings.invalidate(chat_id)
 
     async def check(self, user: User, chat: Chat, message: Message) -> bool:
         """Shield checker action."""
@@ -107,6 +107,29 @@ class Staff(plugin.Plugin):
                 caption="Here is the list of chats in my database.",
             )
 
+    @command.filters(filters.staff_only)
+    async def cmd_slowqueries(self, ctx: command.Context, limit: Optional[int] = 10) -> str:
+        """Show the slowest database query shapes since startup"""
+        if not util.db.query_profiler.enabled:
+            return "Query profiling is disabled, set `DB_PROFILE` to enable it."
+
+        stats = util.db.query_profiler.slowest(limit or 10)
+        if not stats:
+            return "No queries recorded yet."
+
+        text = "**Slowest queries**\n"
+        for stat in stats:
+            text += (
+                f"\n`{stat.collection}.{stat.operation}` "
+                f"max {stat.slowest * 1000:.1f}ms, "
+                f"avg {stat.total / stat.count * 1000:.1f}ms, {stat.count}x\n"
+                f"filter: `{stat.shape or '{}'}`\n"
+            )
+            if stat.projection:
+                text += f"projection: `{stat.projection}`\n"
+
+        return text
+
     @command.filters(filters.dev_only)
     async def cmd_logs(self, ctx: command.Context) -> None:
         """Send bot log"""
@@ -15,12 +15,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-from typing import Any, ClassVar, List, Mapping, Optional
+from typing import Any, ClassVar, List, Mapping, MutableMapping, Optional
 
 from pyrogram.enums.parse_mode import ParseMode
 from pyrogram.types import Message
 
-from anjani import command, filters, plugin, util
+from anjani import command, filters, listener, plugin, util
 
 USEC_PER_HOUR = 60 * 60 * 1000000
 USEC_PER_DAY = USEC_PER_HOUR * 24
@@ -48,8 +48,13 @@ class PluginStats(plugin.Plugin):
 
     db: util.db.AsyncCollection
 
+    _pending: MutableMapping[str, int]
+    _flush_task: Optional[asyncio.Task[None]]
+
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("STATS")
+        self._pending = {}
+        self._flush_task = None
         self.chats_db = self.bot.db.get_collection("CHATS")
         self.users_db = self.bot.db.get_collection("USERS")
         self.feds_db = self.bot.db.get_collection("FEDERATIONS")
@@ -72,9 +77,40 @@ class PluginStats(plugin.Plugin):
         if not await self.get("start_time_usec"):
             await self.put("start_time_usec", time_us)
 
+    async def on_started(self) -> None:
+        self._flush_task = self.bot.loop.create_task(self.flush_loop())
+
+    @listener.priority(200)
+    async def on_stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.flush()
+
     async def on_stat_listen(self, key: str, value: int) -> None:
         await self.inc(key, value)
 
+    async def flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.bot.config.STATS_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.error("Failed to flush stats", exc_info=e)
+
+    async def flush(self) -> None:
+        """Write every pending counter delta in a single `$inc` update"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        try:
+            await self.db.update_one({"_id": 1}, {"$inc": pending}, upsert=True)
+        except Exception:
+            # Put the deltas back so they are retried on the next flush
+            for key, value in pending.items():
+                self._pending[key] = self._pending.get(key, 0) + value
+            raise
+
     async def on_message(self, message: Message) -> None:
         stat = "sent" if message.outgoing else "received"
         await self.bot.log_stat(stat)
@@ -84,17 +120,31 @@ class PluginStats(plugin.Plugin):
     ) -> None:
         await self.bot.log_stat("processed")
 
+    async def get_all(self) -> MutableMapping[str, Any]:
+        """Get all stats, including deltas that haven't been flushed yet"""
+        stats = await self.db.find_one({"_id": 1}) or {}
+        for key, value in self._pending.items():
+            stats[key] = stats.get(key, 0) + value
+
+        return stats
+
     async def get(self, key: str) -> Optional[Any]:
         collection = await self.db.find_one({"_id": 1})
-        return collection.get(key) if collection else None
+        value = collection.get(key) if collection else None
+        if key in self._pending:
+            return (value or 0) + self._pending[key]
+
+        return value
 
     async def inc(self, key: str, value: int) -> None:
-        await self.db.update_one({"_id": 1}, {"$inc": {key: value}}, upsert=True)
+        self._pending[key] = self._pending.get(key, 0) + value
 
     async def delete(self, key: str) -> None:
+        self._pending.pop(key, None)
         await self.db.update_one({"_id": 1}, {"$unset": {key: ""}})
 
     async def put(self, key: str, value: int) -> None:
+        self._pending.pop(key, None)
         await self.db.update_one({"_id": 1}, {"$set": {key: value}}, upsert=True)
 
     @command.filters(filters.dev_only & filters.private)
@@ -106,56 +156,42 @@ class PluginStats(plugin.Plugin):
             self.bot.loop.create_task(util.tg.reply_and_delete(ctx.msg, "Stats reset", 5))
             return None
 
-        start_time: Optional[int] = await self.get("start_time_usec")
+        stats, total_users, total_chats = await asyncio.gather(
+            self.get_all(),
+            self.users_db.count_documents({}),
+            self.chats_db.count_documents({}),
+        )
+        start_time: Optional[int] = stats.get("start_time_usec")
         if start_time is None:
             start_time = util.time.usec()
             await self.put("start_time_usec", start_time)
 
         uptime = util.time.usec() - start_time
-        resp = await asyncio.gather(
-            self.get("downtime"),
-            self.get("received"),
-            self.get("processed"),
-            self.get("predicted"),
-            self.get("spam_detected"),
-            self.get("spam_deleted"),
-            self.get("banned"),
-            self.users_db.count_documents({}),
-            self.chats_db.count_documents({}),
-        )
-        for index, stat in enumerate(resp):
-            if stat is None:
-                resp[index] = 0
-
-        (
-            downtime,
-            recv,
-            processed,
-            predicted,
-            spam_detected,
-            spam_deleted,
-            banned,
-            total_users,
-            total_chats,
-        ) = resp
+        downtime = stats.get("downtime", 0)
+        recv = stats.get("received", 0)
+        processed = stats.get("processed", 0)
+        predicted = stats.get("predicted", 0)
+        spam_detected = stats.get("spam_detected", 0)
+        spam_deleted = stats.get("spam_deleted", 0)
+        banned = stats.get("banned", 0)
         total_federations = 0
         total_fbanned = 0
         total_chat_fbanned = 0
         pipeline: List[Mapping[str, Any]] = [
             {
-                "$project": {
-                    "_id": 1,
-                    "name": 1,
-                    "banned_user": {"$size": {"$objectToArray": {"$ifNull": ["$banned", {}]}}},
-                    "banned_chat": {"$size": {"$objectToArray": {"$ifNull": ["$banned_chat", {}]}}},
+                "$group": {
+                    "_id": None,
+                    "federations": {"$sum": 1},
+                    "banned_user": {"$sum": "$banned_count"},
+                    "banned_chat": {"$sum": "$banned_chat_count"},
                 }
             }
         ]
 
         async for opt in self.feds_db.aggregate(pipeline=pipeline):
-            total_federations += 1
-            total_fbanned += opt.get("banned_user", 0)
-            total_chat_fbanned += opt.get("banned_chat", 0)
+            total_federations = opt.get("federations", 0)
+            total_fbanned = opt.get("banned_user", 0)
+            total_chat_fbanned = opt.get("banned_chat", 0)
 
         text = f"""<b>STATS  SINCE  LAST  RESET</b>:\n
   • <b>Total Uptime Elapsed</b>: <b>{util.time.format_duration_us(uptime - downtime)}</b>
@@ -26,9 +26,11 @@ class Topics(plugin.Plugin):
     helpable: ClassVar[bool] = True
 
     db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("CHATS")
+        self.settings = self.bot.db.get_settings_cache("CHATS", fields=("action_topic",))
 
     @listener.filters(filters.regex(r"topic_action_(.*)"))
     async def on_callback_query(self, query: CallbackQuery) -> None:
@@ -58,6 +60,7 @@ class Topics(plugin.Plugin):
             {"$set": {"action_topic": ctx.msg.message_thread_id}},
             upsert=True,
         )
+        self.settings.invalidate(ctx.chat.id)
         return await self.text(ctx.chat.id, "topic-set")
 
     @command.filters(filters.can_manage_topic)
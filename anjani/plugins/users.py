@@ -21,13 +21,14 @@ from html import escape
 from time import time
 from typing import Any, ClassVar, List, Mapping, MutableMapping, Optional, Union
 
+from pymongo import UpdateOne
 from pyrogram.enums.chat_action import ChatAction
 from pyrogram.enums.chat_type import ChatType
 from pyrogram.enums.parse_mode import ParseMode
 from pyrogram.errors import BadRequest, ChannelInvalid, ChannelPrivate, PeerIdInvalid
 from pyrogram.types import CallbackQuery, Chat, ChatPreview, Message, User
 
-from anjani import command, listener, plugin, util
+from anjani import command, filters, listener, plugin, util
 
 try:
     from userbotindo import get_trust
@@ -40,56 +41,106 @@ class Users(plugin.Plugin):
 
     chats_db: util.db.AsyncCollection
     users_db: util.db.AsyncCollection
+    members_db: util.db.AsyncCollection
+    chats_buffer: util.db.AsyncWriteBuffer
+    users_buffer: util.db.AsyncWriteBuffer
+    members_buffer: util.db.AsyncWriteBuffer
     predict_loaded: bool
 
+    __migrate_batch_size: int = 1000
+
     async def on_load(self) -> None:
         self.chats_db = self.bot.db.get_collection("CHATS")
         self.users_db = self.bot.db.get_collection("USERS")
+        self.chats_buffer = util.db.AsyncWriteBuffer(self.chats_db, "chat_id", log=self.log)
+        self.users_buffer = util.db.AsyncWriteBuffer(self.users_db, log=self.log)
+        # Membership edges, one document per (chat_id, user_id)
+        self.members_db = self.bot.db.get_collection("MEMBERS")
+        self.members_buffer = util.db.AsyncWriteBuffer(
+            self.members_db, ("chat_id", "user_id"), log=self.log
+        )
         self.predict_loaded = "SpamPredict" in self.bot.plugins
 
+        await asyncio.gather(
+            self.members_db.create_index([("chat_id", 1), ("user_id", 1)], unique=True),
+            self.members_db.create_index("user_id"),
+        )
+
+    async def on_start(self, _: int) -> None:
+        self.chats_buffer.start()
+        self.users_buffer.start()
+        self.members_buffer.start()
+
+    async def on_stop(self) -> None:
+        await asyncio.gather(
+            self.chats_buffer.close(), self.users_buffer.close(), self.members_buffer.close()
+        )
+
     def hash_id(self, id: int) -> str:
         # skipcq: PTC-W1003
         return md5((str(id) + self.bot.user.username).encode()).hexdigest()  # skipcq: BAN-B324
 
-    async def build_channel_task(self, channel: Chat) -> asyncio.Task[Any]:
-        async def _do_nothing() -> None:
+    def update_channel(self, channel: Chat) -> None:
+        if channel.type != ChatType.CHANNEL:
             return
 
-        if channel.type == ChatType.CHANNEL:
-            data = await self.chats_db.find_one({"chat_id": channel.id})
-            content = {"chat_name": channel.title, "type": "channel"}
-            if not data or "hash" not in data:
-                content["hash"] = self.hash_id(channel.id)
-            return self.bot.loop.create_task(
-                self.chats_db.update_one({"chat_id": channel.id}, {"$set": content}, upsert=True)
-            )
-
-        return self.bot.loop.create_task(_do_nothing())
+        self.chats_buffer.update(
+            channel.id,
+            {
+                "$set": {"chat_name": channel.title, "type": "channel"},
+                "$setOnInsert": {"hash": self.hash_id(channel.id)},
+            },
+            upsert=True,
+        )
 
-    async def build_user_task(self, user: User) -> asyncio.Task:
-        data = await self.users_db.find_one({"_id": user.id})
-        content: MutableMapping[str, Any] = {
-            "username": util.tg.get_username(user),
-            "last_seen": int(time()),
-        }
-        if not data or "hash" not in data:
-            content["hash"] = self.hash_id(user.id)
-        if not data or "chats" not in data:
-            content["chats"] = []
-        return self.bot.loop.create_task(
-            self.users_db.update_one({"_id": user.id}, {"$set": content}, upsert=True)
+    def update_user(self, user: User) -> None:
+        self.users_buffer.update(
+            user.id,
+            {
+                "$set": {"username": util.tg.get_username(user), "last_seen": int(time())},
+                "$setOnInsert": {"hash": self.hash_id(user.id)},
+            },
+            upsert=True,
         )
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
         old_chat = message.migrate_from_chat_id
 
+        await asyncio.gather(self.chats_buffer.flush(), self.members_buffer.flush())
         await asyncio.gather(
-            self.users_db.update_many({"chats": old_chat}, {"$push": {"chats": new_chat}}),
-            self.users_db.update_many({"chats": old_chat}, {"$pull": {"chats": old_chat}}),
+            self._move_members(old_chat, new_chat),
             self.chats_db.update_one({"chat_id": old_chat}, {"$set": {"chat_id": new_chat}}),
         )
 
+    async def _move_members(self, old_chat: int, new_chat: int) -> None:
+        """Move the memberships of a migrated chat.
+
+        Members may already be recorded under the new id, so rows are merged with
+        an upsert instead of renaming the chat id under the unique index.
+        """
+        now = int(time())
+        requests: List[UpdateOne] = []
+        async for data in self.members_db.find({"chat_id": old_chat}, {"_id": False}):
+            requests.append(
+                UpdateOne(
+                    {"chat_id": new_chat, "user_id": data["user_id"]},
+                    {
+                        "$min": {"first_seen": data.get("first_seen", now)},
+                        "$max": {"last_seen": data.get("last_seen", now)},
+                    },
+                    upsert=True,
+                )
+            )
+            if len(requests) >= self.__migrate_batch_size:
+                await self.members_db.bulk_write(requests, ordered=False)
+                requests = []
+
+        if requests:
+            await self.members_db.bulk_write(requests, ordered=False)
+
+        await self.members_db.delete_many({"chat_id": old_chat})
+
     async def on_chat_action(self, message: Message) -> None:
         """Delete user data from chats"""
         if message.new_chat_members:
@@ -98,26 +149,19 @@ class Users(plugin.Plugin):
         chat = message.chat
         user = message.left_chat_member
         if user.id == self.bot.uid:
-            await asyncio.gather(
-                self.chats_db.update_one({"chat_id": chat.id}, {"$set": {"member": []}}),
-                self.users_db.update_many({"chats": chat.id}, {"$pull": {"chats": chat.id}}),
-            )
+            # Don't let pending updates add the memberships back
+            await self.members_buffer.flush()
+            await self.members_db.delete_many({"chat_id": chat.id})
         else:
-            await asyncio.gather(
-                self.users_db.update_one({"_id": user.id}, {"$pull": {"chats": chat.id}}),
-                self.chats_db.update_one({"chat_id": chat.id}, {"$pull": {"member": user.id}}),
-            )
+            self.members_buffer.discard((chat.id, user.id))
+            await self.members_db.delete_one({"chat_id": chat.id, "user_id": user.id})
 
     async def on_callback_query(self, query: CallbackQuery) -> None:
         """Hanle user that sent a callback query"""
         user = query.from_user
-        set_content = {"username": util.tg.get_username(user), "name": user.first_name}
-        user_data = await self.users_db.find_one({"_id": user.id})
-
-        if self.predict_loaded and (not user_data or "hash" not in user_data):
-            set_content["hash"] = self.hash_id(user.id)
-
-        await self.users_db.update_one({"_id": user.id}, {"$set": set_content})
+        self.users_buffer.update(
+            user.id, {"$set": {"username": util.tg.get_username(user), "name": user.first_name}}
+        )
 
     @listener.priority(50)
     async def on_message(self, message: Message) -> None:
@@ -131,58 +175,88 @@ class Users(plugin.Plugin):
         if not user or not chat:  # sanity check for service
             return
 
-        tasks = []
         set_content = {
             "username": util.tg.get_username(user),
             "name": user.first_name,
             "last_seen": int(time()),
         }
-        user_data = await self.users_db.find_one({"_id": user.id})
+        update: MutableMapping[str, Any] = {"$set": set_content}
+        if self.predict_loaded:
+            update["$setOnInsert"] = {"hash": self.hash_id(user.id)}
+            if ch := message.forward_from_chat:
+                self.update_channel(ch)
+            if usr := message.forward_from:
+                self.update_user(usr)
 
         if chat.type == ChatType.PRIVATE:
-            if self.predict_loaded:
-                if ch := message.forward_from_chat:
-                    tasks.append(await self.build_channel_task(ch))
-                if not user_data or "hash" not in user_data:
-                    set_content["hash"] = self.hash_id(user.id)
-                if usr := message.forward_from:
-                    tasks.append(await self.build_user_task(usr))
-
-            await asyncio.gather(
-                self.users_db.update_one({"_id": user.id}, {"$set": set_content}), *tasks
-            )
+            self.users_buffer.update(user.id, update)
             return
 
-        chat_data = await self.chats_db.find_one({"chat_id": chat.id})
-        chat_update = {
+        chat_update: MutableMapping[str, Any] = {
             "$set": {
                 "chat_name": chat.title,
                 "type": chat.type.name.lower(),
                 "last_update": int(time()),
             },
-            "$addToSet": {"member": user.id},
         }
         if self.predict_loaded:
-            if not user_data or "hash" not in user_data:
-                set_content["hash"] = self.hash_id(user.id)
-            if not chat_data or "hash" not in chat_data:
-                chat_update["$set"]["hash"] = self.hash_id(chat.id)
-            update = {
-                "$set": set_content,
-                "$setOnInsert": {"reputation": 0},
-                "$addToSet": {"chats": chat.id},
-            }
-            if ch := message.forward_from_chat:
-                tasks.append(await self.build_channel_task(ch))
-            if usr := message.forward_from:
-                tasks.append(await self.build_user_task(usr))
-        else:
-            update = {"$set": set_content, "$addToSet": {"chats": chat.id}}
+            chat_update["$setOnInsert"] = {"hash": self.hash_id(chat.id)}
+            update["$setOnInsert"]["reputation"] = 0
+
+        self.users_buffer.update(user.id, update, upsert=True)
+        self.chats_buffer.update(chat.id, chat_update, upsert=True)
+        self.members_buffer.update(
+            (chat.id, user.id),
+            {
+                "$set": {"last_seen": set_content["last_seen"]},
+                "$setOnInsert": {"first_seen": set_content["last_seen"]},
+            },
+            upsert=True,
+        )
 
-        await asyncio.gather(
-            self.users_db.update_one({"_id": user.id}, update, upsert=True),
-            self.chats_db.update_one({"chat_id": chat.id}, chat_update, upsert=True),
-            *tasks,
+    async def _migrate_members(self, collection: util.db.AsyncCollection, field: str) -> int:
+        """Move a membership array of every document into the MEMBERS collection"""
+        now = int(time())
+        migrated = 0
+        requests: List[UpdateOne] = []
+        async for data in collection.find({field: {"$exists": True}}, {"chat_id": 1, field: 1}):
+            for member in data.get(field) or []:
+                if field == "member":
+                    chat_id, user_id = data["chat_id"], member
+                else:
+                    chat_id, user_id = member, data["_id"]
+
+                requests.append(
+                    UpdateOne(
+                        {"chat_id": chat_id, "user_id": user_id},
+                        {"$setOnInsert": {"first_seen": now, "last_seen": now}},
+                        upsert=True,
+                    )
+                )
+                if len(requests) >= self.__migrate_batch_size:
+                    await self.members_db.bulk_write(requests, ordered=False)
+                    migrated += len(requests)
+                    requests = []
+
+            if requests:
+                await self.members_db.bulk_write(requests, ordered=False)
+                migrated += len(requests)
+                requests = []
+
+            await collection.update_one({"_id": data["_id"]}, {"$unset": {field: ""}})
+
+        return migrated
+
+    @command.filters(filters.owner_only)
+    async def cmd_migratemembers(self, ctx: command.Context) -> str:
+        """Move CHATS.member and USERS.chats arrays into the MEMBERS collection"""
+        await ctx.respond("Migrating chat memberships...")
+        await self.members_buffer.flush()
+        from_chats = await self._migrate_members(self.chats_db, "member")
+        from_users = await self._migrate_members(self.users_db, "chats")
+        return (
+            f"Migrated {from_chats} chat members and {from_users} user chats "
+            "into the membership collection."
         )
 
     async def _user_info(self, ctx: command.Context, user: User) -> None:
@@ -265,7 +339,8 @@ class Users(plugin.Plugin):
         if self.predict_loaded:
             text += f"\n<b>Identifier</b>: <code>{data.get('hash', 'unknown')}</code>"
             text += f"\n<b>Reputation</b>: <code>{data.get('reputation', 0)}</code>"
-        text += f"\nI've seen them on {len(data.get('chats', []))} chats."
+        chats = await self.members_db.count_documents({"user_id": data["_id"]})
+        text += f"\nI've seen them on {chats} chats."
         return text
 
     async def _chat_info(self, ctx: command.Context, chat: Union[Chat, ChatPreview]) -> None:
@@ -57,11 +57,17 @@ class Greeting(plugin.Plugin):
 
     db: util.db.AsyncCollection
     chat_db: util.db.AsyncCollection
+    settings: util.db.AsyncSettingsCache
+    chat_settings: util.db.AsyncSettingsCache
     SEND: MutableMapping[int, Callable[..., Coroutine[Any, Any, Optional[Message]]]]
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("WELCOME")
         self.chat_db = self.bot.db.get_collection("CHATS")
+        self.settings = self.bot.db.get_settings_cache(
+            "WELCOME", fields=("should_welcome", "should_goodbye", "clean_service")
+        )
+        self.chat_settings = self.bot.db.get_settings_cache("CHATS", fields=("action_topic",))
 
         self.SEND = {
             Types.TEXT.value: self.bot.client.send_message,
@@ -215,6 +221,7 @@ class Greeting(plugin.Plugin):
             {"chat_id": old_chat},
             {"$set": {"chat_id": new_chat}},
         )
+        self.settings.invalidate(old_chat, new_chat)
 
     async def on_plugin_backup(self, chat_id: int) -> MutableMapping[str, Any]:
         welcome = await self.db.find_one({"chat_id": chat_id}, {"_id": False})
@@ -222,6 +229,7 @@ class Greeting(plugin.Plugin):
 
     async def on_plugin_restore(self, chat_id: int, data: MutableMapping[str, Any]) -> None:
         await self.db.update_one({"chat_id": chat_id}, {"$set": data[self.name]}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     @staticmethod
     async def _build_text(
@@ -251,17 +259,17 @@ class Greeting(plugin.Plugin):
     async def get_action_topic(self, chat: Chat) -> Optional[int]:
         if not chat.is_forum:
             return None
-        data = await self.chat_db.find_one({"chat_id": chat.id}, {"action_topic": True})
+        data = await self.chat_settings.get(chat.id)
         return data.get("action_topic") if data else None
 
     async def is_welcome(self, chat_id: int) -> bool:
         """Get chat welcome setting"""
-        active = await self.db.find_one({"chat_id": chat_id}, {"should_welcome": 1})
+        active = await self.settings.get(chat_id)
         return active.get("should_welcome", True) if active else True
 
     async def is_goodbye(self, chat_id: int) -> bool:
         """Get chat welcome setting"""
-        active = await self.db.find_one({"chat_id": chat_id}, {"should_goodbye": 1})
+        active = await self.settings.get(chat_id)
         return active.get("should_goodbye", True) if active else True
 
     async def welc_message(
@@ -277,6 +285,7 @@ class Greeting(plugin.Plugin):
                 button: Optional[Button] = message.get("button")
                 message_type: Types = Types.TEXT
                 await self.db.delete_one({"chat_id": chat_id})
+                self.settings.invalidate(chat_id)
                 await self.set_custom_welcome(
                     chat_id=chat_id,
                     text=text,
@@ -307,7 +316,7 @@ class Greeting(plugin.Plugin):
 
     async def clean_service(self, chat_id: int) -> bool:
         """Fetch clean service setting"""
-        clean = await self.db.find_one({"chat_id": chat_id}, {"clean_service": 1})
+        clean = await self.settings.get(chat_id)
         if clean:
             return clean.get("clean_service", True)
 
@@ -334,6 +343,7 @@ class Greeting(plugin.Plugin):
             },
             upsert=True,
         )
+        self.settings.invalidate(chat_id)
 
     async def set_custom_goodbye(self, chat_id: int, text: str) -> None:
         """Set custom goodbye"""
@@ -364,6 +374,7 @@ class Greeting(plugin.Plugin):
             await self.db.update_one({"chat_id": chat_id}, {"$set": {key: False}}, upsert=True)
         else:
             await self.db.update_one({"chat_id": chat_id}, {"$unset": {key: ""}}, upsert=True)
+        self.settings.invalidate(chat_id)
 
     async def previous_welcome(
         self, chat_id: int, msg_id: int, is_bulk: bool = False
@@ -373,12 +384,17 @@ class Greeting(plugin.Plugin):
         data = await self.db.find_one_and_update(
             {"chat_id": chat_id}, {operator: {"prev_welc": msg_id}}, upsert=True
         )
+        if data is None:
+            # The upsert created the document, which turns clean service on
+            self.settings.invalidate(chat_id)
         return data.get("prev_welc", None) if data else None
 
     async def previous_goodbye(self, chat_id: int, msg_id: int) -> Optional[int]:
         data = await self.db.find_one_and_update(
             {"chat_id": chat_id}, {"$set": {"prev_gdby": msg_id}}, upsert=True
         )
+        if data is None:
+            self.settings.invalidate(chat_id)
         return data.get("prev_gdby", None) if data else None
 
     @command.filters(filters.admin_only)
@@ -15,8 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from . import (  # skipcq: PY-W2000
+    aho_corasick,
     async_helper,
-    cache_limiter,
+    batcher,
+    cache,
+    classifier_pool,
     config,
     converter,
     db,
@@ -24,6 +27,7 @@ from . import (  # skipcq: PY-W2000
     misc,
     system,
     tg,
+    throttle,
     time,
     types,
 )
@@ -0,0 +1,118 @@
+"""Anjani multi-pattern string matcher"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class AhoCorasick:
+    """Aho–Corasick automaton that finds every pattern in a text in one pass.
+
+    The automaton is built once from the patterns, matching is linear in the
+    length of the text plus the number of matches. Patterns are matched as
+    given, fold the case of both the patterns and the text for case
+    insensitive matching.
+    """
+
+    # Initialized during instantiation
+    _goto: List[Dict[str, int]]
+    _fail: List[int]
+    _out: List[Tuple[str, ...]]
+    _max_len: int
+    _size: int
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto = [{}]
+        self._fail = [0]
+        out: List[List[str]] = [[]]
+        self._max_len = 0
+
+        for pattern in set(patterns):
+            if not pattern:
+                continue
+
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    out.append([])
+                state = nxt
+
+            out[state].append(pattern)
+            self._max_len = max(self._max_len, len(pattern))
+
+        self._size = sum(map(len, out))
+
+        # Breadth-first so the failure state of a node is always built first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                out[nxt].extend(out[self._fail[nxt]])
+
+        self._out = [tuple(i) for i in out]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield the start index and pattern of every match, ordered by end index"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for idx, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for pattern in out[state]:
+                yield idx + 1 - len(pattern), pattern
+
+    def search(self, text: str, *, whole_word: bool = False) -> Optional[Tuple[int, str]]:
+        """Return the match that starts first, the longest one on a tie.
+
+        With `whole_word` a match must not be surrounded by word characters.
+        """
+        best: Optional[Tuple[int, str]] = None
+        for start, pattern in self.iter_matches(text):
+            end = start + len(pattern)
+            if best is not None and end - self._max_len > best[0]:
+                # Nothing that ends from here on can start before the best match
+                break
+
+            if whole_word and (
+                (start > 0 and _is_word(text[start - 1]))
+                or (end < len(text) and _is_word(text[end]))
+            ):
+                continue
+
+            if best is None or (start, -len(pattern)) < (best[0], -len(best[1])):
+                best = (start, pattern)
+
+        return best
@@ -0,0 +1,126 @@
+"""Anjani micro-batching helper"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BatchFunc = Callable[[List[T]], Awaitable[Sequence[R]]]
+BatchCallback = Callable[[int, Sequence[float]], None]
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group concurrent calls into batches for a function that handles many items at once.
+
+    An item waits at most `max_wait` seconds, or until `max_size` items are
+    queued, before the whole batch is passed to `func`. Every caller gets the
+    result at the same position as its item, or the exception of the batch.
+
+    `on_batch` is called with the batch size and the time each item waited,
+    before the batch is processed.
+    """
+
+    # Initialized during instantiation
+    func: BatchFunc[T, R]
+    max_size: int
+    max_wait: float
+    on_batch: Optional[BatchCallback]
+    _pending: List[Tuple[T, "asyncio.Future[R]", float]]
+    _timer: Optional[asyncio.TimerHandle]
+    _tasks: Set["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        func: BatchFunc[T, R],
+        *,
+        max_size: int,
+        max_wait: float,
+        on_batch: Optional[BatchCallback] = None,
+    ) -> None:
+        self.func = func
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait)
+        self.on_batch = on_batch
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[R]" = loop.create_future()
+        self._pending.append((item, future, loop.time()))
+
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """Start processing the queued items now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, "asyncio.Future[R]", float]]) -> None:
+        if self.on_batch is not None:
+            now = asyncio.get_running_loop().time()
+            self.on_batch(len(batch), [now - queued for _, __, queued in batch])
+
+        try:
+            results = await self.func([item for item, _, __ in batch])
+        except BaseException as err:  # skipcq: PYL-W0703
+            # Every caller must be woken up, otherwise they wait forever
+            for _, future, __ in batch:
+                if future.done():
+                    continue
+                if isinstance(err, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(err)
+            if not isinstance(err, Exception):
+                raise
+            return
+
+        for (_, future, __), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+        for _, future, __ in batch[len(results) :]:
+            if not future.done():
+                future.set_exception(ValueError("Batch function returned too few results"))
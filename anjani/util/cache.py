@@ -0,0 +1,141 @@
+"""Anjani in-memory caches"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Iterator,
+    MutableMapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+KT = TypeVar("KT", bound=Hashable)
+VT = TypeVar("VT")
+
+_MISSING: Any = object()
+
+
+class LRUCache(Generic[KT, VT]):
+    """Bounded least recently used cache with an optional time to live.
+
+    Lookups that miss can be coalesced with `get_or_load`, so concurrent
+    callers asking for the same key share a single load.
+    """
+
+    # Initialized during instantiation
+    maxsize: int
+    ttl: Optional[float]
+    _data: "OrderedDict[KT, Tuple[VT, float]]"
+    _inflight: MutableMapping[KT, "asyncio.Future[VT]"]
+    _clock: Callable[[], float]
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: KT) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[KT]:
+        return iter(list(self._data))
+
+    def get(self, key: KT, default: Any = None) -> Any:
+        try:
+            value, expires = self._data[key]
+        except KeyError:
+            return default
+
+        if expires and expires <= self._clock():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: KT, value: VT) -> None:
+        expires = self._clock() + self.ttl if self.ttl else 0.0
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: KT, default: Any = None) -> Any:
+        # Don't let a load that is still running store a stale value
+        self._inflight.pop(key, None)
+        value = self._data.pop(key, _MISSING)
+        return default if value is _MISSING else value[0]
+
+    def clear(self) -> None:
+        self._inflight.clear()
+        self._data.clear()
+
+    async def get_or_load(self, key: KT, loader: Callable[[], Awaitable[VT]]) -> VT:
+        """Get the value of the key, calling the loader on a miss.
+
+        Callers waiting on the same key while it's loading get the same result
+        or exception, errors aren't cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Mark as retrieved, nobody may be waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if self._inflight.get(key) is future:
+                self.set(key, value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        return value
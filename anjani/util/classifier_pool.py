@@ -0,0 +1,186 @@
+"""Anjani classifier process pool"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import math
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from aiohttp import ClientSession
+
+from anjani.util.types import Classifier
+
+T = TypeVar("T")
+
+# Worker process state, set by the pool initializer
+_model: Optional[Classifier] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _load_model(model: Classifier) -> None:
+    async with ClientSession() as http:
+        await model.load_model(http)
+
+
+def _init_worker(factory: Callable[[], Classifier]) -> None:
+    global _model, _loop  # skipcq: PYL-W0603
+
+    _loop = asyncio.new_event_loop()
+    model = factory()
+    _loop.run_until_complete(_load_model(model))
+    _model = model
+
+
+def _normalize(text: str) -> str:
+    assert _model is not None
+    return _model.normalize(text)
+
+
+def _predict(texts: List[str]) -> Tuple[bytes, int]:
+    """Predict in the worker, rows are sent back as one flat buffer of doubles.
+
+    Rows the model couldn't score are filled with NaN.
+    """
+    assert _model is not None and _loop is not None
+
+    responses = [_loop.run_until_complete(_model.predict(text)) for text in texts]
+    rows: List[Optional[Sequence[float]]] = [
+        response[0] if response.size else None for response in responses
+    ]
+
+    width = max((len(row) for row in rows if row is not None), default=0)
+    buffer = array("d")
+    for index in range(len(texts)):
+        row = rows[index] if index < len(rows) else None
+        buffer.extend(row if row is not None else [math.nan] * width)
+
+    return buffer.tobytes(), width
+
+
+class ClassifierPool:
+    """Run classifier inference in worker processes, off the event loop's GIL.
+
+    Each worker builds its own model from `factory` and downloads it once on
+    startup, `reload` replaces the workers so they pick up a new model. A
+    crashed pool is restarted up to `max_restarts` times in a row, after
+    that the pool marks itself unavailable and callers should fall back to
+    their in-process model.
+    """
+
+    # Initialized during instantiation
+    factory: Callable[[], Classifier]
+    workers: int
+    max_restarts: int
+    log: logging.Logger
+    _executor: Optional[ProcessPoolExecutor]
+    _restarts: int
+
+    def __init__(
+        self,
+        factory: Callable[[], Classifier],
+        workers: int,
+        *,
+        max_restarts: int = 3,
+        log: Optional[logging.Logger] = None,
+    ) -> None:
+        self.factory = factory
+        self.workers = workers
+        self.max_restarts = max_restarts
+        self.log = log or logging.getLogger("classifier_pool")
+        self._executor = None
+        self._restarts = 0
+
+    @property
+    def available(self) -> bool:
+        return self._executor is not None
+
+    def _create(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Don't fork a process that runs an event loop and open connections
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.factory,),
+        )
+
+    def start(self) -> None:
+        self._executor = self._create()
+        self._restarts = 0
+        self.log.info("Started classifier pool with %d workers", self.workers)
+
+    def reload(self) -> None:
+        """Replace the workers so they load the latest model"""
+        old = self._executor
+        self.start()
+        if old is not None:
+            # Let the queued predictions finish on the old model instead of failing them
+            old.shutdown(wait=False, cancel_futures=False)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        while True:
+            executor = self._executor
+            if executor is None:
+                raise BrokenProcessPool("Classifier pool is not available")
+
+            try:
+                result = await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                # Only the first caller that sees the broken pool replaces it
+                if executor is self._executor:
+                    # The pool already failed its pending work with BrokenProcessPool,
+                    # cancelling would hand the other callers a CancelledError instead
+                    executor.shutdown(wait=False, cancel_futures=False)
+                    self._restarts += 1
+                    if self._restarts > self.max_restarts:
+                        self.log.error("Classifier pool keeps crashing, disabling it")
+                        self._executor = None
+                        raise
+
+                    self.log.warning("Classifier pool crashed, restarting it")
+                    self._executor = self._create()
+                continue
+
+            self._restarts = 0
+            return result
+
+    async def normalize(self, text: str) -> str:
+        return await self._submit(_normalize, text)
+
+    async def predict_batch(self, texts: Sequence[str]) -> List[Optional[Tuple[float, ...]]]:
+        """Predict the texts, returning one probability row per text or None"""
+        data, width = await self._submit(_predict, list(texts))
+        if not width:
+            return [None] * len(texts)
+
+        values = array("d")
+        values.frombytes(data)
+        rows: List[Optional[Tuple[float, ...]]] = []
+        for index in range(len(texts)):
+            row = tuple(values[index * width : (index + 1) * width])
+            rows.append(None if math.isnan(row[0]) else row)
+
+        return rows
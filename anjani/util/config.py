@@ -13,9 +13,24 @@ class Config:
     BOT_TOKEN: str
     OWNER_ID: int
     WORKERS: int
+    DISPATCH_LANES: int
+    STATS_FLUSH_INTERVAL: int
+    RATE_LIMIT_USER: int
+    RATE_LIMIT_CHAT: int
+    RATE_LIMIT_GLOBAL: int
+    RATE_LIMIT_PERIOD: int
+    SPAM_PREDICT_BATCH_SIZE: int
+    SPAM_PREDICT_BATCH_WAIT: int
+    SPAM_PREDICT_WORKERS: int
     DOWNLOAD_PATH: Optional[str]
 
+    SESSION_STORAGE: str
+    SESSION_FLUSH_INTERVAL: int
+    SESSION_PEER_TTL: int
+
     DB_URI: str
+    DB_PROFILE: bool
+    DB_SLOW_QUERY_MS: int
 
     SW_API: Optional[str]
     LOG_CHANNEL: Optional[str]
@@ -37,9 +52,24 @@ class Config:
         self.BOT_TOKEN = getenv("BOT_TOKEN", "")
         self.OWNER_ID = int(getenv("OWNER_ID", 0))
         self.WORKERS = int(getenv("WORKERS", min(32, (cpu_count() or 0) + 4)))
+        self.DISPATCH_LANES = int(getenv("DISPATCH_LANES", 0))
+        self.STATS_FLUSH_INTERVAL = int(getenv("STATS_FLUSH_INTERVAL", 10))
+        self.RATE_LIMIT_USER = int(getenv("RATE_LIMIT_USER", 10))
+        self.RATE_LIMIT_CHAT = int(getenv("RATE_LIMIT_CHAT", 30))
+        self.RATE_LIMIT_GLOBAL = int(getenv("RATE_LIMIT_GLOBAL", 300))
+        self.RATE_LIMIT_PERIOD = int(getenv("RATE_LIMIT_PERIOD", 10))
+        self.SPAM_PREDICT_BATCH_SIZE = int(getenv("SPAM_PREDICT_BATCH_SIZE", 16))
+        self.SPAM_PREDICT_BATCH_WAIT = int(getenv("SPAM_PREDICT_BATCH_WAIT", 10))
+        self.SPAM_PREDICT_WORKERS = int(getenv("SPAM_PREDICT_WORKERS", 0))
         self.DOWNLOAD_PATH = getenv("DOWNLOAD_PATH", "./downloads")
 
+        self.SESSION_STORAGE = getenv("SESSION_STORAGE", "sqlite").lower()
+        self.SESSION_FLUSH_INTERVAL = int(getenv("SESSION_FLUSH_INTERVAL", 1))
+        self.SESSION_PEER_TTL = int(getenv("SESSION_PEER_TTL", 30))
+
         self.DB_URI = getenv("DB_URI", "")
+        self.DB_PROFILE = getenv("DB_PROFILE", "false").lower() == "true"
+        self.DB_SLOW_QUERY_MS = int(getenv("DB_SLOW_QUERY_MS", 100))
 
         self.LOG_CHANNEL = getenv("LOG_CHANNEL")
         self.ALERT_LOG = getenv("ALERT_LOG")
@@ -17,7 +17,18 @@
 import inspect
 from functools import partial
 from types import FunctionType
-from typing import Any, Dict, List, MutableMapping, Optional, Tuple, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pyrogram import types
 from pyrogram.client import Client
@@ -31,6 +42,7 @@ __all__ = [
     "UserConverter",
     "ChatConverter",
     "ChatMemberConverter",
+    "InvocationPlan",
     "parse_arguments",
 ]
 
@@ -149,6 +161,9 @@ CONVERTER_MAP: MutableMapping[Type[Any], Any] = {
     types.Chat: ChatConverter,
     types.ChatMember: ChatMemberConverter,
 }
+_POSITIONAL_ONLY = inspect.Parameter.POSITIONAL_ONLY
+_POSITIONAL_OR_KEYWORD = inspect.Parameter.POSITIONAL_OR_KEYWORD
+_KEYWORD_ONLY = inspect.Parameter.KEYWORD_ONLY
 
 
 def _bool_converter(arg: str) -> Union[bool, BadBoolArgument]:
@@ -164,80 +179,150 @@ def _get_default(param: inspect.Parameter, default: Any = None) -> Union[Any, No
     return param.default if param.default is not param.empty else default
 
 
-async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
-    converter = param.annotation
+class ParameterPlan:
+    """Conversion steps of a single command parameter, resolved once.
 
-    if converter is param.empty:
-        return arg
+    The annotation is looked up when the plan is built so each invocation
+    only has to call the resolved converter.
+    """
 
-    # Check if the annotation was an `Optional` or `Union` type.
-    # This type hinting make a parsing ambiguities.
-    # Hence we just simply use the first arg as the converter if is not None type.
-    # Else use the second arg.
-    if getattr(converter, "__origin__", None) is Union:
-        if converter.__args__[0] is None:
-            converter = converter.__args__[1]
+    __slots__ = ("name", "kind", "default", "convert", "is_async")
+
+    name: str
+    kind: Any
+    default: Any
+    convert: Optional[Callable[[Context, str], Any]]
+    is_async: bool
+
+    def __init__(self, param: inspect.Parameter) -> None:
+        self.name = param.name
+        self.kind = param.kind
+        self.default = _get_default(param)
+        self.is_async = False
+        self.convert = self._resolve(param)
+
+    def _resolve(self, param: inspect.Parameter) -> Optional[Callable[[Context, str], Any]]:
+        converter = param.annotation
+
+        if converter is param.empty:
+            return None
+
+        # Check if the annotation was an `Optional` or `Union` type.
+        # This type hinting make a parsing ambiguities.
+        # Hence we just simply use the first arg as the converter if is not None type.
+        # Else use the second arg.
+        if getattr(converter, "__origin__", None) is Union:
+            if converter.__args__[0] is None:
+                converter = converter.__args__[1]
+            else:
+                converter = converter.__args__[0]
+
+        if isinstance(converter, (FunctionType, partial)):
+            self.is_async = inspect.iscoroutinefunction(converter)
+            func = converter
+            return lambda _, arg: func(arg)
+
+        try:
+            module = converter.__module__
+        except AttributeError:
+            pass
         else:
-            converter = converter.__args__[0]
+            if module is not None and module.startswith("pyrogram."):
+                converter = CONVERTER_MAP.get(converter, converter)
 
-    if isinstance(converter, (FunctionType, partial)):
-        if inspect.iscoroutinefunction(converter):
-            return await converter(arg)
+        if inspect.isclass(converter) and issubclass(converter, Converter):
+            instance = converter()
 
-        return converter(arg)
+            async def convert_custom(ctx: Context, arg: str) -> Any:
+                try:
+                    return await instance(ctx, arg)
+                except ConversionError as err:
+                    return _get_default(param, err)
 
-    try:
-        module = converter.__module__
-    except AttributeError:
-        pass
-    else:
-        if module is not None and module.startswith("pyrogram."):
-            converter = CONVERTER_MAP.get(converter, converter)
+            self.is_async = True
+            return convert_custom
 
-    if inspect.isclass(converter) and issubclass(converter, Converter):
-        try:
-            return await converter()(ctx, arg)
-        except ConversionError as err:
-            return _get_default(param, err)
+        if converter is bool:
 
-    if converter is bool:
-        try:
-            return _bool_converter(arg)
-        except BadBoolArgument as err:
-            return _get_default(param, err)
+            def convert_bool(_: Context, arg: str) -> Any:
+                try:
+                    return _bool_converter(arg)
+                except BadBoolArgument as err:
+                    return _get_default(param, err)
+
+            return convert_bool
+
+        def convert_type(_: Context, arg: str) -> Any:
+            try:
+                return converter(arg)
+            except ValueError as err:
+                return _get_default(param, err)
+
+        return convert_type
 
-    try:
-        return converter(arg)
-    except ValueError as err:
-        return _get_default(param, err)
+
+class InvocationPlan:
+    """Precompiled argument parsing plan of a command function.
+
+    Built once when the command is registered, so dispatching a command
+    doesn't have to inspect its signature and annotations again.
+    """
+
+    __slots__ = ("func", "parameters", "needs_parsing")
+
+    func: CommandFunc
+    parameters: Sequence[ParameterPlan]
+    needs_parsing: bool
+
+    def __init__(self, func: CommandFunc, sig: Optional[inspect.Signature] = None) -> None:
+        if sig is None:
+            sig = inspect.signature(func)
+
+        self.func = func
+        # skip Context argument
+        self.parameters = tuple(ParameterPlan(param) for param in list(sig.parameters.values())[1:])
+        self.needs_parsing = len(self.parameters) > 0
+
+    async def parse(self, ctx: Context) -> Tuple[List[Any], Dict[Any, Any]]:
+        to_convert = ctx.args
+        args = []  # type: List[Any]
+        kwargs = {}  # type: Dict[Any, Any]
+        idx = 0
+
+        for param in self.parameters:
+            if param.kind is _POSITIONAL_ONLY or param.kind is _POSITIONAL_OR_KEYWORD:
+                try:
+                    result = to_convert[idx]
+                    if param.convert is not None:
+                        result = param.convert(ctx, result)
+                        if param.is_async:
+                            result = await result
+                except IndexError:
+                    result = param.default
+                args.append(result)
+                idx += 1
+            elif param.kind is _KEYWORD_ONLY:
+                # Consume remaining text to the kwargs
+                kwargs[param.name] = " ".join(to_convert[idx:]).strip()
+                break
+            else:
+                raise BadArgument(
+                    f"Unsuported {param.kind} parameter conversion "
+                    f"Found '*{param.name}' on '{self.func.__name__}'"
+                )
+        return args, kwargs
+
+
+async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
+    plan = ParameterPlan(param)
+    if plan.convert is None:
+        return arg
+
+    result = plan.convert(ctx, arg)
+    return await result if plan.is_async else result
 
 
 async def parse_arguments(
     sig: inspect.Signature, ctx: Context, func: CommandFunc
 ) -> Tuple[List[Any], Dict[Any, Any]]:
-    to_convert = ctx.args
-    args = []  # type: List[Any]
-    kwargs = {}  # type: Dict[Any, Any]
-    idx = 0
-    items = iter(sig.parameters.items())
-
-    # skip Context argument
-    next(items)  # skipcq: PTC-W0063
-    for name, param in items:
-        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.POSITIONAL_ONLY):
-            try:
-                result = await transform(ctx, param, to_convert[idx])
-            except IndexError:
-                result = _get_default(param)
-            args.append(result)
-            idx += 1
-        elif param.kind == param.KEYWORD_ONLY:
-            # Consume remaining text to the kwargs
-            kwargs[name] = " ".join(to_convert[idx:]).strip()
-            break
-        elif param.kind in {param.VAR_POSITIONAL, param.VAR_KEYWORD}:
-            raise BadArgument(
-                f"Unsuported {param.kind} parameter conversion "
-                f"Found '*{name}' on '{func.__name__}'"
-            )
-    return args, kwargs
+    return await InvocationPlan(func, sig).parse(ctx)
@@ -14,9 +14,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from .change_stream import fields_changed  # skipcq: PY-W2000
 from .client import AsyncClient  # skipcq: PY-W2000
 from .collection import AsyncCollection  # skipcq: PY-W2000
 from .cursor import AsyncCursor  # skipcq: PY-W2000
 from .db import AsyncDatabase  # skipcq: PY-W2000
+from .profiler import QueryProfiler, query_profiler  # skipcq: PY-W2000
+from .settings_cache import AsyncSettingsCache  # skipcq: PY-W2000
+from .write_buffer import AsyncWriteBuffer  # skipcq: PY-W2000
 
-__all__ = ["AsyncClient", "AsyncCollection", "AsyncCursor", "AsyncDatabase"]
+__all__ = [
+    "AsyncClient",
+    "AsyncCollection",
+    "AsyncCursor",
+    "AsyncDatabase",
+    "AsyncSettingsCache",
+    "AsyncWriteBuffer",
+    "fields_changed",
+    "QueryProfiler",
+    "query_profiler",
+]
@@ -14,16 +14,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import TYPE_CHECKING, Any, List, Literal, Mapping, Optional, Union
+from typing import TYPE_CHECKING, Any, Iterable, List, Literal, Mapping, Optional, Union
 
 from bson.timestamp import Timestamp
 from pymongo.change_stream import ChangeStream
 from pymongo.collation import Collation
 
-from anjani import util
-
 from .base import AsyncBase
 from .client_session import AsyncClientSession
+from .executor import run_sync
 
 if TYPE_CHECKING:
     from .client import AsyncClient
@@ -97,13 +96,13 @@ class AsyncChangeStream(AsyncBase):
 
     async def _init(self) -> ChangeStream:
         if not self.dispatch:
-            self.dispatch = await util.run_sync(self._target.dispatch.watch, **self._options)
+            self.dispatch = await run_sync(self._target.dispatch.watch, **self._options)
 
         return self.dispatch
 
     async def close(self):
         if self.dispatch:
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
 
     async def next(self) -> Mapping[str, Any]:
         while self.alive:
@@ -115,7 +114,7 @@ class AsyncChangeStream(AsyncBase):
 
     async def try_next(self) -> Optional[Mapping[str, Any]]:
         self.dispatch = await self._init()
-        return await util.run_sync(self.dispatch.try_next)
+        return await run_sync(self.dispatch.try_next)
 
     @property
     def alive(self) -> bool:
@@ -130,3 +129,42 @@ class AsyncChangeStream(AsyncBase):
             return self.dispatch.resume_token
 
         return None
+
+
+def _top_level(path: str) -> Mapping[str, Any]:
+    return {"$arrayElemAt": [{"$split": [path, "."]}, 0]}
+
+
+def fields_changed(fields: Iterable[str]) -> Mapping[str, Any]:
+    """Match update events that touch any of the top-level `fields`.
+
+    Array updates are reported with dotted paths like "chats.2", which a plain
+    `updateDescription.updatedFields.<field>` filter can't see, so the top-level
+    field of every updated, removed or truncated path is compared instead.
+    Events without an update description never match.
+    """
+    description = "$updateDescription"
+    touched = {
+        "$concatArrays": [
+            {
+                "$map": {
+                    "input": {"$objectToArray": {"$ifNull": [f"{description}.updatedFields", {}]}},
+                    "in": _top_level("$$this.k"),
+                }
+            },
+            {
+                "$map": {
+                    "input": {"$ifNull": [f"{description}.removedFields", []]},
+                    "in": _top_level("$$this"),
+                }
+            },
+            {
+                "$map": {
+                    "input": {"$ifNull": [f"{description}.truncatedArrays", []]},
+                    "in": _top_level("$$this.field"),
+                }
+            },
+        ]
+    }
+    fields = {"$literal": sorted(fields)}
+    return {"$expr": {"$gt": [{"$size": {"$setIntersection": [touched, fields]}}, 0]}}
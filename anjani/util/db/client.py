@@ -41,13 +41,12 @@ from pymongo.topology_description import TopologyDescription
 from pymongo.typings import _Address
 from pymongo.write_concern import DEFAULT_WRITE_CONCERN, WriteConcern
 
-from anjani import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .command_cursor import AsyncCommandCursor, CommandCursor
 from .db import AsyncDatabase
+from .executor import executor, run_sync
 from .typings import ReadPreferences
 
 
@@ -64,6 +63,8 @@ class AsyncClient(AsyncBaseProperty):
             {"driver": DriverInfo("AsyncIOMongoDB", version="staging", platform="AsyncIO")}
         )
         dispatch = MongoClient(*args, **kwargs)
+        # One thread per pooled connection, more would only queue in pymongo
+        executor.resize(dispatch.options.pool_options.max_pool_size)
 
         # Propagate initialization to base
         super().__init__(dispatch)
@@ -75,7 +76,8 @@ class AsyncClient(AsyncBaseProperty):
         return hash(self.address)
 
     async def close(self) -> None:
-        await util.run_sync(self.dispatch.close)
+        await run_sync(self.dispatch.close)
+        executor.shutdown()
 
     async def drop_database(
         self,
@@ -85,7 +87,7 @@ class AsyncClient(AsyncBaseProperty):
         if isinstance(name_or_database, AsyncDatabase):
             name_or_database = name_or_database.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_database,
             name_or_database,
             session=session.dispatch if session else session,
@@ -132,7 +134,7 @@ class AsyncClient(AsyncBaseProperty):
         )
 
     async def list_database_names(self, session: Optional[AsyncClientSession] = None) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.list_database_names, session=session.dispatch if session else session
         )
 
@@ -147,7 +149,7 @@ class AsyncClient(AsyncBaseProperty):
             read_preference=ReadPreference.PRIMARY,
             write_concern=DEFAULT_WRITE_CONCERN,
         )
-        res: Mapping[str, Any] = await util.run_sync(
+        res: Mapping[str, Any] = await run_sync(
             database.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session,
@@ -160,7 +162,7 @@ class AsyncClient(AsyncBaseProperty):
         return AsyncCommandCursor(CommandCursor(database["$cmd"], cursor, None))
 
     async def server_info(self, session: Optional[AsyncClientSession] = None) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.server_info, session=session.dispatch if session else session
         )
 
@@ -174,7 +176,7 @@ class AsyncClient(AsyncBaseProperty):
         default_transaction_options: Optional[TransactionOptions] = None,
         snapshot: bool = False,
     ) -> AsyncGenerator[AsyncClientSession, None]:
-        session = await util.run_sync(
+        session = await run_sync(
             self.dispatch.start_session,
             causal_consistency=causal_consistency,
             default_transaction_options=default_transaction_options,
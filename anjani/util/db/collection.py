@@ -14,15 +14,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
+    Callable,
     Generic,
     List,
     Literal,
     Mapping,
     Optional,
     Tuple,
+    TypeVar,
     Union,
 )
 
@@ -43,18 +46,20 @@ from pymongo.results import (
 from pymongo.typings import _DocumentType
 from pymongo.write_concern import WriteConcern
 
-from anjani import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .command_cursor import AsyncLatentCommandCursor
 from .cursor import AsyncCursor, AsyncRawBatchCursor, Cursor
+from .executor import run_sync
+from .profiler import query_profiler
 from .typings import ReadPreferences, Request
 
 if TYPE_CHECKING:
     from .db import AsyncDatabase
 
+Result = TypeVar("Result")
+
 
 class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     """AsyncIO :obj:`~Collection`
@@ -111,6 +116,25 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     def __hash__(self) -> int:
         return hash((self.database, self.name))
 
+    async def _run(
+        self, query: Any, projection: Any, func: Callable[..., Result], *args: Any, **kwargs: Any
+    ) -> Result:
+        if not query_profiler.enabled:
+            return await run_sync(func, *args, **kwargs)
+
+        start = time.perf_counter()
+        result = await run_sync(func, *args, **kwargs)
+        query_profiler.record(
+            self.name,
+            func.__name__,
+            time.perf_counter() - start,
+            query=query,
+            projection=projection,
+            documents=(result,) if isinstance(result, Mapping) else (),
+        )
+
+        return result
+
     def aggregate(
         self,
         pipeline: List[Mapping[str, Any]],
@@ -150,7 +174,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> BulkWriteResult:
-        return await util.run_sync(
+        return await self._run(
+            None,
+            None,
             self.dispatch.bulk_write,
             request,
             ordered=ordered,
@@ -165,7 +191,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> int:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.count_documents,
             query,
             session=session.dispatch if session else session,
@@ -173,7 +201,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def create_index(self, keys: Union[str, List[Tuple[str, Any]]], **kwargs: Any) -> str:
-        return await util.run_sync(self.dispatch.create_index, keys, **kwargs)
+        return await run_sync(self.dispatch.create_index, keys, **kwargs)
 
     async def create_indexes(
         self,
@@ -182,7 +210,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.create_indexes,
             indexes,
             session=session.dispatch if session else session,
@@ -197,7 +225,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.delete_many,
             query,
             collation=collation,
@@ -213,7 +243,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.delete_one,
             query,
             collation=collation,
@@ -229,7 +261,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.distinct,
             key,
             filter=query,
@@ -238,7 +272,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def drop(self, session: Optional[AsyncClientSession] = None) -> None:
-        await util.run_sync(self.dispatch.drop, session=session.dispatch if session else session)
+        await run_sync(self.dispatch.drop, session=session.dispatch if session else session)
 
     async def drop_index(
         self,
@@ -247,7 +281,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop_index,
             index_or_name,
             session=session.dispatch if session else session,
@@ -255,12 +289,12 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def drop_indexes(self, session: Optional[AsyncClientSession] = None, **kwargs) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop_indexes, session=session.dispatch if session else session, **kwargs
         )
 
     async def estimated_document_count(self, **kwargs: Any) -> int:
-        return await util.run_sync(self.dispatch.estimated_document_count, **kwargs)
+        return await self._run(None, None, self.dispatch.estimated_document_count, **kwargs)
 
     def find(self, *args: Any, **kwargs: Any) -> AsyncCursor:
         return AsyncCursor(Cursor(self, *args, **kwargs), self)
@@ -268,7 +302,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def find_one(
         self, query: Optional[Mapping[str, Any]], *args: Any, **kwargs: Any
     ) -> Optional[Mapping[str, Any]]:
-        return await util.run_sync(self.dispatch.find_one, query, *args, **kwargs)
+        projection = args[0] if args else kwargs.get("projection")
+        return await self._run(query, projection, self.dispatch.find_one, query, *args, **kwargs)
 
     async def find_one_and_delete(
         self,
@@ -280,7 +315,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            projection,
             self.dispatch.find_one_and_delete,
             query,
             projection=projection,
@@ -303,7 +340,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            projection,
             self.dispatch.find_one_and_replace,
             query,
             replacement,
@@ -330,7 +369,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            projection,
             self.dispatch.find_one_and_update,
             query,
             update,
@@ -356,7 +397,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def index_information(
         self, session: Optional[AsyncClientSession] = None
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.index_information, session=session.dispatch if session else session
         )
 
@@ -368,7 +409,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertManyResult:
-        return await util.run_sync(
+        return await self._run(
+            None,
+            None,
             self.dispatch.insert_many,
             documents,
             ordered=ordered,
@@ -383,7 +426,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertOneResult:
-        return await util.run_sync(
+        return await self._run(
+            None,
+            None,
             self.dispatch.insert_one,
             document,
             bypass_document_validation=bypass_document_validation,
@@ -402,14 +447,14 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def options(self, session: Optional[AsyncClientSession] = None) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.options, session=session.dispatch if session else session
         )
 
     async def rename(
         self, new_name: str, *, session: Optional[AsyncClientSession] = None, **kwargs: Any
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.rename,
             new_name,
             session=session.dispatch if session else session,
@@ -427,7 +472,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.replace_one,
             query,
             replacement,
@@ -450,7 +497,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.update_many,
             query,
             update,
@@ -474,7 +523,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await self._run(
+            query,
+            None,
             self.dispatch.update_one,
             query,
             update,
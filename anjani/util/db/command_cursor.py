@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import time
 from collections import deque
 from functools import partial
 from typing import (
@@ -35,10 +36,10 @@ from pymongo.client_session import ClientSession
 from pymongo.command_cursor import CommandCursor as _CommandCursor
 from pymongo.typings import _Address, _DocumentType
 
-from anjani import util
-
 from .client_session import AsyncClientSession
 from .cursor_base import AsyncCursorBase
+from .executor import run_sync
+from .profiler import query_profiler
 
 if TYPE_CHECKING:
     from .collection import AsyncCollection
@@ -75,7 +76,7 @@ class CommandCursor(_CommandCursor, Generic[_DocumentType]):
         )
 
     async def _AsyncCommandCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await run_sync(self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCommandCursor__data(self) -> Deque[Any]:
@@ -108,6 +109,9 @@ class AsyncCommandCursor(AsyncCursorBase):
     def _data(self) -> Deque[Any]:
         return self.dispatch._CommandCursor__data  # skipcq: PYL-W0212
 
+    def _empty(self) -> bool:
+        return False
+
     def _killed(self) -> bool:
         return self.dispatch._CommandCursor__killed  # skipcq: PYL-W0212
 
@@ -175,6 +179,8 @@ class AsyncLatentCommandCursor(AsyncCommandCursor):
         self.start = start
         self.args = args
         self.kwargs = kwargs
+        self.operation = getattr(start, "__name__", "aggregate")
+        self.pipeline = args[0] if args else None
 
         super().__init__(_LatentCursor(collection), collection)
 
@@ -183,11 +189,30 @@ class AsyncLatentCommandCursor(AsyncCommandCursor):
 
         return self
 
+    def _profile_query(self) -> Tuple[str, Any, Any]:
+        return self.operation, self.pipeline, None
+
+    async def _start(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> CommandCursor:
+        if not query_profiler.enabled:
+            return await run_sync(func, *args, **kwargs)
+
+        start = time.perf_counter()
+        cursor = await run_sync(func, *args, **kwargs)
+        query_profiler.record(
+            self.collection.name if self.collection is not None else "",
+            self.operation,
+            time.perf_counter() - start,
+            query=self.pipeline,
+            documents=cursor._CommandCursor__data,  # skipcq: PYL-W0212
+        )
+
+        return cursor
+
     def _get_more(self) -> Union[asyncio.Future[int], Coroutine[Any, Any, int]]:
         if not self.started:
             self.started = True
             original_future = self.loop.create_future()
-            future = self.loop.create_task(util.run_sync(self.start, *self.args, **self.kwargs))
+            future = self.loop.create_task(self._start(self.start, *self.args, **self.kwargs))
             future.add_done_callback(
                 partial(self.loop.call_soon_threadsafe, self._on_started, original_future)
             )
@@ -31,9 +31,8 @@ from bson.code import Code
 from pymongo.cursor import Cursor as _Cursor
 from pymongo.typings import _CollationIn, _DocumentType
 
-from anjani import util
-
 from .cursor_base import AsyncCursorBase
+from .executor import run_sync
 
 if TYPE_CHECKING:
     from .collection import AsyncCollection
@@ -42,6 +41,7 @@ if TYPE_CHECKING:
 class Cursor(_Cursor, Generic[_DocumentType]):
 
     _Cursor__data: Deque[Any]
+    _Cursor__empty: bool
     _Cursor__killed: bool
     _Cursor__query_flags: int
 
@@ -75,7 +75,7 @@ class Cursor(_Cursor, Generic[_DocumentType]):
         return self.__data
 
     async def _AsyncCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await run_sync(self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCursor__exhaust(self) -> bool:
@@ -143,10 +143,10 @@ class AsyncCursor(AsyncCursorBase, Generic[_DocumentType]):
         return self
 
     async def distinct(self, key: str) -> List[Any]:
-        return await util.run_sync(self.dispatch.distinct, key)
+        return await run_sync(self.dispatch.distinct, key)
 
     async def explain(self) -> _DocumentType:
-        return await util.run_sync(self.dispatch.explain)
+        return await run_sync(self.dispatch.explain)
 
     def hint(self, index: Union[str, List[Tuple[str, Any]]]) -> "AsyncCursor[_DocumentType]":
         self.dispatch = self.dispatch.hint(index)
@@ -198,10 +198,19 @@ class AsyncCursor(AsyncCursorBase, Generic[_DocumentType]):
         # skipcq: PYL-W0212
         return self.dispatch._Cursor__query_flags  # type: ignore
 
+    def _profile_query(self) -> Tuple[str, Any, Any]:
+        spec = self.dispatch._Cursor__spec  # type: ignore  # skipcq: PYL-W0212
+        projection = self.dispatch._Cursor__projection  # type: ignore  # skipcq: PYL-W0212
+        return "find", spec, projection
+
     def _data(self) -> Deque[Any]:
         # skipcq: PYL-W0212
         return self.dispatch._Cursor__data  # type: ignore
 
+    def _empty(self) -> bool:
+        # skipcq: PYL-W0212
+        return self.dispatch._Cursor__empty  # type: ignore
+
     def _killed(self) -> bool:
         # skipcq: PYL-W0212
         return self.dispatch._Cursor__killed  # type: ignore
@@ -16,10 +16,13 @@
 
 import asyncio
 import inspect
+import time
 from functools import partial
+from itertools import islice
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncIterator,
     Coroutine,
     Deque,
     Generic,
@@ -35,10 +38,10 @@ from pymongo.collection import Collection
 from pymongo.cursor import _QUERY_OPTIONS, Cursor, RawBatchCursor
 from pymongo.typings import _Address, _DocumentType
 
-from anjani import util
-
 from .base import AsyncBase
 from .errors import InvalidOperation
+from .executor import run_sync
+from .profiler import query_profiler
 
 if TYPE_CHECKING:
     from .collection import AsyncCollection
@@ -106,6 +109,9 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     def _data(self) -> Deque[Any]:
         raise NotImplementedError
 
+    def _empty(self) -> bool:
+        raise NotImplementedError
+
     def _killed(self) -> bool:
         raise NotImplementedError
 
@@ -155,8 +161,27 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
             if not future.done():
                 future.set_exception(exc)
 
+    def _profile_query(self) -> Tuple[str, Any, Any]:
+        return "getMore", None, None
+
     async def _refresh(self) -> int:
-        return await util.run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+        if not query_profiler.enabled:
+            return await run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+
+        buffered = self._buffer_size()
+        start = time.perf_counter()
+        result = await run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+        operation, query, projection = self._profile_query()
+        query_profiler.record(
+            self.collection.name if self.collection is not None else "",
+            operation,
+            time.perf_counter() - start,
+            query=query,
+            projection=projection,
+            documents=islice(self._data(), buffered, None),
+        )
+
+        return result
 
     def batch_size(self, batch_size: int) -> "AsyncCursorBase":
         self.dispatch.batch_size(batch_size)
@@ -165,11 +190,32 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     async def close(self) -> None:
         if not self.closed:
             self.closed = True
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
+
+    async def _fill(self) -> bool:
+        # Documents already fetched are served straight from the driver's
+        # deque, only an empty buffer needs a round trip on the executor.
+        if self._empty():
+            return False
+        if self._buffer_size():
+            return True
+        return self.alive and bool(await self._get_more())
+
+    async def batches(self) -> AsyncIterator[List[Any]]:
+        """Iterate the cursor one server batch at a time.
+
+        Each batch holds every document the driver has fetched so far,
+        the next batch is only requested once the previous one is consumed.
+        """
+        while await self._fill():
+            data = self._data()
+            batch = list(data)
+            data.clear()
+            yield batch
 
     async def next(self) -> Any:
-        if self.alive and (self._buffer_size() or await self._get_more()):
-            return await util.run_sync(next, self.dispatch)
+        if await self._fill():
+            return self._data().popleft()
         raise StopAsyncIteration
 
     def to_list(self, length: Optional[int] = None) -> asyncio.Future[List[Mapping[str, Any]]]:
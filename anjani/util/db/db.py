@@ -14,7 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import TYPE_CHECKING, Any, List, Literal, Mapping, Optional, Union
+from typing import TYPE_CHECKING, Any, Iterable, List, Literal, Mapping, Optional, Union
 
 from bson.codec_options import CodecOptions
 from bson.dbref import DBRef
@@ -25,13 +25,13 @@ from pymongo.database import Database
 from pymongo.read_concern import ReadConcern
 from pymongo.write_concern import WriteConcern
 
-from anjani import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .collection import AsyncCollection
 from .command_cursor import AsyncCommandCursor, AsyncLatentCommandCursor, CommandCursor
+from .executor import run_sync
+from .settings_cache import AsyncSettingsCache, AsyncSettingsWatcher
 from .typings import ReadPreferences
 
 if TYPE_CHECKING:
@@ -45,11 +45,13 @@ class AsyncDatabase(AsyncBaseProperty):
     """
 
     _client: "AsyncClient"
+    _settings: AsyncSettingsWatcher
 
     dispatch: Database
 
     def __init__(self, client: "AsyncClient", database: Database) -> None:
         self._client = client
+        self._settings = AsyncSettingsWatcher(self)
 
         # Propagate initialization to base
         super().__init__(database)
@@ -91,7 +93,7 @@ class AsyncDatabase(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.command,
             command,
             value=value,
@@ -104,6 +106,7 @@ class AsyncDatabase(AsyncBaseProperty):
         )
 
     async def close(self) -> None:
+        await self._settings.close()
         await self._client.close()
 
     async def create_collection(
@@ -121,7 +124,7 @@ class AsyncDatabase(AsyncBaseProperty):
         return AsyncCollection(
             self,
             name,
-            collection=await util.run_sync(
+            collection=await run_sync(
                 self.dispatch.create_collection,
                 name,
                 codec_options=codec_options,
@@ -138,7 +141,7 @@ class AsyncDatabase(AsyncBaseProperty):
     async def dereference(
         self, dbref: DBRef, *, session: Optional[AsyncClientSession] = None, **kwargs: Any
     ) -> Optional[Mapping[str, Any]]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.dereference,
             dbref,
             session=session.dispatch if session else session,
@@ -153,7 +156,7 @@ class AsyncDatabase(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_collection,
             name_or_collection,
             session=session.dispatch if session else session,
@@ -177,6 +180,16 @@ class AsyncDatabase(AsyncBaseProperty):
             read_concern=read_concern,
         )
 
+    def get_settings_cache(
+        self, name: str, key: str = "chat_id", *, fields: Iterable[str] = ()
+    ) -> AsyncSettingsCache:
+        """Get the shared read-through cache of a settings collection.
+
+        Every caller of the same collection gets the same cache, projected to
+        the union of the fields they asked for.
+        """
+        return self._settings.get_cache(name, key, fields=fields)
+
     async def list_collection_names(
         self,
         *,
@@ -184,7 +197,7 @@ class AsyncDatabase(AsyncBaseProperty):
         query: Optional[Mapping[str, Any]] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.list_collection_names,
             session=session.dispatch if session else session,
             filter=query,
@@ -201,7 +214,7 @@ class AsyncDatabase(AsyncBaseProperty):
         cmd = SON([("listCollections", 1)])
         cmd.update(query, **kwargs)
 
-        res: Mapping[str, Any] = await util.run_sync(
+        res: Mapping[str, Any] = await run_sync(
             self.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session,
@@ -220,7 +233,7 @@ class AsyncDatabase(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.validate_collection,
             name_or_collection,
             scandata=scandata,
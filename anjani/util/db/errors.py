@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from pymongo.errors import (  # skipcq: PY-W2000
+    BulkWriteError,
     InvalidOperation,
     OperationFailure,
     PyMongoError,
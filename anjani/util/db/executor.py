@@ -0,0 +1,103 @@
+"""Anjani dedicated thread pool for MongoDB calls"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .metrics import ExecutorInFlight, ExecutorQueueDepth, ExecutorWaitSecond
+
+Result = TypeVar("Result")
+
+# pymongo's default maxPoolSize
+DEFAULT_MAX_WORKERS = 100
+
+
+class DatabaseExecutor:
+    """Thread pool running the blocking pymongo calls.
+
+    Kept apart from the loop's default executor, so a slow database doesn't
+    starve language lookups and the other :func:`anjani.util.run_sync` users.
+    """
+
+    max_workers: int
+
+    _pool: Optional[ThreadPoolExecutor]
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._pool = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="AnjaniDB")
+
+        return self._pool
+
+    def resize(self, max_workers: Optional[int]) -> None:
+        """Size the pool, a running pool finishes its queued calls in the background"""
+        max_workers = max_workers or DEFAULT_MAX_WORKERS
+        if max_workers == self.max_workers:
+            return
+
+        self.max_workers = max_workers
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    @staticmethod
+    def _call(submitted: float, func: Callable[[], Result]) -> Result:
+        ExecutorQueueDepth.dec()
+        ExecutorWaitSecond.observe(time.perf_counter() - submitted)
+        ExecutorInFlight.inc()
+        try:
+            return func()
+        finally:
+            ExecutorInFlight.dec()
+
+    @staticmethod
+    def _on_done(future: "Future[Any]") -> None:
+        # Cancelled before a thread picked it up
+        if future.cancelled():
+            ExecutorQueueDepth.dec()
+
+    async def run(self, func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+        ExecutorQueueDepth.inc()
+        try:
+            future = self.pool.submit(
+                self._call, time.perf_counter(), functools.partial(func, *args, **kwargs)
+            )
+        except BaseException:
+            ExecutorQueueDepth.dec()
+            raise
+
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+
+executor = DatabaseExecutor()
+
+
+async def run_sync(func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+    """Runs the given sync function (optionally with arguments) on the database thread pool."""
+    return await executor.run(func, *args, **kwargs)
@@ -0,0 +1,51 @@
+"""Anjani database executor metrics"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from prometheus_client import Counter, Gauge, Histogram
+
+ExecutorQueueDepth = Gauge(
+    "anjani_db_executor_queue_depth",
+    "Number of database calls waiting for a thread",
+)
+ExecutorInFlight = Gauge(
+    "anjani_db_executor_in_flight",
+    "Number of database calls currently running",
+)
+ExecutorWaitSecond = Histogram(
+    "anjani_db_executor_wait",
+    "Time a database call waited for a thread",
+    unit="second",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+QueryLatencySecond = Histogram(
+    "anjani_db_query_latency",
+    "Time taken by a database operation",
+    labelnames=["collection", "operation"],
+    unit="second",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+QueryDocumentCount = Counter(
+    "anjani_db_query_documents",
+    "Number of documents returned by database operations",
+    labelnames=["collection", "operation"],
+)
+QueryByteCount = Counter(
+    "anjani_db_query_bytes",
+    "Size of documents returned by database operations",
+    labelnames=["collection", "operation"],
+)
@@ -0,0 +1,137 @@
+"""Anjani opt-in database query profiler"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import bson
+
+from .metrics import QueryByteCount, QueryDocumentCount, QueryLatencySecond
+
+
+class QueryStat(NamedTuple):
+    collection: str
+    operation: str
+    shape: str
+    projection: str
+    count: int
+    total: float
+    slowest: float
+
+
+def redact(value: Any) -> Any:
+    """Replace every value of a filter or pipeline, keeping only its keys and operators"""
+    if isinstance(value, Mapping):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, Mapping) for item in value):
+            return [redact(item) for item in value]
+        return ["?"]
+
+    return "?"
+
+
+def _size(document: Any) -> int:
+    if isinstance(document, (bytes, bytearray)):  # Raw batches
+        return len(document)
+    if hasattr(document, "raw"):  # RawBSONDocument
+        return len(document.raw)
+
+    try:
+        return len(bson.encode(document))
+    except Exception:  # skipcq: PYL-W0703
+        return 0
+
+
+class QueryProfiler:
+    """Records per-collection latency, returned documents and slow query shapes.
+
+    Disabled by default, measuring the returned bytes means encoding the
+    documents again.
+    """
+
+    enabled: bool
+    log: logging.Logger
+    slow_threshold: float
+
+    _stats: Dict[Tuple[str, str, str, str], List[Any]]
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.log = logging.getLogger("query_profiler")
+        self.slow_threshold = 0.1
+        self._stats = {}
+
+    def configure(self, *, enabled: bool, slow_threshold: float) -> None:
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+
+    def record(
+        self,
+        collection: str,
+        operation: str,
+        elapsed: float,
+        *,
+        query: Any = None,
+        projection: Any = None,
+        documents: Iterable[Any] = (),
+    ) -> None:
+        QueryLatencySecond.labels(collection, operation).observe(elapsed)
+
+        count = size = 0
+        for document in documents:
+            count += 1
+            size += _size(document)
+        if count:
+            QueryDocumentCount.labels(collection, operation).inc(count)
+            QueryByteCount.labels(collection, operation).inc(size)
+
+        shape = repr(redact(query)) if query is not None else ""
+        projected = repr(projection) if projection is not None else ""
+        key = (collection, operation, shape, projected)
+        stat = self._stats.get(key)
+        if stat is None:
+            self._stats[key] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = max(stat[2], elapsed)
+
+        if elapsed >= self.slow_threshold:
+            self.log.warning(
+                "Slow query on %s.%s took %.3fs: filter=%s projection=%s",
+                collection,
+                operation,
+                elapsed,
+                shape or "{}",
+                projected or "None",
+            )
+
+    def slowest(self, limit: Optional[int] = None) -> List[QueryStat]:
+        """Query shapes seen since startup, slowest first"""
+        stats = sorted(
+            (QueryStat(*key, *value) for key, value in self._stats.items()),
+            key=lambda stat: stat.slowest,
+            reverse=True,
+        )
+        return stats[:limit] if limit is not None else stats
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,236 @@
+"""Anjani read-through cache for per-chat settings"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+)
+
+from ..cache import LRUCache
+from .change_stream import fields_changed
+from .errors import PyMongoError
+
+if TYPE_CHECKING:
+    from .collection import AsyncCollection
+    from .db import AsyncDatabase
+
+UPDATE_CHANGES = frozenset({"insert", "update", "replace"})
+
+
+class AsyncSettingsCache:
+    """Bounded read-through cache of the setting documents of a collection.
+
+    Documents are looked up by the value of the `key` field and projected to
+    the declared top-level `fields`, a missing document is cached as `None`.
+    Local writes must call `invalidate` once they're done, writes made by other
+    instances are picked up by the `AsyncSettingsWatcher` of the database.
+    """
+
+    # Initialized during instantiation
+    collection: "AsyncCollection"
+    key: str
+    fields: Set[str]
+    _cache: LRUCache[Hashable, Optional[Mapping[str, Any]]]
+    _watcher: Optional["AsyncSettingsWatcher"]
+
+    def __init__(
+        self,
+        collection: "AsyncCollection",
+        key: str = "chat_id",
+        *,
+        fields: Iterable[str] = (),
+        maxsize: int = 10000,
+        watcher: Optional["AsyncSettingsWatcher"] = None,
+    ) -> None:
+        self.collection = collection
+        self.key = key
+        self.fields = set(fields)
+        self._cache = LRUCache(maxsize)
+        self._watcher = watcher
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def add_fields(self, fields: Iterable[str]) -> bool:
+        """Also cache the given fields, returns whether any of them is new"""
+        new = set(fields) - self.fields
+        if not new:
+            return False
+
+        self.fields |= new
+        # Cached documents were projected without the new fields
+        self._cache.clear()
+        return True
+
+    async def get(self, key: Hashable) -> Optional[Mapping[str, Any]]:
+        """Get the projected document whose key field equals `key`"""
+        if self._watcher is not None:
+            self._watcher.start()
+
+        return await self._cache.get_or_load(key, partial(self._load, key))
+
+    async def _load(self, key: Hashable) -> Optional[Mapping[str, Any]]:
+        # Keep the _id so that an existing document is never empty and falsy
+        projection = {field: True for field in self.fields} or None
+        return await self.collection.find_one({self.key: key}, projection)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop the cached documents of the given keys"""
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _match(self) -> Mapping[str, Any]:
+        # Updates that don't touch a cached field can't change what we serve
+        return {
+            "ns.coll": self.collection.name,
+            "$or": [
+                {"operationType": {"$ne": "update"}},
+                fields_changed(self.fields | {self.key}),
+            ],
+        }
+
+    def _apply(self, change: Mapping[str, Any]) -> None:
+        if change["operationType"] in UPDATE_CHANGES:
+            if self.key == "_id":
+                document = change.get("documentKey")
+            else:
+                document = change.get("fullDocument")
+            if document and self.key in document:
+                self._cache.pop(document[self.key])
+                return
+
+        # Deletes only carry the _id, don't bother mapping it back to a key
+        self._cache.clear()
+
+
+class AsyncSettingsWatcher:
+    """Keep every settings cache of a database in sync with one change stream.
+
+    The stream only wakes up for changes to the cached fields. All caches are
+    dropped whenever the stream (re)opens, changes may have been missed while
+    it was down.
+    """
+
+    RESTART_DELAY = 5.0
+
+    # Initialized during instantiation
+    database: "AsyncDatabase"
+    log: logging.Logger
+    _caches: MutableMapping[str, AsyncSettingsCache]
+    _task: Optional[asyncio.Task[None]]
+    _restart: Optional[asyncio.TimerHandle]
+
+    def __init__(self, database: "AsyncDatabase", *, log: Optional[logging.Logger] = None) -> None:
+        self.database = database
+        self.log = log or logging.getLogger("settings_cache")
+        self._caches = {}
+        self._task = None
+        self._restart = None
+
+    def get_cache(
+        self, name: str, key: str = "chat_id", *, fields: Iterable[str] = ()
+    ) -> AsyncSettingsCache:
+        """Get the cache of a collection, caching `fields` on top of what is cached already"""
+        cache = self._caches.get(name)
+        if cache is None:
+            cache = self._caches[name] = AsyncSettingsCache(
+                self.database.get_collection(name), key, fields=fields, watcher=self
+            )
+        elif cache.key != key:
+            raise ValueError(f"Settings of '{name}' are already cached by '{cache.key}'")
+        elif not cache.add_fields(fields):
+            return cache
+
+        # The stream has to match the new collection or fields
+        if self._task is not None:
+            self._task.cancel()
+            self._start()
+
+        return cache
+
+    def start(self) -> None:
+        if self._task is None and self._restart is None:
+            self._start()
+
+    def _start(self) -> None:
+        self._restart = None
+        self._task = asyncio.get_running_loop().create_task(self._stream())
+        self._task.add_done_callback(self._stream_callback)
+
+    def _stream_callback(self, future: "asyncio.Future[None]") -> None:
+        if future is not self._task:
+            return
+
+        self._task = None
+        try:
+            future.result()
+        except asyncio.CancelledError:
+            return
+        except PyMongoError as e:
+            self.log.error("Settings stream error:", exc_info=e)
+            self._restart = future.get_loop().call_later(self.RESTART_DELAY, self._start)
+            return
+
+        # The stream was invalidated
+        self._start()
+
+    def _pipeline(self) -> List[Mapping[str, Any]]:
+        project: Dict[str, Any] = {"operationType": 1, "ns": 1, "documentKey": 1}
+        for cache in self._caches.values():
+            project[f"fullDocument.{cache.key}"] = 1
+
+        return [
+            {"$match": {"$or": [cache._match() for cache in self._caches.values()]}},
+            {"$project": project},
+        ]
+
+    async def _stream(self) -> None:
+        async with self.database.watch(self._pipeline(), full_document="updateLookup") as stream:
+            for cache in self._caches.values():
+                cache.clear()
+
+            async for change in stream:
+                cache = self._caches.get(change.get("ns", {}).get("coll"))
+                if cache is not None:
+                    cache._apply(change)
+
+    async def close(self) -> None:
+        if self._restart is not None:
+            self._restart.cancel()
+            self._restart = None
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        for cache in self._caches.values():
+            cache.clear()
@@ -0,0 +1,228 @@
+"""Anjani write-behind buffer for MongoDB upserts"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pymongo.operations import UpdateOne
+
+from .errors import BulkWriteError
+
+if TYPE_CHECKING:
+    from .collection import AsyncCollection
+
+SUPPORTED_OPERATORS = frozenset({"$set", "$setOnInsert", "$addToSet"})
+
+
+class _Pending:
+    __slots__ = ("set", "set_on_insert", "add_to_set", "upsert")
+
+    def __init__(self) -> None:
+        self.set: Dict[str, Any] = {}
+        self.set_on_insert: Dict[str, Any] = {}
+        self.add_to_set: Dict[str, List[Any]] = {}
+        self.upsert = False
+
+    def merge(self, update: Mapping[str, Mapping[str, Any]], upsert: bool) -> None:
+        for operator, fields in update.items():
+            if operator == "$set":
+                self.set.update(fields)
+            elif operator == "$setOnInsert":
+                for field, value in fields.items():
+                    self.set_on_insert.setdefault(field, value)
+            elif operator == "$addToSet":
+                for field, value in fields.items():
+                    values = self.add_to_set.setdefault(field, [])
+                    if isinstance(value, Mapping) and "$each" in value:
+                        new = value["$each"]
+                    else:
+                        new = (value,)
+                    values.extend(i for i in new if i not in values)
+            else:
+                raise ValueError(f"Unsupported write-behind operator '{operator}'")
+
+        self.upsert = self.upsert or upsert
+
+    def build(self) -> MutableMapping[str, Any]:
+        update: MutableMapping[str, Any] = {}
+        if self.set:
+            update["$set"] = self.set
+        if self.add_to_set:
+            update["$addToSet"] = {
+                field: {"$each": values} for field, values in self.add_to_set.items()
+            }
+        # A field can only be touched by one operator, the others set it on insert anyway
+        set_on_insert = {
+            field: value
+            for field, value in self.set_on_insert.items()
+            if field not in self.set and field not in self.add_to_set
+        }
+        if set_on_insert:
+            update["$setOnInsert"] = set_on_insert
+        return update
+
+
+class AsyncWriteBuffer:
+    """Merge updates per document in memory and write them as one bulk write.
+
+    Updates are keyed by the value of the `key` field, or by a tuple of values
+    when `key` is a tuple of fields. For the same document
+    `$set` keeps the last value of each field, `$setOnInsert` the first one
+    and `$addToSet` values are unioned, which makes a merged update safe to
+    replay. Pending
+    updates are flushed as a single unordered `bulk_write` every `interval`
+    seconds, or as soon as `max_size` documents are waiting.
+    """
+
+    # Initialized during instantiation
+    collection: "AsyncCollection"
+    key: Union[str, Tuple[str, ...]]
+    max_size: int
+    interval: float
+    log: logging.Logger
+    _pending: Dict[Hashable, _Pending]
+    _task: Optional[asyncio.Task[None]]
+    _flushes: Set[asyncio.Task[None]]
+
+    def __init__(
+        self,
+        collection: "AsyncCollection",
+        key: Union[str, Tuple[str, ...]] = "_id",
+        *,
+        max_size: int = 1000,
+        interval: float = 5.0,
+        log: Optional[logging.Logger] = None,
+    ) -> None:
+        self.collection = collection
+        self.key = key
+        self.max_size = max(1, max_size)
+        self.interval = interval
+        self.log = log or logging.getLogger("write_buffer")
+        self._pending = {}
+        self._task = None
+        self._flushes = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def update(
+        self, key: Hashable, update: Mapping[str, Mapping[str, Any]], *, upsert: bool = False
+    ) -> None:
+        """Queue an update for the document whose key field equals `key`"""
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending()
+        pending.merge(update, upsert)
+
+        if len(self._pending) >= self.max_size:
+            task = asyncio.get_running_loop().create_task(self._flush_logged())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop the pending update of a document"""
+        self._pending.pop(key, None)
+
+    def _filter(self, key: Hashable) -> Mapping[str, Any]:
+        if isinstance(self.key, str):
+            return {self.key: key}
+
+        return dict(zip(self.key, key))  # type: ignore
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        keys: List[Hashable] = []
+        requests = []
+        for key, data in pending.items():
+            update = data.build()
+            if update:
+                keys.append(key)
+                requests.append(UpdateOne(self._filter(key), update, upsert=data.upsert))
+
+        try:
+            if requests:
+                await self.collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as err:
+            # An unordered bulk write ran every other operation, a failed one would only
+            # fail again so it's dropped. The rest is only retried on write concern errors.
+            failed: Set[Hashable] = set()
+            for error in err.details.get("writeErrors", []):
+                key = keys[error["index"]]
+                failed.add(key)
+                self.log.error(
+                    f"Dropped update of {key} in {self.collection.name}: {error.get('errmsg')}"
+                )
+            if err.details.get("writeConcernErrors"):
+                self._requeue({key: data for key, data in pending.items() if key not in failed})
+            raise
+        except Exception:
+            self._requeue(pending)
+            raise
+
+    def _requeue(self, pending: Dict[Hashable, _Pending]) -> None:
+        # Put the updates back below the newer ones, merged updates are idempotent
+        for key, data in self._pending.items():
+            old = pending.get(key)
+            if old is None:
+                pending[key] = data
+            else:
+                old.merge(data.build(), data.upsert)
+        self._pending = pending
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception as err:  # skipcq: PYL-W0703
+            self.log.error(
+                f"Failed to flush {len(self)} pending updates of {self.collection.name}",
+                exc_info=err,
+            )
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._flush_logged()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the flush interval and write everything that is left"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
@@ -15,16 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-import codecs
 import html
 import re
 from enum import IntEnum, unique
-from functools import wraps
 from typing import (
     TYPE_CHECKING,
     Any,
     AsyncGenerator,
-    Callable,
     List,
     Optional,
     Set,
@@ -52,10 +49,6 @@ from pyrogram.types import (
     Message,
     User,
 )
-from typing_extensions import ParamSpecArgs, ParamSpecKwargs
-
-from anjani.util import types as _types
-from anjani.util.async_helper import run_sync
 
 if TYPE_CHECKING:
     from anjani.core import Anjani
@@ -230,8 +223,12 @@ Member = ChatMember
 
 
 async def fetch_permissions(
-    client: Client, chat: int, user: int
+    client: Union[Client, "Anjani"], chat: int, user: int
 ) -> Tuple[Optional[Bot], Optional[Member]]:
+    """Fetch the bot and user member of a chat.
+
+    Pass the `~Anjani` instance instead of the client to use its chat member cache.
+    """
     try:
         bot, member = await asyncio.gather(
             client.get_chat_member(chat, "me"), client.get_chat_member(chat, user)
@@ -286,57 +283,7 @@ async def reply_and_delete(message: Message, text: str, del_in: int = 1) -> None
 
 
 # { GetText Language
-def __loop_safe(
-    func: Callable[
-        [
-            _types.Bot,
-            _types.ChatId,
-            _types.TextName,
-            ParamSpecArgs,
-            _types.NoFormat,
-            ParamSpecKwargs,
-        ],
-        str,
-    ]
-):  # Special: let default typing choose the return type
-    """Decorator for get_text functions"""
-
-    @wraps(func)
-    async def wrapper(
-        bot: "Anjani",
-        chat_id: Optional[int],
-        text_name: str,
-        *args: Any,
-        noformat: bool = False,
-        **kwargs: Any,
-    ) -> str:
-        """Parse the string with user language setting.
-
-        Parameters:
-            bot (`Anjani`):
-                The bot instance.
-            chat_id (`int`, *Optional*):
-                Id of the sender(PM's) or chat_id to fetch the user language setting.
-                If chat_id is None, the language will always use 'en'.
-            text_name (`str`):
-                String name to parse. The string is parsed from YAML documents.
-            *args (`any`, *Optional*):
-                One or more values that should be formatted and inserted in the string.
-                The value should be in order based on the language string placeholder.
-            noformat (`bool`, *Optional*):
-                If True, the text returned will not be formated.
-                Default to False.
-            **kwargs (`any`, *Optional*):
-                One or more keyword values that should be formatted and inserted in the string.
-                based on the keyword on the language strings.
-        """
-        return await run_sync(func, bot, chat_id, text_name, *args, noformat=noformat, **kwargs)
-
-    return wrapper
-
-
-@__loop_safe
-def get_text(
+def get_text_sync(
     bot: "Anjani",
     chat_id: Optional[int],
     text_name: str,
@@ -344,29 +291,55 @@ def get_text(
     noformat: bool = False,
     **kwargs: Any,
 ) -> str:
-    def _get_text(lang: str) -> str:
-        try:
-            text = codecs.decode(
-                codecs.encode(bot.languages[lang][text_name], "latin-1", "backslashreplace"),
-                "unicode-escape",
-            )
-        except KeyError:
-            if lang == "en":
-                return (
-                    f"**NO LANGUAGE STRING FOR '{text_name}' in '{lang}'**\n"
-                    "__Please forward this to__ @userbotindo"
-                )
-
-            bot.log.warning("NO LANGUAGE STRING FOR '%s' in '%s'", text_name, lang)
-            return _get_text("en")
-        else:
-            try:
-                return text if noformat else text.format(*args, **kwargs)
-            except (IndexError, KeyError):
-                bot.log.error("Failed to format '%s' string on '%s'", text_name, lang)
-                raise
+    """Synchronous version of `get_text`, see that function for the parameters."""
+    lang = bot.chats_languages.get(chat_id or 0, "en")
+    # Language tables are already decoded and filled with the 'en' fallback
+    # when they're loaded, so this is a plain lookup
+    strings = bot.languages.get(lang) or bot.languages.get("en", {})
+    try:
+        text = strings[text_name]
+    except KeyError:
+        return (
+            f"**NO LANGUAGE STRING FOR '{text_name}' in 'en'**\n"
+            "__Please forward this to__ @userbotindo"
+        )
+
+    try:
+        return text if noformat else text.format(*args, **kwargs)
+    except (IndexError, KeyError):
+        bot.log.error("Failed to format '%s' string on '%s'", text_name, lang)
+        raise
+
 
-    return _get_text(bot.chats_languages.get(chat_id or 0, "en"))
+async def get_text(
+    bot: "Anjani",
+    chat_id: Optional[int],
+    text_name: str,
+    *args: Any,
+    noformat: bool = False,
+    **kwargs: Any,
+) -> str:
+    """Parse the string with user language setting.
+
+    Parameters:
+        bot (`Anjani`):
+            The bot instance.
+        chat_id (`int`, *Optional*):
+            Id of the sender(PM's) or chat_id to fetch the user language setting.
+            If chat_id is None, the language will always use 'en'.
+        text_name (`str`):
+            String name to parse. The string is parsed from YAML documents.
+        *args (`any`, *Optional*):
+            One or more values that should be formatted and inserted in the string.
+            The value should be in order based on the language string placeholder.
+        noformat (`bool`, *Optional*):
+            If True, the text returned will not be formated.
+            Default to False.
+        **kwargs (`any`, *Optional*):
+            One or more keyword values that should be formatted and inserted in the string.
+            based on the keyword on the language strings.
+    """
+    return get_text_sync(bot, chat_id, text_name, *args, noformat=noformat, **kwargs)
 
 
 # }
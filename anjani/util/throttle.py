@@ -0,0 +1,88 @@
+"""Anjani adaptive concurrency throttle"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class AdaptiveThrottle:
+    """Concurrency limiter for API calls that may answer with a flood wait.
+
+    At most `limit` calls hold a slot at once. A flood wait pauses every
+    caller until the wait is over and halves the limit; after `limit`
+    consecutive successes the limit grows back by one, up to `max_limit`.
+    """
+
+    # Initialized during instantiation
+    limit: int
+    min_limit: int
+    max_limit: int
+    _active: int
+    _successes: int
+    _resume_at: float
+    _released: asyncio.Event
+    _clock: Callable[[], float]
+
+    def __init__(
+        self,
+        max_limit: int,
+        *,
+        min_limit: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = self.max_limit
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._released = asyncio.Event()
+        self._clock = clock
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self._resume_at - self._clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            if self._active < self.limit:
+                self._active += 1
+                return
+
+            self._released.clear()
+            await self._released.wait()
+
+    def release(self, *, flood_wait: Optional[float] = None) -> None:
+        """Give the slot back, `flood_wait` is the wait in seconds requested by the server"""
+        self._active -= 1
+        if flood_wait is not None:
+            self._resume_at = max(self._resume_at, self._clock() + flood_wait)
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._successes = 0
+        else:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+
+        self._released.set()
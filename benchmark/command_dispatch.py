@@ -0,0 +1,80 @@
+"""Command argument parsing overhead benchmark"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python -m benchmark.command_dispatch [iterations]
+#
+# Compares resolving the command signature and converters on every call,
+# which is what the dispatcher used to do, against a precompiled plan.
+
+import asyncio
+import inspect
+import sys
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from anjani.util.converter import InvocationPlan, parse_arguments
+
+
+class Message:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.command = text[1:].split(" ")
+
+
+class Context:
+    def __init__(self, message: Message) -> None:
+        self.msg = message
+        self.args = message.command[1:]
+
+
+async def cmd_ban(ctx: Any, user: int, delete: bool = False, *, reason: Optional[str]) -> None:
+    ...
+
+
+async def bench(name: str, iterations: int, func: Callable[[], Awaitable[Any]]) -> float:
+    # Warm up
+    for _ in range(1000):
+        await func()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<12} {elapsed / iterations * 1e6:8.2f} µs/call")
+    return elapsed
+
+
+async def main(iterations: int) -> None:
+    ctx = Context(Message("/ban 1234567 yes spamming in the group"))
+    plan = InvocationPlan(cmd_ban)
+
+    async def per_call() -> Any:
+        return await parse_arguments(inspect.signature(cmd_ban), ctx, cmd_ban)  # type: ignore
+
+    async def precompiled() -> Any:
+        return await plan.parse(ctx)  # type: ignore
+
+    assert await per_call() == await precompiled()
+
+    before = await bench("per-call", iterations, per_call)
+    after = await bench("precompiled", iterations, precompiled)
+    print(f"speedup      {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
@@ -0,0 +1,118 @@
+"""Async cursor iteration overhead benchmark"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python -m benchmark.cursor_iteration [documents]
+#
+# Compares hopping to the executor for every document, which is what the
+# async cursor used to do, against draining the fetched batch on the loop.
+# The driver cursor is simulated so that no MongoDB server is needed, every
+# refresh hands out one server sized batch of documents.
+
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List
+
+from anjani import util
+from anjani.util.db import AsyncCursor
+
+BATCH_SIZE = 101
+
+
+class Cursor:
+    """Stand-in for :obj:`pymongo.cursor.Cursor` serving in-memory batches"""
+
+    collection = None
+
+    def __init__(self, documents: int) -> None:
+        self._Cursor__data: Deque[Dict[str, Any]] = deque()
+        self._Cursor__empty = False
+        self._Cursor__killed = False
+        self._Cursor__query_flags = 0
+        self.remaining = documents
+        self.offset = 0
+
+    @property
+    def alive(self) -> bool:
+        return bool(len(self._Cursor__data) or not self._Cursor__killed)
+
+    def _refresh(self) -> int:
+        if not self._Cursor__data and not self._Cursor__killed:
+            size = min(BATCH_SIZE, self.remaining)
+            self._Cursor__data.extend({"_id": self.offset + i, "name": "x"} for i in range(size))
+            self.offset += size
+            self.remaining -= size
+            if not self.remaining:
+                self._Cursor__killed = True
+
+        return len(self._Cursor__data)
+
+    def __next__(self) -> Dict[str, Any]:
+        if len(self._Cursor__data) or self._refresh():
+            return self._Cursor__data.popleft()
+        raise StopIteration
+
+    def close(self) -> None:
+        self._Cursor__killed = True
+
+
+async def per_document(documents: int) -> int:
+    cursor = AsyncCursor(Cursor(documents))  # type: ignore
+    count = 0
+    while cursor.alive and (cursor._buffer_size() or await cursor._get_more()):
+        await util.run_sync(next, cursor.dispatch)
+        count += 1
+
+    return count
+
+
+async def iterate(documents: int) -> int:
+    count = 0
+    async for _ in AsyncCursor(Cursor(documents)):  # type: ignore
+        count += 1
+
+    return count
+
+
+async def batches(documents: int) -> int:
+    count = 0
+    batch: List[Any]
+    async for batch in AsyncCursor(Cursor(documents)).batches():  # type: ignore
+        count += len(batch)
+
+    return count
+
+
+async def bench(name: str, documents: int, func: Callable[[int], Awaitable[int]]) -> float:
+    start = time.perf_counter()
+    assert await func(documents) == documents
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<14} {elapsed * 1e3:10.2f} ms {elapsed / documents * 1e6:8.2f} µs/doc")
+    return elapsed
+
+
+async def main(documents: int) -> None:
+    before = await bench("per-document", documents, per_document)
+    after = await bench("async for", documents, iterate)
+    batched = await bench("batches()", documents, batches)
+    print(f"speedup        {before / after:10.2f}x {before / batched:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
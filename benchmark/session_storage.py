@@ -0,0 +1,95 @@
+"""Session storage event loop lag benchmark"""
+
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python -m benchmark.session_storage [updates] [peers per update]
+#
+# Replays a burst of updates into each session storage the way pyrogram does,
+# one update_peers and update_usernames call per update, while a ticker
+# measures how late the event loop wakes it up.
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple, Type
+
+from anjani.core.sqlite_storage import SQLiteStorage, ThreadedSQLiteStorage
+
+
+async def ticker(lags: List[float], interval: float = 0.001) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def bench(storage_type: Type[SQLiteStorage], updates: int, peers: int) -> Tuple[float, float]:
+    storage = storage_type("bench")
+    await storage.open()
+
+    lags: List[float] = []
+    task = asyncio.create_task(ticker(lags))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    for update in range(updates):
+        batch = [
+            (update * peers + i, i, "user", f"user{update * peers + i}", None) for i in range(peers)
+        ]
+        await storage.update_peers(batch)  # type: ignore
+        await storage.update_usernames([(peer[0], peer[3]) for peer in batch])
+        await storage.get_peer_by_id(batch[0][0])
+        # Let the loop run other updates in between
+        await asyncio.sleep(0)
+
+    await storage.save()
+    await storage.close()
+    elapsed = time.perf_counter() - start
+
+    task.cancel()
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+    print(
+        f"{storage_type.__name__:<24} {elapsed * 1e3:10.2f} ms total "
+        f"lag p99 {p99 * 1e3:7.2f} ms max {max(lags, default=0.0) * 1e3:7.2f} ms"
+    )
+    return elapsed, max(lags, default=0.0)
+
+
+async def main(updates: int, peers: int) -> None:
+    print(f"{updates} updates with {peers} peers each")
+    for storage_type in (SQLiteStorage, ThreadedSQLiteStorage):
+        with tempfile.TemporaryDirectory() as workdir:
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            Path("anjani").mkdir()
+            try:
+                await bench(storage_type, updates, peers)
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        )
+    )
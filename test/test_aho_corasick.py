@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+from anjani.util.aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick:
+    def test_iter_matches(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        assert sorted(automaton.iter_matches("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+        assert len(automaton) == 4
+
+    def test_search_first_longest(self):
+        automaton = AhoCorasick(["b", "ab", "abc"])
+        assert automaton.search("xabcd") == (1, "abc")
+        assert automaton.search("xyz") is None
+
+    def test_whole_word(self):
+        automaton = AhoCorasick(["hi", "hi!", "bye"])
+        assert automaton.search("this", whole_word=True) is None
+        assert automaton.search("oh hi! there", whole_word=True) == (3, "hi!")
+        assert automaton.search("goodbye, bye", whole_word=True) == (9, "bye")
+
+    def test_same_as_regex(self):
+        triggers = ["hello", "good morning", ":)", "a_b"]
+        automaton = AhoCorasick(triggers)
+        for text in ("hello!", "ahello", "say good morning :)", "a_b_c", "x a_b", ":):)"):
+            expected = any(
+                re.search(r"( |^|[^\w])" + re.escape(i) + r"( |$|[^\w])", text) for i in triggers
+            )
+            assert (automaton.search(text, whole_word=True) is not None) == expected
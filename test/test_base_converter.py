@@ -19,7 +19,7 @@ from inspect import signature
 import pytest
 
 from anjani.error import BadArgument
-from anjani.util.converter import parse_arguments
+from anjani.util.converter import InvocationPlan, parse_arguments
 
 from . import Context, Message
 
@@ -65,6 +65,10 @@ async def var_keyword(ctx, **kwargs):
     ...
 
 
+async def bool_arg_with_default(ctx, arg: bool = False):
+    ...
+
+
 class TestBaseConverter:
     async def __parse_arguments(self, func):
         return await parse_arguments(signature(func), context, func)  # type: ignore
@@ -145,3 +149,33 @@ class TestBaseConverter:
         with pytest.raises(BadArgument):
             await self.__parse_arguments(var_keyword)
             await self.__parse_arguments_no_args(var_keyword)
+
+
+class TestInvocationPlan:
+    def test_needs_parsing(self):
+        assert not InvocationPlan(no_args).needs_parsing
+        assert InvocationPlan(one_arg).needs_parsing
+        assert InvocationPlan(kwarg_only).needs_parsing
+
+    @pytest.mark.asyncio
+    async def test_same_result_as_parse_arguments(self):
+        for func in (
+            one_arg,
+            one_arg_with_default,
+            one_arg_with_type,
+            one_arg_with_default_and_type,
+            kwarg_only,
+            kwarg_only_with_default,
+        ):
+            plan = InvocationPlan(func)
+            for ctx in (context, no_args_context):
+                assert await plan.parse(ctx) == await parse_arguments(signature(func), ctx, func)
+
+    @pytest.mark.asyncio
+    async def test_bool_arg(self):
+        plan = InvocationPlan(bool_arg_with_default)
+        args, _ = await plan.parse(Context(message=Message(text="/test on")))
+        assert args == [True]
+
+        args, _ = await plan.parse(Context(message=Message(text="/test maybe")))
+        assert args == [False]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from anjani.util.batcher import MicroBatcher
+
+
+class TestMicroBatcher:
+    @pytest.mark.asyncio
+    async def test_batch(self):
+        batches = []
+
+        async def func(items):
+            batches.append(items)
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(func, max_size=3, max_wait=0.01)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        assert results == [0, 2, 4, 6]
+        assert batches == [[0, 1, 2], [3]]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_batch(self):
+        async def func(items):
+            raise asyncio.CancelledError
+
+        batcher = MicroBatcher(func, max_size=2, max_wait=0.01)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True), 1
+        )
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from anjani.util.cache import LRUCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    def test_bounded(self):
+        cache = LRUCache(2)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        assert 1 in cache
+        assert 2 not in cache
+        assert len(cache) == 2
+
+    def test_ttl(self):
+        clock = Clock()
+        cache = LRUCache(2, ttl=10, clock=clock)
+        cache.set(1, "a")
+
+        clock.now = 9.0
+        assert cache.get(1) == "a"
+        clock.now = 10.0
+        assert cache.get(1) is None
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_coalesce(self):
+        cache = LRUCache(10)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1
+        assert cache.get("key") == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_invalidated(self):
+        cache = LRUCache(10)
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return "stale"
+
+        task = asyncio.ensure_future(cache.get_or_load("key", loader))
+        await asyncio.sleep(0)
+        cache.pop("key")
+
+        assert await task == "stale"
+        assert "key" not in cache
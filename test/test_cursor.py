@@ -0,0 +1,68 @@
+"""Async cursor batch iteration tests"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+
+import pytest
+
+from anjani.util.db import AsyncCursor
+
+
+class Cursor:
+    collection = None
+
+    def __init__(self, *batches) -> None:
+        self._Cursor__data = deque()
+        self._Cursor__empty = False
+        self._Cursor__killed = False
+        self.batches = list(batches)
+        self.refreshed = 0
+
+    @property
+    def alive(self) -> bool:
+        return bool(len(self._Cursor__data) or not self._Cursor__killed)
+
+    def _refresh(self) -> int:
+        if not self._Cursor__data and not self._Cursor__killed:
+            self.refreshed += 1
+            self._Cursor__data.extend(self.batches.pop(0))
+            if not self.batches:
+                self._Cursor__killed = True
+
+        return len(self._Cursor__data)
+
+
+class TestAsyncCursor:
+    @pytest.mark.asyncio
+    async def test_next(self):
+        dispatch = Cursor([1, 2, 3], [4, 5], [])
+        assert [doc async for doc in AsyncCursor(dispatch)] == [1, 2, 3, 4, 5]  # type: ignore
+        assert dispatch.refreshed == 3
+
+    @pytest.mark.asyncio
+    async def test_batches(self):
+        dispatch = Cursor([1, 2, 3], [4, 5], [])
+        cursor = AsyncCursor(dispatch)  # type: ignore
+        assert await cursor.next() == 1
+        assert [batch async for batch in cursor.batches()] == [[2, 3], [4, 5]]
+        assert not cursor.alive
+
+    @pytest.mark.asyncio
+    async def test_empty(self):
+        dispatch = Cursor([1])
+        dispatch._Cursor__empty = True
+        assert [doc async for doc in AsyncCursor(dispatch)] == []  # type: ignore
+        assert dispatch.refreshed == 0
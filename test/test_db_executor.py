@@ -0,0 +1,49 @@
+"""Database executor tests"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+import pytest
+
+from anjani.util.db.executor import DatabaseExecutor
+from anjani.util.db.metrics import ExecutorInFlight, ExecutorQueueDepth
+
+
+class TestDatabaseExecutor:
+    @pytest.mark.asyncio
+    async def test_run(self):
+        executor = DatabaseExecutor(2)
+        name = await executor.run(lambda: threading.current_thread().name)
+        assert name.startswith("AnjaniDB")
+        assert ExecutorQueueDepth._value.get() == 0
+        assert ExecutorInFlight._value.get() == 0
+
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+        assert ExecutorInFlight._value.get() == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_resize(self):
+        executor = DatabaseExecutor(2)
+        pool = executor.pool
+        executor.resize(2)
+        assert executor.pool is pool
+
+        executor.resize(None)
+        assert executor.max_workers == 100
+        assert executor.pool is not pool
+        executor.shutdown()
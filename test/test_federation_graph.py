@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from anjani import util  # noqa: F401  # resolve the command/util import cycle first
+from anjani.plugins.federation import FederationGraph
+
+
+class TestFederationGraph:
+    def test_effective_transitive(self):
+        graph = FederationGraph()
+        graph.update("a", [1], ["b"])  # b subscribes to a
+        graph.update("b", [2], ["c"])  # c subscribes to b
+        graph.update("c", [3], [])
+
+        assert graph.fed_of(3) == "c"
+        assert graph.effective("c") == {"a", "b", "c"}
+        assert graph.effective("a") == {"a"}
+
+    def test_enforcing_transitive(self):
+        graph = FederationGraph()
+        graph.update("a", [1], ["b"])
+        graph.update("b", [2], ["c"])
+        graph.update("c", [3], [])
+
+        # A ban in "a" reaches every chat whose federation enforces it
+        assert graph.enforcing("a") == {"a", "b", "c"}
+        assert all("a" in graph.effective(fid) for fid in graph.enforcing("a"))
+        assert graph.enforcing("c") == {"c"}
+        assert graph.chats_of("b") == {2}
+
+    def test_effective_cycle(self):
+        graph = FederationGraph()
+        graph.update("a", [], ["b"])
+        graph.update("b", [], ["a"])
+
+        assert graph.effective("a") == {"a", "b"}
+        assert graph.effective("b") == {"a", "b"}
+
+    def test_incremental(self):
+        graph = FederationGraph()
+        graph.update("a", [1], [])
+        graph.update("b", [2], [])
+        assert graph.effective("b") == {"b"}
+
+        graph.subscribe("b", "a")
+        assert graph.effective("b") == {"a", "b"}
+
+        graph.unsubscribe("b", "a")
+        assert graph.effective("b") == {"b"}
+
+        graph.subscribe("b", "a")
+        graph.remove("a")
+        assert graph.fed_of(1) is None
+        assert graph.effective("b") == {"b"}
+
+        graph.remove_chat("b", 2)
+        graph.add_chat("a", 2)
+        assert graph.fed_of(2) == "a"
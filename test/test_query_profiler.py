@@ -0,0 +1,52 @@
+"""Database query profiler tests"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+
+from anjani.util.db.profiler import QueryProfiler, redact
+
+
+def test_redact():
+    assert redact({"chat_id": 1, "user": {"$in": [1, 2]}}) == {
+        "chat_id": "?",
+        "user": {"$in": ["?"]},
+    }
+    assert redact([{"$match": {"a": "x"}}, {"$group": {"_id": None}}]) == [
+        {"$match": {"a": "?"}},
+        {"$group": {"_id": "?"}},
+    ]
+
+
+def test_slowest(caplog):
+    profiler = QueryProfiler()
+    profiler.configure(enabled=True, slow_threshold=0.5)
+    with caplog.at_level(logging.WARNING, "query_profiler"):
+        profiler.record("CHATS", "find_one", 0.01, query={"chat_id": 1}, documents=[{"a": 1}])
+        profiler.record("CHATS", "find_one", 0.03, query={"chat_id": 2})
+        profiler.record("USERS", "find", 0.6, query={"_id": 3}, projection={"name": 1})
+
+    first, second = profiler.slowest()
+    assert (first.collection, first.shape, first.projection) == (
+        "USERS",
+        "{'_id': '?'}",
+        "{'name': 1}",
+    )
+    assert (second.count, second.slowest) == (2, 0.03)
+    assert len(profiler.slowest(1)) == 1
+
+    assert len(caplog.records) == 1
+    assert "USERS.find" in caplog.text
+    assert "3" not in caplog.records[0].getMessage().split("filter=")[1].split(" ")[0]
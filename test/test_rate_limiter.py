@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from anjani.core.rate_limiter import CommandRateLimiter, RateLimiter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateLimiter:
+    def test_burst_and_refill(self):
+        clock = Clock()
+        limiter = RateLimiter("test", 3, 3, clock=clock)
+
+        assert all(limiter.acquire(1) for _ in range(3))
+        assert not limiter.acquire(1)
+        # Other keys have their own bucket
+        assert limiter.acquire(2)
+
+        clock.now = 1.0
+        assert limiter.acquire(1)
+        assert not limiter.acquire(1)
+
+    def test_bounded_size(self):
+        clock = Clock()
+        limiter = RateLimiter("test", 1, 10, max_size=3, clock=clock)
+
+        for key in range(10):
+            assert limiter.acquire(key)
+
+        assert len(limiter) == 3
+
+    def test_idle_bucket_expires(self):
+        clock = Clock()
+        limiter = RateLimiter("test", 1, 10, clock=clock)
+
+        limiter.acquire(1)
+        clock.now = 20.0
+        limiter.acquire(2)
+        assert len(limiter) == 1
+
+    def test_command_limiter_scopes(self):
+        clock = Clock()
+        limiter = CommandRateLimiter(
+            user=RateLimiter("user", 2, 10, clock=clock),
+            chat=RateLimiter("chat", 3, 10, clock=clock),
+            total=RateLimiter("global", 100, 10, clock=clock),
+        )
+
+        assert limiter.acquire(1, 100)
+        assert limiter.acquire(1, 100)
+        # User limit reached, the chat still has a token left
+        assert not limiter.acquire(1, 100)
+        assert limiter.acquire(2, 100)
+        # Chat limit reached
+        assert not limiter.acquire(3, 100)
+        assert limiter.acquire(3, 200)
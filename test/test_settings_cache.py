@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from anjani.util.db.settings_cache import AsyncSettingsCache, AsyncSettingsWatcher
+
+
+class Collection:
+    def __init__(self, name: str = "TEST") -> None:
+        self.name = name
+        self.documents = {}
+        self.queries = []
+
+    async def find_one(self, query, projection=None):
+        self.queries.append((query, projection))
+        document = self.documents.get(query["chat_id"])
+        if document is None or projection is None:
+            return document
+        return {"_id": 0, **{k: v for k, v in document.items() if k in projection}}
+
+
+class Database:
+    def get_collection(self, name):
+        return Collection(name)
+
+
+class TestAsyncSettingsCache:
+    @pytest.mark.asyncio
+    async def test_read_through(self):
+        collection = Collection()
+        collection.documents[1] = {"chat_id": 1, "setting": False, "text": "hi"}
+        cache = AsyncSettingsCache(collection, fields=("setting",))  # type: ignore
+
+        assert await cache.get(1) == {"_id": 0, "setting": False}
+        assert await cache.get(1) == {"_id": 0, "setting": False}
+        assert await cache.get(2) is None
+        assert await cache.get(2) is None
+        assert collection.queries == [
+            ({"chat_id": 1}, {"setting": True}),
+            ({"chat_id": 2}, {"setting": True}),
+        ]
+
+        collection.documents[1]["setting"] = True
+        cache.invalidate(1)
+        assert await cache.get(1) == {"_id": 0, "setting": True}
+        assert len(collection.queries) == 3
+
+    @pytest.mark.asyncio
+    async def test_apply_change(self):
+        collection = Collection()
+        cache = AsyncSettingsCache(collection, fields=("setting",))  # type: ignore
+        await cache.get(1)
+        await cache.get(2)
+
+        cache._apply({"operationType": "update", "fullDocument": {"_id": 0, "chat_id": 1}})
+        assert len(cache) == 1
+        # Deletes can't be mapped back to a key
+        cache._apply({"operationType": "delete", "documentKey": {"_id": 0}})
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_add_fields(self):
+        collection = Collection()
+        cache = AsyncSettingsCache(collection, fields=("setting",))  # type: ignore
+        await cache.get(1)
+
+        assert not cache.add_fields(("setting",))
+        assert len(cache) == 1
+        assert cache.add_fields(("setting", "type"))
+        assert len(cache) == 0
+        assert cache.fields == {"setting", "type"}
+
+
+class TestAsyncSettingsWatcher:
+    def test_get_cache(self):
+        watcher = AsyncSettingsWatcher(Database())  # type: ignore
+        cache = watcher.get_cache("CHATS", fields=("action_topic",))
+        assert watcher.get_cache("CHATS", fields=("action_topic",)) is cache
+        with pytest.raises(ValueError):
+            watcher.get_cache("CHATS", "_id")
+
+        watcher.get_cache("USERS", "_id", fields=("setting",))
+        match, project = watcher._pipeline()
+        assert [i["ns.coll"] for i in match["$match"]["$or"]] == ["CHATS", "USERS"]
+        assert project["$project"]["fullDocument.chat_id"] == 1
@@ -0,0 +1,211 @@
+"""Threaded session storage tests"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from anjani import util  # noqa: F401  # skipcq: PY-W2000
+from anjani.core.metrics import SessionStorageRows
+from anjani.core.session_replica import SessionReplica
+from anjani.core.sqlite_storage import SQLiteStorage, ThreadedSQLiteStorage
+
+
+class Database:
+    def get_collection(self, name):
+        return name
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    (tmp_path / "anjani").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestSQLiteStorage:
+    @pytest.mark.asyncio
+    async def test_session_write_back(self, workdir):
+        storage = SQLiteStorage("test")
+        await storage.open()
+        statements = []
+        storage.conn.set_trace_callback(statements.append)
+
+        await storage.dc_id(4)
+        await storage.auth_key(b"key")
+        await storage.user_id(1234)
+        await storage.is_bot(True)
+        assert await storage.dc_id() == 4
+        assert not statements
+
+        await storage.save()
+        updates = [i for i in statements if i.startswith("UPDATE")]
+        assert len(updates) == 1
+        assert updates[0].startswith("UPDATE sessions SET")
+        await storage.close()
+
+        storage = SQLiteStorage("test")
+        await storage.open()
+        assert (await storage.dc_id(), await storage.auth_key(), await storage.user_id()) == (
+            4,
+            b"key",
+            1234,
+        )
+        assert await storage.date()
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_replicate_existing_session(self, workdir):
+        storage = SQLiteStorage("test")
+        await storage.open()
+        await storage.dc_id(4)
+        await storage.auth_key(b"key")
+        await storage.close()
+
+        storage = SQLiteStorage("test")
+        storage.replica = SessionReplica(Database(), "bot")  # type: ignore
+        await storage.open()
+        update = storage.replica.session._pending["bot"].build()["$set"]
+        assert update["storage.auth_key"] == b"key"
+        assert update["storage.dc_id"] == 4
+        assert len(update) == 7
+        storage.replica = None
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_maintain(self, workdir):
+        storage = SQLiteStorage("test", peer_ttl=60)
+        await storage.open()
+        assert storage.conn.execute("PRAGMA auto_vacuum").fetchone() == (2,)
+
+        await storage.update_peers([(i, i, "user", f"user{i}", None) for i in range(3000)])
+        await storage.update_usernames([(1, "old"), (2, "new")])
+        # Updates would bump last_update_on through the triggers
+        with storage.conn:
+            storage.conn.execute(
+                "REPLACE INTO peers (id, access_hash, type, last_update_on) "
+                "SELECT id, access_hash, type, 0 FROM peers WHERE id >= 10"
+            )
+            storage.conn.execute("REPLACE INTO usernames VALUES ('old', 1, 0)")
+
+        await storage.maintain()
+        assert storage.conn.execute("SELECT COUNT(*) FROM peers").fetchone() == (10,)
+        assert storage.conn.execute("SELECT id FROM usernames").fetchall() == [("new",)]
+        assert storage.conn.execute("PRAGMA freelist_count").fetchone() == (0,)
+        assert SessionStorageRows.labels("peers")._value.get() == 10
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_rebuild(self, workdir):
+        async def peers():
+            yield [
+                {"peer_id": 1, "access_hash": 10, "type": "user", "username": "alice", "date": 5},
+                {"peer_id": 2, "access_hash": 20, "type": "bot", "usernames": ["helper"]},
+            ]
+            yield [{"peer_id": 3, "access_hash": 30, "type": "channel"}]
+
+        storage = SQLiteStorage("test")
+        session = {"dc_id": 4, "auth_key": b"key", "user_id": 1234, "is_bot": True}
+        assert await storage.rebuild(session, peers()) == 3
+
+        storage = SQLiteStorage("test")
+        await storage.open()
+        assert (await storage.auth_key(), await storage.is_bot()) == (b"key", True)
+        assert (await storage.get_peer_by_id(3)).access_hash == 30
+        assert (await storage.get_peer_by_username("helper")).user_id == 2
+        with pytest.raises(KeyError):
+            # Replicated date kept, so the username is long expired
+            await storage.get_peer_by_username("alice")
+        await storage.close()
+
+
+class TestSessionReplica:
+    def test_update_peers(self):
+        replica = SessionReplica(Database(), "bot")  # type: ignore
+        replica.update_peers([(1, 10, "user", "alice", None), (2, 20, "bot", None, None)])
+        replica.update_peers([(1, 10, "user", "alice", None), (2, 21, "bot", None, None)])
+        assert len(replica.peers) == 2
+
+        replica.peers._pending.clear()
+        replica.update_peers([(1, 10, "user", "alice", None), (2, 21, "bot", None, None)])
+        assert not replica.peers
+
+        replica.update_session({"dc_id": 4, "auth_key": b"key"})
+        assert replica.session._pending["bot"].build() == {
+            "$set": {"storage.dc_id": 4, "storage.auth_key": b"key"}
+        }
+
+
+class TestThreadedSQLiteStorage:
+    @pytest.mark.asyncio
+    async def test_coalesced_writes(self, workdir):
+        storage = ThreadedSQLiteStorage("test", flush_interval=60)
+        await storage.open()
+        await storage.update_peers([(1, 10, "user", "alice", "123"), (2, 20, "bot", None, None)])
+        await storage.update_usernames([(2, "helper"), (2, "helper_bot")])
+
+        # Served from memory before anything is committed
+        assert storage.conn.execute("SELECT COUNT(*) FROM peers").fetchone() == (0,)
+        assert (await storage.get_peer_by_username("alice")).user_id == 1
+        assert (await storage.get_peer_by_phone_number("123")).user_id == 1
+        assert (await storage.get_peer_by_username("helper_bot")).user_id == 2
+
+        await storage.flush()
+        assert storage.conn.execute("SELECT COUNT(*) FROM peers").fetchone() == (2,)
+        await storage.update_peers([(1, 11, "user", "bob", None)])
+        with pytest.raises(KeyError):
+            await storage.get_peer_by_username("alice")
+        await storage.close()
+
+        storage = ThreadedSQLiteStorage("test")
+        await storage.open()
+        assert (await storage.get_peer_by_id(1)).access_hash == 11
+        assert (await storage.get_peer_by_username("bob")).user_id == 1
+        assert (await storage.get_peer_by_username("helper")).user_id == 2
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_burst_over_front(self, workdir):
+        storage = ThreadedSQLiteStorage("test", flush_interval=60)
+        await storage.open()
+        size = storage.FRONT_SIZE + 2000
+        await storage.update_peers([(i, i * 10, "user", None, None) for i in range(1, size + 1)])
+
+        # Evicted from the front cache but not committed yet
+        assert storage.conn.execute("SELECT COUNT(*) FROM peers").fetchone() == (0,)
+        assert (await storage.get_peer_by_id(1)).access_hash == 10
+        assert (await storage.get_peer_by_id(size)).access_hash == size * 10
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_switch_back(self, workdir):
+        def triggers(storage):
+            query = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'peers'"
+            return {name for name, in storage.conn.execute(query)}
+
+        storage = SQLiteStorage("test")
+        await storage.open()
+        assert "trg_session_last_update_on" in triggers(storage)
+        await storage.close()
+
+        storage = ThreadedSQLiteStorage("test")
+        await storage.open()
+        assert "trg_session_last_update_on" not in triggers(storage)
+        await storage.close()
+
+        # Going back to the plain storage brings the date trigger back
+        storage = SQLiteStorage("test")
+        await storage.open()
+        assert "trg_session_last_update_on" in triggers(storage)
+        await storage.close()
@@ -14,9 +14,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging
+
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from anjani.util.tg import build_button, parse_button, revert_button, truncate
+from anjani.language import compile_languages
+from anjani.util.tg import (
+    build_button,
+    get_text_sync,
+    parse_button,
+    revert_button,
+    truncate,
+)
 
 
 def test_truncate():
@@ -89,3 +98,22 @@ def test_build_button():
         ]
     )
     assert build_button(button) == expected
+
+
+def test_get_text():
+    class Bot:
+        log = logging.getLogger("test")
+        chats_languages = {1: "id"}
+        languages = compile_languages(
+            {
+                "en": {"greet": "Hello\\n{}", "bye": "Bye"},
+                "id": {"greet": "Halo\\n{}"},
+            },
+            log,
+        )
+
+    assert get_text_sync(Bot, 1, "greet", "World") == "Halo\nWorld"
+    assert get_text_sync(Bot, 2, "greet", "World") == "Hello\nWorld"
+    # Missing string falls back to 'en'
+    assert get_text_sync(Bot, 1, "bye") == "Bye"
+    assert get_text_sync(Bot, 1, "greet", noformat=True) == "Halo\n{}"
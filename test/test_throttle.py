@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from anjani.util.throttle import AdaptiveThrottle
+
+
+class TestAdaptiveThrottle:
+    @pytest.mark.asyncio
+    async def test_limit(self):
+        throttle = AdaptiveThrottle(2)
+        await throttle.acquire()
+        await throttle.acquire()
+
+        waiter = asyncio.ensure_future(throttle.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        throttle.release()
+        await asyncio.wait_for(waiter, 1)
+        assert throttle.active == 2
+
+    @pytest.mark.asyncio
+    async def test_flood_wait(self):
+        throttle = AdaptiveThrottle(8)
+        await throttle.acquire()
+        throttle.release(flood_wait=0.05)
+        assert throttle.limit == 4
+
+        waiter = asyncio.ensure_future(throttle.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        await asyncio.wait_for(waiter, 1)
+        throttle.release()
+
+    @pytest.mark.asyncio
+    async def test_recover(self):
+        throttle = AdaptiveThrottle(4, min_limit=2)
+        for _ in range(3):
+            await throttle.acquire()
+            throttle.release(flood_wait=0)
+        assert throttle.limit == 2
+
+        for _ in range(2):
+            await throttle.acquire()
+            throttle.release()
+        assert throttle.limit == 3
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from anjani.util.db.write_buffer import AsyncWriteBuffer
+
+
+class Collection:
+    name = "TEST"
+
+    def __init__(self) -> None:
+        self.requests = []
+
+    async def bulk_write(self, requests, *, ordered=True):
+        assert not ordered
+        self.requests.extend(requests)
+
+
+class TestAsyncWriteBuffer:
+    @pytest.mark.asyncio
+    async def test_merge(self):
+        collection = Collection()
+        buffer = AsyncWriteBuffer(collection, "chat_id")  # type: ignore
+        buffer.update(1, {"$set": {"a": 1}, "$addToSet": {"member": 10}})
+        buffer.update(1, {"$set": {"a": 2}, "$addToSet": {"member": {"$each": [10, 11]}}})
+        buffer.update(1, {"$setOnInsert": {"hash": "x", "member": []}}, upsert=True)
+        buffer.update(2, {"$set": {"a": 3}})
+        assert len(buffer) == 2
+
+        await buffer.flush()
+        assert len(buffer) == 0
+        first, second = collection.requests
+        assert first._filter == {"chat_id": 1}
+        assert first._doc == {
+            "$set": {"a": 2},
+            "$addToSet": {"member": {"$each": [10, 11]}},
+            "$setOnInsert": {"hash": "x"},
+        }
+        assert first._upsert
+        assert second._doc == {"$set": {"a": 3}}
+        assert not second._upsert
+
+    @pytest.mark.asyncio
+    async def test_failed_write_dropped(self):
+        class Failing(Collection):
+            async def bulk_write(self, requests, *, ordered=True):
+                raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "bad"}]})
+
+        buffer = AsyncWriteBuffer(Failing())  # type: ignore
+        buffer.update(1, {"$set": {"a": 1}})
+        buffer.update(2, {"$set": {"a": {"$bad": 1}}})
+        with pytest.raises(BulkWriteError):
+            await buffer.flush()
+        # The other update was written, the failed one would never succeed
+        assert len(buffer) == 0
+
+        class Unacknowledged(Collection):
+            async def bulk_write(self, requests, *, ordered=True):
+                raise BulkWriteError(
+                    {"writeErrors": [{"index": 1, "errmsg": "bad"}], "writeConcernErrors": [{}]}
+                )
+
+        buffer = AsyncWriteBuffer(Unacknowledged())  # type: ignore
+        buffer.update(1, {"$set": {"a": 1}})
+        buffer.update(2, {"$set": {"a": {"$bad": 1}}})
+        with pytest.raises(BulkWriteError):
+            await buffer.flush()
+        assert list(buffer._pending) == [1]
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_requeues(self):
+        class Failing(Collection):
+            async def bulk_write(self, requests, *, ordered=True):
+                raise RuntimeError
+
+        buffer = AsyncWriteBuffer(Failing())  # type: ignore
+        buffer.update(1, {"$set": {"a": 1}})
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        assert len(buffer) == 1
+
+    def test_unsupported(self):
+        buffer = AsyncWriteBuffer(Collection())  # type: ignore
+        with pytest.raises(ValueError):
+            buffer.update(1, {"$inc": {"a": 1}})
+
+    @pytest.mark.asyncio
+    async def test_compound_key(self):
+        collection = Collection()
+        buffer = AsyncWriteBuffer(collection, ("chat_id", "user_id"))  # type: ignore
+        buffer.update((1, 2), {"$setOnInsert": {"first_seen": 1}}, upsert=True)
+        buffer.update((1, 2), {"$setOnInsert": {"first_seen": 2}, "$set": {"last_seen": 2}})
+        buffer.update((1, 3), {"$set": {"last_seen": 3}})
+        buffer.discard((1, 3))
+
+        await buffer.flush()
+        (request,) = collection.requests
+        assert request._filter == {"chat_id": 1, "user_id": 2}
+        assert request._doc == {"$set": {"last_seen": 2}, "$setOnInsert": {"first_seen": 1}}